@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""行情行格式化耗时基准：旧的“逐行计算指标 + 格式化”与 format_rows（core.indicators.quote_rows）对比。
+
+运行：python -m benchmarks.bench_indicators
+分别以 100 / 1000 / 5000 行（A股 / 基金 / 指数混合，所有行均需重新格式化）计时，输出每轮耗时
+（毫秒，取多轮最小值）及逐轮 after / before 之比的中位数（单核 / 虚拟机上最小值也会漂移，以比值为准）。
+format_rows 随实际后端计时：未安装 NumPy（随程序打包的情况）时指标逐个行情直接计算；
+指标计算单独列出逐行情与 NumPy 装列（若已安装）两种实现。
+"""
+
+import statistics
+import timeit
+
+from stockwidget.core import indicators
+from stockwidget.core.formatters import format_amount, format_volume
+from stockwidget.core.markets import strip_market
+from stockwidget.core.row_format import DisplaySettings, FormattedRow, format_rows
+from stockwidget.data.quotes import Quote
+
+
+def build_items(n: int) -> tuple[list, DisplaySettings]:
+    """n 个代码的 [(代码, 行情), ...] 与显示参数（每 10 个中 1 个集合竞价、1 个指数、2 个基金）。"""
+    items, types, costs = [], {}, {}
+    for i in range(n):
+        code = f"sh{600000 + i}"
+        price = 10 + i % 97 * 0.37
+        prev = price * (1 + (i % 7 - 3) / 100)
+        if i % 10 == 0:
+            bid = ask = price
+            pv, sv = (5000, 300, 0, 0, 0), (4200, 0, 0, 0, 0)
+        else:
+            bid, ask = round(price - 0.01, 2), round(price + 0.01, 2)
+            pv, sv = (100 + i, 200, 300, 400, 500), (300, 200 + i, 100, 0, 50)
+        items.append((code, Quote(f"名称{i}", prev, prev, price, max(price, prev) * 1.01, min(price, prev) * 0.99,
+                                  1234567 + i, 3.5e8 + i, pv, (bid, bid - 0.01, bid - 0.02, bid - 0.03, bid - 0.04),
+                                  sv, (ask, ask + 0.01, ask + 0.02, ask + 0.03, ask + 0.04),
+                                  "2026-10-16", "10:30:00")))
+        types[code] = "指" if i % 10 == 1 else "基" if i % 10 in (2, 3) else "股"
+        if i % 3 == 0:
+            costs[code] = prev * 0.9
+    return items, DisplaySettings(True, True, 4, types, costs)
+
+
+def legacy_format_row(code: str, data, settings: DisplaySettings) -> FormattedRow:
+    """批量计算之前的格式化：每行在 Python 中逐个计算指标。"""
+    type_ = settings.types.get(code)
+    name = f"({type_})" if type_ is not None and settings.type_visible else ""
+    name += f"{strip_market(code)} " if settings.code_visible else ""
+    name += data.name if settings.name_length == -1 else data.name[:settings.name_length]
+    cur = data.current_price
+    prev_close = data.prev_close
+    pur_1 = data.purchaser_price[0]
+    sell_1 = data.seller_price[0]
+    if pur_1 == sell_1 > 0:
+        cur = sell_1
+        paired = int(data.seller_vol[0] / 100)
+        unpaired = int((data.purchaser_vol[1] or (-data.seller_vol[1])) / 100)
+        b1_label, s1_label = f"{paired:d}", f"{unpaired:+d}"
+        b1_color_sign = s1_color_sign = (unpaired > 0) - (unpaired < 0)
+    else:
+        pur_v1 = data.purchaser_vol[0]
+        sell_v1 = data.seller_vol[0]
+        buy_marker = "<" if pur_1 and pur_v1 and cur == pur_1 else " "
+        sell_marker = ">" if sell_1 and sell_v1 and cur == sell_1 else " "
+        b1_label = f"{int(pur_v1 / 100)}{buy_marker}" if (pur_1 and pur_v1) else "-"
+        s1_label = f"{sell_marker}{int(sell_v1 / 100)}" if (sell_1 and sell_v1) else "-"
+        b1_color_sign = 1 if (pur_1 and pur_v1) else 0
+        s1_color_sign = -1 if (sell_1 and sell_v1) else 0
+    if cur == 0:
+        cur = prev_close
+    opening, high, low = data.opening_price, data.high_price, data.low_price
+    if opening == 0:
+        opening = high = low = cur
+    change = cur - prev_close if prev_close else 0.0
+    change_pct = (cur / prev_close - 1) * 100 if prev_close else 0.0
+    avg = (data.deals_amt / data.deals_vol) if data.deals_vol > 0 else prev_close
+    p_sum, s_sum = sum(data.purchaser_vol), sum(data.seller_vol)
+    committee = (100 * (p_sum - s_sum) / (p_sum + s_sum)) if (p_sum + s_sum) > 0 else 0.0
+    arrow = " "
+    if high > low:
+        if cur == high: arrow = "↑"
+        elif cur == low: arrow = "↓"
+    precision = 3 if type_ == "基" else 2
+    cost = settings.costs.get(code)
+    if cost is not None and cost > 0:
+        profit_pct = (cur / cost - 1) * 100
+        profit_label = f"{profit_pct:+.2f}%"
+        profit_sign = (profit_pct > 0) - (profit_pct < 0)
+    else:
+        profit_label, profit_sign = "-", 0
+    is_index = type_ == "指"
+    change_sign = (change > 0) - (change < 0)
+    cells = [
+        name, f"{cur:.{precision}f}{arrow}", f"{change:+.{precision}f}", f"{change_pct:+.2f}%", profit_label,
+        b1_label, s1_label, f"{committee:+.2f}%" if (p_sum + s_sum) > 0 else "-",
+        "-" if is_index and not data.deals_vol else format_volume(data.deals_vol),
+        "-" if is_index and not data.deals_amt else format_amount(data.deals_amt),
+        f"{avg:.{precision}f}",
+        {"k": (opening, cur, high, low, prev_close), "days": code}, {"spark": (code, prev_close)},
+    ]
+    signs = [0, change_sign, change_sign, change_sign, profit_sign, b1_color_sign, s1_color_sign,
+             (committee > 0) - (committee < 0), 0, 0, (avg > prev_close) - (avg < prev_close), 0, 0]
+    if is_index:
+        for i in (4, 5, 6, 7, 10):
+            cells[i], signs[i] = "-", 0
+    return FormattedRow(code, data, settings.row_key(code), tuple(cells), tuple(signs))
+
+
+def measure(fns: list, repeat: int, number: int) -> list[list[float]]:
+    """各函数每轮每次调用的耗时（毫秒）。各轮交替运行所有函数，机器负载的波动对各方影响相同。"""
+    times = [[] for _ in fns]
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            times[i].append(timeit.timeit(fn, number=number) / number * 1000)
+    return times
+
+
+def main(sizes=(100, 1000, 5000), repeat: int = 25):
+    print(f"indicator backend: {indicators.BACKEND}")
+    for n in sizes:
+        items, settings = build_items(n)
+        legacy = [legacy_format_row(code, quote, settings) for code, quote in items]
+        batch = format_rows(items, settings)
+        assert [r.cells for r in legacy] == [r.cells for r in batch]
+        assert [r.signs for r in legacy] == [r.signs for r in batch]
+        number = max(2, 10000 // n)
+        quotes = [quote for _, quote in items]
+        costs = [settings.costs.get(code) for code, _ in items]
+        timings = [
+            ("before (per-row format)", lambda: [legacy_format_row(c, q, settings) for c, q in items]),
+            (f"after  (format_rows, {indicators.BACKEND})", lambda: format_rows(items, settings)),
+            ("  indicators (per quote)", lambda: list(indicators.quote_rows(quotes, costs, np=None))),
+        ]
+        if indicators.numpy is not None:
+            timings.append(("  indicators (numpy)", lambda: list(indicators.quote_rows(quotes, costs, min_rows=0))))
+        print(f"rows: {n}")
+        times = measure([fn for _, fn in timings], repeat, number)
+        for (label, _), ms in zip(timings, times):
+            print(f"  {label}: {min(ms):.3f} ms / tick")
+        ratio = statistics.median(after / before for before, after in zip(times[0], times[1]))
+        print(f"  after / before (median of paired rounds): {ratio:.3f}")
+
+
+if __name__ == "__main__":
+    main()
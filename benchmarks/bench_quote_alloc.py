@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""单次刷新的内存分配基准（tracemalloc）：旧的“14 键 dict + 4 个 list”与 Quote 记录对比。
+
+运行：python -m benchmarks.bench_quote_alloc
+以 500 个代码的自选（A股 / 港股各半）解析一轮，输出解析结果常驻的内存块数与字节数，
+以及解析过程中的峰值内存。
+"""
+
+import tracemalloc
+
+from stockwidget.data import quotes
+from stockwidget.data.quotes import parse_sina
+from benchmarks.bench_sina_parse import build_payload
+
+
+def legacy_new_entry(name, opening, prev_close, current, high, low,
+                     vol, amt, pur_vol, pur_price, sell_vol, sell_price,
+                     date, time) -> dict:
+    """重构前的 _new_entry：每个代码一个 14 键 dict，五档各复制为新 list。"""
+    return {
+        "name": quotes._text(name),
+        "opening_price": float(opening or 0),
+        "prev_close": float(prev_close or 0),
+        "current_price": float(current or 0),
+        "high_price": float(high or 0),
+        "low_price": float(low or 0),
+        "deals_vol": int(vol or 0),
+        "deals_amt": float(amt or 0),
+        "purchaser_vol": list(pur_vol),
+        "purchaser_price": list(pur_price),
+        "seller_vol": list(sell_vol),
+        "seller_price": list(sell_price),
+        "date": quotes._text(date),
+        "time": quotes._text(time),
+    }
+
+
+def measure(raw: bytes) -> tuple[int, int, int]:
+    """解析一轮，返回 (常驻内存块数, 常驻字节数, 峰值字节数)。"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        data = parse_sina(raw, cache=None)
+        peak = tracemalloc.get_traced_memory()[1] - base
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    blocks = sum(d.count_diff for d in diff)
+    size = sum(d.size_diff for d in diff)
+    del data
+    return blocks, size, peak
+
+
+def main(n: int = 500):
+    raw = build_payload(n)
+    parse_sina(raw, cache=None)   # 预热：填充 key 缓存，避免计入首轮的一次性分配
+    original = quotes._new_entry
+    quotes._new_entry = legacy_new_entry
+    try:
+        legacy = measure(raw)
+    finally:
+        quotes._new_entry = original
+    current = measure(raw)
+    print(f"watchlist: {n} codes, payload {len(raw) / 1024:.1f} KiB")
+    for label, (blocks, size, peak) in (("before (dict + lists)", legacy), ("after  (Quote record)", current)):
+        print(f"{label}: {blocks} blocks, {size / 1024:.1f} KiB retained, {peak / 1024:.1f} KiB peak per tick")
+
+
+if __name__ == "__main__":
+    main()
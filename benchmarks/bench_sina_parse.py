@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""新浪行情解析耗时基准：旧的“整段 GBK 解码 + 逐行 split”与 bytes 单遍解析对比，
+以及报文未变时（命中报文缓存）的耗时。
+
+关于“数值字段按需转换”：解析器只转换 schema 用到的字段（涨跌额、结算价等直接丢弃），
+但 schema 内的数值（含五档盘口）仍在解析时转换，没有做成读取时才转换。原因是每轮刷新
+indicators 都会读取每一行的五档（买一 / 卖一价、委比、委差），延迟转换只会把这部分开销
+从后台取数线程挪到 GUI 线程的格式化里，还要给 Quote 增加原始 bytes 字段与属性访问开销。
+“depth left as bytes” 一行给出五档完全不转换时的耗时，即延迟转换所能省下的上限。
+
+运行：python -m benchmarks.bench_sina_parse
+输出每 1000 个代码的解析耗时（毫秒，取多轮最小值）。
+"""
+
+import timeit
+from functools import partial
+from unittest import mock
+
+from stockwidget.data import quotes
+from stockwidget.data.quotes import (
+    PayloadCache,
+    _canonical_from_sina,
+    _is_index_sina,
+    _parse_sina_a,
+    _parse_sina_futures,
+    _parse_sina_global,
+    _parse_sina_hk,
+    _parse_sina_us,
+    parse_sina,
+)
+
+_A_LINE = ('var hq_str_sh{code}="贵州茅台,1500.000,1499.000,1510.500,1520.000,1495.000,1510.400,1510.500,'
+           '2345678,3541234567.000,100,1510.400,200,1510.300,300,1510.200,400,1510.100,500,1510.000,'
+           '100,1510.500,200,1510.600,300,1510.700,400,1510.800,500,1510.900,2026-10-16,15:00:00,00,";')
+_HK_LINE = ('var hq_str_rt_hk{code:05d}="TENCENT,腾讯控股,480.000,478.000,485.000,476.000,483.200,5.200,'
+            '1.088,483.000,483.200,9876543210.000,20456789,0.000,0.000,652.000,310.000,2026/10/16,16:08:00,";')
+
+
+def build_payload(n: int) -> bytes:
+    """构造 n 个代码的新浪响应（A股 / 港股各半），GBK 编码。"""
+    lines = []
+    for i in range(n):
+        if i % 2:
+            lines.append(_HK_LINE.format(code=i))
+        else:
+            lines.append(_A_LINE.format(code=600000 + i))
+    return "\n".join(lines).encode("gbk")
+
+
+def legacy_parse(raw: bytes) -> dict:
+    """重构前 request_sina 的解析流程（整段解码、每行 split 两次、逐行前缀 if 链）。"""
+    data = {}
+    for line in raw.decode("gbk").split("\n"):
+        if not line or '"' not in line:
+            continue
+        key = line.split('="')[0]
+        body = line.split('="')[1]
+        if '"' not in body:
+            continue
+        parts = body.split(",")
+        if len(parts) < 3 or "hq_str_" not in key:
+            continue
+        sname = key.split("hq_str_", 1)[1].strip()
+        if sname.startswith("rt_"):
+            entry = _parse_sina_hk(parts, is_index=_is_index_sina(sname))
+        elif sname.startswith("gb_"):
+            entry = _parse_sina_us(parts, is_index=_is_index_sina(sname))
+        elif sname.startswith("nf_"):
+            entry = _parse_sina_futures(parts)
+        elif sname.startswith("b_"):
+            entry = _parse_sina_global(parts)
+        elif sname.startswith(("sh", "sz", "bj")):
+            entry = _parse_sina_a(parts, is_index=_is_index_sina(sname))
+        else:
+            continue
+        data[_canonical_from_sina(sname)] = entry
+    return data
+
+
+def _a_depth_as_bytes(parts: list, is_index: bool = False):
+    """A股解析，但五档字段保留原始 bytes、不做 int()/float()（延迟转换的收益上限）。"""
+    if is_index:
+        return _parse_sina_a(parts, is_index)
+    return quotes._new_entry(
+        name=parts[0], opening=parts[1], prev_close=parts[2], current=parts[3],
+        high=parts[4], low=parts[5], vol=parts[8], amt=parts[9],
+        pur_vol=parts[10:20:2], pur_price=parts[11:20:2],
+        sell_vol=parts[20:30:2], sell_price=parts[21:30:2],
+        date=parts[30] if len(parts) > 30 else "", time=parts[31] if len(parts) > 31 else "")
+
+
+def main(n: int = 1000, repeat: int = 7, number: int = 20):
+    raw = build_payload(n)
+    assert legacy_parse(raw) == parse_sina(raw, cache=None)
+    cache = PayloadCache()
+    parse_sina(raw, cache)   # 预热：之后每轮报文都与上次相同
+    print(f"payload: {n} codes, {len(raw) / 1024:.1f} KiB")
+
+    def report(label, fn):
+        best = min(timeit.repeat(lambda: fn(raw), repeat=repeat, number=number)) / number
+        print(f"{label}: {best * 1000 * 1000 / n:.2f} ms / 1000 codes")
+
+    for label, fn in (("before (text split)", legacy_parse),
+                      ("after  (bytes single-pass)", partial(parse_sina, cache=None)),
+                      ("unchanged payload (cached)", partial(parse_sina, cache=cache))):
+        report(label, fn)
+    spec = (_a_depth_as_bytes, 0, True)
+    with mock.patch.dict(quotes._SINA_DISPATCH, {b"sh": spec, b"sz": spec, b"bj": spec}), \
+            mock.patch.dict(quotes._sina_key_cache, clear=True):
+        report("after, depth left as bytes", partial(parse_sina, cache=None))
+
+
+if __name__ == "__main__":
+    main()
@@ -190,6 +190,7 @@ class App(QApplication):
     def quit_app(self):
         self.tray.hide()
         self.save_now()
+        self.win.shutdown()
         sys.exit(0)
 
     def save_now(self):
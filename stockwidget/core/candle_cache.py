@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""当日K线单元格的绘制缓存（纯逻辑，无 Qt 依赖，可单元测试）。
+
+- candle_offsets：把 (今开, 现价, 最高, 最低, 昨收) 换算成相对K线区域顶部的整数像素纵坐标；
+  价格的细微跳动多半落在同一像素上，量化后的坐标即可作为缓存键；
+- LruCache：按最近使用淘汰的有界缓存，记录命中 / 未命中 / 淘汰次数。
+"""
+
+from collections import OrderedDict
+
+
+def candle_offsets(o: float, c: float, h: float, l: float, p: float, height: int) -> tuple[int, int, int, int, int]:
+    """价格 -> (y_今开, y_现价, y_最高, y_最低, y_昨收)，以像素计、向下为正；
+    刻度取 [min(最低, 昨收), max(最高, 昨收)]，全部相等时画在中线。"""
+    if h < l:
+        h, l = l, h
+    lo, hi = min(l, p), max(h, p)
+    span = hi - lo
+    if span <= 0:
+        mid = round(height / 2)
+        return mid, mid, mid, mid, mid
+    return tuple(round((hi - v) / span * height) for v in (o, c, h, l, p))
+
+
+class LruCache:
+    """最多保留 maxsize 项的 LRU 缓存；get 未命中返回 None。"""
+
+    MAXSIZE = 512
+
+    def __init__(self, maxsize: int = MAXSIZE):
+        self.maxsize = max(1, int(maxsize))
+        self._items: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key):
+        value = self._items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        items = self._items
+        items[key] = value
+        items.move_to_end(key)
+        while len(items) > self.maxsize:
+            items.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """丢弃全部缓存项（计数保留）。"""
+        self._items.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"size": len(self._items), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hits / total if total else None}
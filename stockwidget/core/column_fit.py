@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""表格列宽的稳定化（纯逻辑，无 Qt 依赖，可单元测试）。
+
+每轮刷新按字体度量测出各列所需宽度后交给 ColumnFit：
+- 变宽立即生效（内容不能被截断）；
+- 变窄要持续 SHRINK_AFTER 秒才生效，收缩到这段时间内测得的最大宽度，
+  避免价格位数来回跳动时窗口反复伸缩；
+只有采用的宽度真正变化时才需要重新布局，RateCounter 统计最近一分钟的重新布局次数。
+"""
+
+import time
+from collections import deque
+
+
+class ColumnFit:
+    """各列采用宽度的滞回跟踪。"""
+
+    SHRINK_AFTER = 30.0   # 列宽持续偏大多少秒后才收缩
+
+    def __init__(self, shrink_after: float = SHRINK_AFTER, clock=time.monotonic):
+        self.shrink_after = float(shrink_after)
+        self._clock = clock
+        self.widths: list[int] = []
+        self._since: list = []      # 各列开始偏窄的时刻（None 为未偏窄）
+        self._pending: list = []    # 偏窄期间测得的最大宽度
+
+    def reset(self):
+        self.widths, self._since, self._pending = [], [], []
+
+    def update(self, measured: list[int], now: float | None = None) -> list[int]:
+        """喂入本轮测得的列宽，返回应采用的列宽（列数变化时直接采用测量值）。"""
+        now = self._clock() if now is None else now
+        if len(measured) != len(self.widths):
+            self.widths = list(measured)
+            self._since = [None] * len(measured)
+            self._pending = [0] * len(measured)
+            return list(self.widths)
+        for c, m in enumerate(measured):
+            w = self.widths[c]
+            if m >= w:
+                self.widths[c] = m
+                self._since[c] = None
+                continue
+            if self._since[c] is None:
+                self._since[c], self._pending[c] = now, m
+                continue
+            self._pending[c] = max(self._pending[c], m)
+            if now - self._since[c] >= self.shrink_after:
+                self.widths[c] = self._pending[c]
+                self._since[c] = None
+        return list(self.widths)
+
+
+class RateCounter:
+    """最近 window 秒内的事件次数（如每分钟重新布局次数）。"""
+
+    def __init__(self, window: float = 60.0, clock=time.monotonic):
+        self.window = float(window)
+        self._clock = clock
+        self._events: deque = deque()
+        self.total = 0
+
+    def tick(self, now: float | None = None):
+        now = self._clock() if now is None else now
+        self._events.append(now)
+        self.total += 1
+        self._trim(now)
+
+    def rate(self, now: float | None = None) -> int:
+        self._trim(self._clock() if now is None else now)
+        return len(self._events)
+
+    def _trim(self, now: float):
+        while self._events and now - self._events[0] > self.window:
+            self._events.popleft()
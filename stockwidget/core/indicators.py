@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""一轮行情的派生指标计算（纯逻辑，无 Qt 依赖）。
+
+quote_rows() 逐行产出现价 / 涨跌 / 涨幅 / 均价 / 委比 / 浮盈 / 高低箭头 / 盘口标记及各自的颜色符号
+（OUTPUTS 顺序的元组），供格式化逐行取用。标准实现是逐个行情直接计算的 _iter_quotes；
+安装了 NumPy 且行数较多时改为装列后向量计算（NumPy 为可选依赖，不随程序打包），运算顺序相同，
+结果逐位一致（见 tests/test_row_format.py）。
+"""
+
+try:
+    import numpy
+except ImportError:  # 可选依赖
+    numpy = None
+
+BACKEND = "numpy" if numpy is not None else "python"
+NUMPY_MIN_ROWS = 200      # quote_rows 改用 NumPy 按列计算的最少行数
+
+# NumPy 装列时的字段：今开, 昨收, 现价, 最高, 最低, 成交量, 成交额, 买1价, 卖1价, 买1量, 卖1量, 买2量, 卖2量,
+# 买盘总量, 卖盘总量, 成本价（无成本为 0）
+FIELDS = ("open", "prev", "cur", "high", "low", "vol", "amt", "pp1", "sp1", "pv1", "sv1", "pv2", "sv2",
+          "psum", "ssum", "cost")
+
+# quote_rows() 逐行产出的字段（按此顺序）
+OUTPUTS = ("auction", "cur", "open", "high", "low", "change", "change_pct", "avg", "committee", "has_book",
+           "profit", "has_cost", "arrow", "paired", "unpaired", "show_b1", "show_s1", "b1_mark", "s1_mark",
+           "b1_vol", "s1_vol", "change_sign", "profit_sign", "committee_sign", "avg_sign", "b1_sign", "s1_sign")
+
+
+def quote_rows(quotes, costs, np=numpy, min_rows: int = NUMPY_MIN_ROWS):
+    """行情序列与对应的成本价序列（None 为无成本）-> 逐行 OUTPUTS 顺序的元组。
+    行数少于 min_rows 或未安装 NumPy 时逐个计算（装列与数组创建的固定开销不划算）。"""
+    if np is not None and len(quotes) >= min_rows:
+        return _numpy_rows(quotes, costs, np)
+    return _iter_quotes(quotes, costs)
+
+
+def _numpy_rows(quotes, costs, np):
+    rows = [(q.opening_price, q.prev_close, q.current_price, q.high_price, q.low_price,
+             q.deals_vol, q.deals_amt, q.purchaser_price[0], q.seller_price[0],
+             q.purchaser_vol[0], q.seller_vol[0], q.purchaser_vol[1], q.seller_vol[1],
+             sum(q.purchaser_vol), sum(q.seller_vol), cost or 0)
+            for q, cost in zip(quotes, costs)]
+    c = dict(zip(FIELDS, np.array(rows, dtype=np.float64).reshape(-1, len(FIELDS)).T))
+    pp1, sp1, pv1, sv1 = c["pp1"], c["sp1"], c["pv1"], c["sv1"]
+    raw, prev = c["cur"], c["prev"]
+    one = np.ones_like(prev)
+
+    auction = (pp1 == sp1) & (sp1 > 0)                        # 集合竞价：买一价 = 卖一价
+    cur = np.where(auction, sp1, raw)
+    cur = np.where(cur == 0, prev, cur)                       # 盘前：以昨收填充
+    no_open = c["open"] == 0
+    opening = np.where(no_open, cur, c["open"])
+    high = np.where(no_open, cur, c["high"])
+    low = np.where(no_open, cur, c["low"])
+
+    has_prev = prev != 0
+    change = np.where(has_prev, cur - prev, 0.0)
+    change_pct = np.where(has_prev, (cur / np.where(has_prev, prev, one) - 1) * 100, 0.0)
+    traded = c["vol"] > 0
+    avg = np.where(traded, c["amt"] / np.where(traded, c["vol"], one), prev)
+    book = c["psum"] + c["ssum"]
+    has_book = book > 0
+    committee = np.where(has_book, 100 * (c["psum"] - c["ssum"]) / np.where(has_book, book, one), 0.0)
+    has_cost = c["cost"] > 0
+    profit = np.where(has_cost, (cur / np.where(has_cost, c["cost"], one) - 1) * 100, 0.0)
+    arrow = np.where(high > low, np.where(cur == high, 1, np.where(cur == low, -1, 0)), 0)
+
+    paired = np.trunc(sv1 / 100)
+    unpaired = np.trunc(np.where(c["pv2"] != 0, c["pv2"], -c["sv2"]) / 100)
+    show_b1 = (pp1 != 0) & (pv1 != 0)
+    show_s1 = (sp1 != 0) & (sv1 != 0)
+    unpaired_sign = np.sign(unpaired).astype(np.int64)
+    out = {
+        "auction": auction, "cur": cur, "open": opening, "high": high, "low": low,
+        "change": change, "change_pct": change_pct, "avg": avg, "committee": committee, "has_book": has_book,
+        "profit": profit, "has_cost": has_cost, "arrow": arrow,
+        "paired": paired.astype(np.int64), "unpaired": unpaired.astype(np.int64),
+        "show_b1": show_b1, "show_s1": show_s1,
+        "b1_mark": show_b1 & (raw == pp1), "s1_mark": show_s1 & (raw == sp1),
+        "b1_vol": np.trunc(pv1 / 100).astype(np.int64), "s1_vol": np.trunc(sv1 / 100).astype(np.int64),
+        "change_sign": np.sign(change).astype(np.int64),
+        "profit_sign": np.sign(profit).astype(np.int64),
+        "committee_sign": np.sign(committee).astype(np.int64),
+        "avg_sign": np.sign(avg - prev).astype(np.int64),
+        "b1_sign": np.where(auction, unpaired_sign, show_b1.astype(np.int64)),
+        "s1_sign": np.where(auction, unpaired_sign, -show_s1.astype(np.int64)),
+    }
+    return zip(*(out[name].tolist() for name in OUTPUTS))
+
+
+def _iter_quotes(quotes, costs):
+    # 行情中的整数（成交量 / 挂单量）与 float 混合运算时 Python 先精确换算再运算，
+    # 结果与 _numpy_rows 装入 float64 后的计算逐位一致
+    for q, cost in zip(quotes, costs):
+        prev, raw = q.prev_close, q.current_price
+        pp, sp, pv, sv = q.purchaser_price, q.seller_price, q.purchaser_vol, q.seller_vol
+        pp1, sp1, pv1, sv1 = pp[0], sp[0], pv[0], sv[0]
+        auction = pp1 == sp1 and sp1 > 0
+        cur = sp1 if auction else raw
+        if cur == 0:
+            cur = prev
+        opening = q.opening_price
+        if opening == 0:
+            opening = high = low = cur
+        else:
+            high, low = q.high_price, q.low_price
+        cost = cost or 0
+        vol = q.deals_vol
+        psum, ssum = sum(pv), sum(sv)
+        change = cur - prev if prev != 0 else 0.0
+        profit = (cur / cost - 1) * 100 if cost > 0 else 0.0
+        avg = q.deals_amt / vol if vol > 0 else prev
+        book = psum + ssum
+        committee = 100 * (psum - ssum) / book if book > 0 else 0.0
+        unpaired = int((pv[1] or -sv[1]) / 100)
+        show_b1 = pp1 != 0 and pv1 != 0
+        show_s1 = sp1 != 0 and sv1 != 0
+        yield (
+            auction, cur, opening, high, low, change, (cur / prev - 1) * 100 if prev != 0 else 0.0,
+            avg, committee, book > 0, profit, cost > 0,
+            (1 if cur == high else -1 if cur == low else 0) if high > low else 0,
+            int(sv1 / 100), unpaired, show_b1, show_s1, show_b1 and raw == pp1, show_s1 and raw == sp1,
+            int(pv1 / 100), int(sv1 / 100),
+            (change > 0) - (change < 0), (profit > 0) - (profit < 0), (committee > 0) - (committee < 0),
+            (avg > prev) - (avg < prev),
+            (unpaired > 0) - (unpaired < 0) if auction else int(show_b1),
+            (unpaired > 0) - (unpaired < 0) if auction else -int(show_s1),
+        )
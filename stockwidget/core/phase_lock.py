@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""按上游发布节奏对齐轮询时刻（纯 Python，无 Qt 依赖）。
+
+新浪 A股快照大约每 3 秒发布一次：按固定 1 秒轮询，三次请求里有两次拿到的是同一份快照，
+且新快照发布后平均还要等半秒以上才被取到。PhaseLock 从行情的 ``time`` 字段（北京时间）
+估计发布周期与相位，把下一次请求安排在预计发布之后：
+
+- 周期：相邻两次观察到的新发布时刻之差的众数（秒，时间字段精度为 1 秒）；
+- 相位：各发布时刻对周期取模的众数；
+- 延迟：每个新发布时刻首次被看到时的“本地接收时间 - 发布时间”的最小值，
+  包含网络延迟与本机时钟偏差，请求安排在 发布时刻 + 延迟 + MARGIN。
+
+请求频率不超过配置的刷新间隔（间隔短于发布周期时每个周期只请求一次）。
+同时记录每次收到结果时最新快照的陈旧度（接收时间 - 发布时间），供调试查看。
+"""
+
+import math
+from collections import Counter, deque
+
+from stockwidget.core.stats import percentile
+
+_CN_OFFSET = 8 * 3600   # 北京时间相对 UTC 的秒数
+_DAY = 86400
+
+
+def seconds_of_day(text: str) -> int | None:
+    """"HH:MM:SS" -> 当天秒数；格式不符返回 None。"""
+    try:
+        h, m, s = str(text).split(":")
+        return int(h) * 3600 + int(m) * 60 + int(s)
+    except (TypeError, ValueError):
+        return None
+
+
+class PhaseLock:
+    """上游发布周期 / 相位估计器。observe() 喂入最新发布时刻，next_delay() 给出下一次请求的等待时长。"""
+
+    MIN_SAMPLES = 8        # 周期样本数不足时不锁相
+    WINDOW = 40            # 保留最近多少个发布时刻
+    MAX_PERIOD = 10        # 超过此间隔（秒）的相邻发布不计入周期（多半是漏看了几次）
+    MIN_SHARE = 0.5        # 相位众数占比不足时认为发布时刻不规律，不锁相
+    MARGIN = 0.15          # 预计可取到新快照之后再等的余量（秒）
+    MIN_GAP = 0.2          # 两次请求的最小间隔（秒）
+    STALE_AFTER = 30.0     # 超过此时长没有新发布（如收盘）即解除锁相
+
+    def __init__(self):
+        self._publishes = deque(maxlen=self.WINDOW)   # 发布时刻（北京时间当天秒数）
+        self._diffs = deque(maxlen=self.WINDOW)
+        self._ages = deque(maxlen=self.WINDOW)        # 各发布时刻首次被看到时的延迟
+        self._staleness = deque(maxlen=200)           # 每次收到结果时最新快照的陈旧度
+        self._last_publish = None
+        self._last_new_wall = None
+
+    def observe(self, publish_sod: int, recv_wall: float):
+        """收到一轮结果：publish_sod 为其中最新的发布时刻，recv_wall 为本地接收时间（time.time()）。"""
+        age = ((recv_wall + _CN_OFFSET) % _DAY) - publish_sod
+        if age > _DAY / 2:
+            age -= _DAY
+        elif age < -_DAY / 2:
+            age += _DAY
+        self._staleness.append(age)
+        if self._last_publish is not None and publish_sod <= self._last_publish \
+                and self._last_publish - publish_sod < _DAY / 2:
+            return
+        if self._last_publish is not None:
+            diff = (publish_sod - self._last_publish) % _DAY
+            if 0 < diff <= self.MAX_PERIOD:
+                self._diffs.append(diff)
+        self._last_publish = publish_sod
+        self._last_new_wall = recv_wall
+        self._publishes.append(publish_sod)
+        self._ages.append(age)
+
+    def estimate(self, now_wall: float) -> tuple | None:
+        """(周期, 相位, 延迟)；样本不足、发布不规律或已停止发布时返回 None。"""
+        if len(self._diffs) < self.MIN_SAMPLES or self._last_new_wall is None:
+            return None
+        if now_wall - self._last_new_wall > self.STALE_AFTER:
+            return None
+        period = Counter(self._diffs).most_common(1)[0][0]
+        phase, hits = Counter(p % period for p in self._publishes).most_common(1)[0]
+        if hits < self.MIN_SHARE * len(self._publishes):
+            return None
+        return period, phase, min(self._ages)
+
+    def next_delay(self, now_wall: float, interval: float) -> float | None:
+        """距下一次请求的秒数（预计新快照可取到之后，且不短于配置间隔 interval）；未锁相返回 None。"""
+        est = self.estimate(now_wall)
+        if est is None:
+            return None
+        period, phase, lag = est
+        now_sod = (now_wall + _CN_OFFSET) % _DAY
+        earliest = now_sod + max(self.MIN_GAP, interval)
+        offset = phase + lag + self.MARGIN
+        k = math.ceil((earliest - offset) / period)
+        return k * period + offset - now_sod
+
+    def stats(self, now_wall: float) -> dict:
+        est = self.estimate(now_wall)
+        return {
+            "locked": est is not None,
+            "period": est[0] if est else None,
+            "phase": est[1] if est else None,
+            "lag": est[2] if est else None,
+            "staleness_p50": percentile(self._staleness, 50),
+            "staleness_p95": percentile(self._staleness, 95),
+            "samples": len(self._staleness),
+        }
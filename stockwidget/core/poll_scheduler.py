@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""按交易时段决定每次定时刷新实际请求哪些代码（纯 Python，无 Qt 依赖）。
+
+- 只请求所属市场正在交易的代码；休市市场的行保持上一次的行情不动。
+- 所有自选市场都休市时不再每秒请求，仅按 heartbeat 间隔整表刷新一次（心跳）。
+  心跳同样会刷新“部分休市”时被略过的代码，用于兜住日历未覆盖的临时休市 / 开市。
+- 首次出现的代码（新加入自选、刚启动）无论是否休市都请求一次，保证表格有数据。
+- 按代码自适应刷新频率：行情时间字段（无时间字段时用价格 + 成交量）连续多次未变的代码
+  （收盘后的指数、停牌股等）按 interval × 2^n 指数退避（不超过 heartbeat），一旦有变化立即恢复原频率。
+  退避与交易时段开关（enabled）无关：关闭后只是不再按休市略过代码、不再锁相。
+- 锁相轮询：A股交易时段内由 PhaseLock 估计上游发布周期 / 相位，A股代码的下一次请求安排在
+  预计发布之后（未锁相时按配置间隔）；自选中还有其他正在交易的市场（港股 / 期货等）时，
+  定时器仍按配置间隔触发，只是 A股代码在锁相时刻之前的轮次中略过。任何代码都不会以短于
+  配置间隔的间隔被请求。
+"""
+
+import time
+
+from stockwidget.core.markets import market_of
+from stockwidget.core.phase_lock import PhaseLock, seconds_of_day
+from stockwidget.core.trading_calendar import TradingCalendar
+
+
+# 参与锁相的市场（新浪 A股快照按固定周期发布）
+_PHASE_MARKETS = ("sh", "sz", "bj")
+
+
+class CodeCadence:
+    """单个代码的刷新节奏统计。"""
+
+    __slots__ = ("signature", "price", "streak", "level", "changes", "observations",
+                 "volatility", "last_polled")
+
+    def __init__(self):
+        self.signature = None     # 上次行情的时间字段（或价格 + 成交量）
+        self.price = None
+        self.streak = 0           # 连续未变化次数
+        self.level = 0            # 退避级别：刷新间隔 = interval × 2^level
+        self.changes = 0          # 累计变化次数
+        self.observations = 0     # 累计观测次数
+        self.volatility = 0.0     # 相邻两次观测价格变动幅度（%）的指数平均
+        self.last_polled = None
+
+
+class PollScheduler:
+    """定时刷新的代码筛选器。plan(codes) 返回本轮要请求的代码（可能为空列表），
+    observe(data, requested) 以某一轮的刷新结果更新该轮实际请求过的代码的刷新节奏。"""
+
+    HEARTBEAT = 60.0   # 休市代码的刷新间隔，也是单个代码退避的上限（秒）
+    BACKOFF_AFTER = 3  # 连续多少次未变化后开始退避
+    VOL_ALPHA = 0.2    # 波动率指数平均的权重
+
+    def __init__(self, calendar: TradingCalendar | None = None, heartbeat: float = HEARTBEAT,
+                 enabled: bool = True, interval: float = 1.0, clock=time.monotonic, now=None,
+                 wall=time.time):
+        self.calendar = calendar or TradingCalendar()
+        self.heartbeat = float(heartbeat)
+        self.enabled = bool(enabled)
+        self.interval = float(interval)  # 配置的刷新间隔（秒），活跃代码按此频率刷新
+        self._clock = clock
+        self._now = now                 # 测试注入：返回带时区的当前时间
+        self._wall = wall
+        self.phase = PhaseLock()
+        self._last_full = None
+        self._seen: set[str] = set()
+        self._cadence: dict[str, CodeCadence] = {}
+        self._phase_due = None          # 锁相时 A股代码下一次请求的时刻（time.time()；None 为待计算 / 未锁相）
+        self.ticks = 0
+        self.idle_ticks = 0             # 全部休市且心跳未到、未发请求的次数
+        self.polled = 0                 # 累计请求的代码数
+        self.skipped = 0                # 累计因休市 / 退避略过的代码数
+
+    def is_open(self, code: str) -> bool:
+        now = self._now() if self._now else None
+        return self.calendar.is_open(market_of(code), code, now)
+
+    def cadence(self, code: str) -> float:
+        """该代码当前的有效刷新间隔（秒）。"""
+        st = self._cadence.get(code)
+        if st is None or not st.level:
+            return self.interval
+        return min(self.heartbeat, self.interval * (2 ** st.level))
+
+    def _due(self, code: str, t: float) -> bool:
+        st = self._cadence.get(code)
+        if st is None or st.last_polled is None or not st.level:
+            return True
+        # 留半个刷新间隔的余量，避免定时器抖动导致多等一轮
+        return t - st.last_polled >= self.cadence(code) - self.interval / 2
+
+    def plan(self, codes: list[str]) -> list[str]:
+        """本轮要请求的代码（保持原顺序）。"""
+        self.ticks += 1
+        t = self._clock()
+        if self._last_full is None or t - self._last_full >= self.heartbeat:
+            self._last_full = t
+            active = list(codes)
+        else:
+            # 关闭“按交易时段”时不看休市 / 锁相，但按代码退避照常生效
+            held = self._phase_held()
+            active = [c for c in codes
+                      if c not in self._seen
+                      or (self._due(c, t) and (not self.enabled or self.is_open(c))
+                          and not (held and market_of(c) in _PHASE_MARKETS))]
+        if any(market_of(c) in _PHASE_MARKETS for c in active):
+            self._phase_due = None      # 已请求 A股：下一个锁相时刻由 next_delay 重新计算
+        self._seen.update(active)
+        for c in active:
+            self._cadence.setdefault(c, CodeCadence()).last_polled = t
+        if not active:
+            self.idle_ticks += 1
+        self.polled += len(active)
+        self.skipped += len(codes) - len(active)
+        return active
+
+    def observe(self, data: dict, requested):
+        """以一轮完整刷新结果 {代码: 行情} 更新节奏：只统计 requested（该轮任务实际请求的代码）。
+        多个任务同时在途时各自的结果只更新各自请求的代码，沿用上一轮行情的代码不计为“未变化”。"""
+        newest, newest_code = None, None  # 本轮 A股行情中最新的发布时刻（供锁相）
+        for code in requested:
+            quote = data.get(code)
+            if quote is None:
+                continue
+            if market_of(code) in _PHASE_MARKETS:
+                sod = seconds_of_day(quote.get("time"))
+                if sod is not None and (newest is None or sod > newest):
+                    newest, newest_code = sod, code
+            st = self._cadence.setdefault(code, CodeCadence())
+            signature = quote.get("time") or (quote.get("current_price"), quote.get("deals_vol"))
+            price = quote.get("current_price") or 0.0
+            st.observations += 1
+            if st.price:
+                move = abs(price / st.price - 1) * 100
+                st.volatility += self.VOL_ALPHA * (move - st.volatility)
+            if st.signature is None or signature != st.signature:
+                if st.signature is not None:
+                    st.changes += 1
+                st.streak = 0
+                st.level = 0              # 有变化：立即恢复配置的刷新频率
+            else:
+                st.streak += 1
+                if st.streak >= self.BACKOFF_AFTER and self.cadence(code) < self.heartbeat:
+                    st.level += 1
+            st.signature, st.price = signature, price
+        # 只在交易时段内锁相 / 统计陈旧度（收盘后快照不再更新，陈旧度没有意义）
+        if newest is not None and self.is_open(newest_code):
+            self.phase.observe(newest, self._wall())
+
+    PHASE_SLACK = 0.05   # 定时器提前触发的容差（秒）：距锁相时刻不足此值时视为已到
+
+    def _phase_held(self) -> bool:
+        """A股代码是否仍在等待锁相时刻（本轮略过）。"""
+        return (self.enabled and self._phase_due is not None
+                and self._wall() < self._phase_due - self.PHASE_SLACK)
+
+    def next_delay(self, codes: list[str]) -> float:
+        """距下一次定时刷新的秒数：自选中正在交易的只有 A股且已锁相时对齐上游发布时刻；
+        还有其他正在交易的市场时按配置间隔（A股代码由 plan 留到锁相时刻再请求）；否则为配置间隔。"""
+        a_open = other_open = False
+        for c in codes:
+            if self.is_open(c):
+                if market_of(c) in _PHASE_MARKETS:
+                    a_open = True
+                else:
+                    other_open = True
+        if not (self.enabled and a_open):
+            self._phase_due = None
+            return self.interval
+        wall = self._wall()
+        if self._phase_due is None:
+            delay = self.phase.next_delay(wall, self.interval)
+            if delay is None:
+                return self.interval
+            self._phase_due = wall + delay
+        delay = max(0.0, self._phase_due - wall)
+        return min(delay, self.interval) if other_open else delay
+
+    def cadence_table(self, codes: list[str]) -> list[dict]:
+        """调试用：各代码的有效刷新间隔与统计。"""
+        rows = []
+        for c in codes:
+            st = self._cadence.get(c) or CodeCadence()
+            rows.append({
+                "code": c,
+                "open": self.is_open(c),
+                "cadence": self.cadence(c),
+                "streak": st.streak,
+                "changes": st.changes,
+                "observations": st.observations,
+                "volatility": st.volatility,
+            })
+        return rows
+
+    def reset(self):
+        """下一轮强制整表刷新（如切换数据源后）。"""
+        self._last_full = None
+        self._phase_due = None
+
+    def stats(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "idle_ticks": self.idle_ticks,
+            "polled": self.polled,
+            "skipped": self.skipped,
+            "phase": self.phase.stats(self._wall()),
+        }
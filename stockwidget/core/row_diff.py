@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""表格增量更新的差分计算（纯函数，无 Qt 依赖，可单元测试）。
+
+- plan_row_ops：按行键（代码）把旧行序变换为新行序的删除 / 移动 / 插入步骤，
+  依次执行即可（每一步的行号都基于上一步执行后的行序），对应 Qt 的 remove / move / insert 信号；
+- changed_spans：同一行新旧单元格逐列比较，返回连续变化的列区间。
+"""
+
+
+def plan_row_ops(old_keys, new_keys) -> list[tuple]:
+    """旧行序 -> 新行序的操作序列：("remove", 起始行, 行数) / ("move", 原行, 目标行) / ("insert", 起始行, 行数)。
+    顺序为先删除（从下往上）、再移动、最后插入；行键须互不重复。"""
+    new_set = set(new_keys)
+    ops = []
+    current = list(old_keys)
+
+    # 删除：从下往上，连续的合并为一步，前面的行号不受影响
+    r = len(current) - 1
+    while r >= 0:
+        if current[r] in new_set:
+            r -= 1
+            continue
+        end = r
+        while r >= 0 and current[r] not in new_set:
+            r -= 1
+        ops.append(("remove", r + 1, end - r))
+        del current[r + 1:end + 1]
+
+    # 移动：目标顺序为新行序中保留下来的行
+    kept = set(current)
+    target = [k for k in new_keys if k in kept]
+    for i, key in enumerate(target):
+        if current[i] != key:
+            j = current.index(key, i + 1)
+            ops.append(("move", j, i))
+            current.insert(i, current.pop(j))
+
+    # 插入：按新行序从上往下，连续的合并为一步
+    i, n = 0, len(new_keys)
+    while i < n:
+        if i < len(current) and current[i] == new_keys[i]:
+            i += 1
+            continue
+        start = i
+        while i < n and new_keys[i] not in kept:
+            i += 1
+        ops.append(("insert", start, i - start))
+        current[start:start] = new_keys[start:i]
+    return ops
+
+
+def changed_spans(old, new) -> list[tuple[int, int]]:
+    """逐列比较等长的 old / new，返回变化的连续列区间 [(首列, 末列), ...]（含两端）。"""
+    spans, start = [], None
+    for c, (a, b) in enumerate(zip(old, new)):
+        if a != b:
+            if start is None:
+                start = c
+        elif start is not None:
+            spans.append((start, c - 1))
+            start = None
+    if start is not None:
+        spans.append((start, len(new) - 1))
+    return spans
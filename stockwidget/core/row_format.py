@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""行情行的显示格式化（纯逻辑，无 Qt 依赖，可在抓取线程中运行）。
+
+- DisplaySettings：格式化所需显示参数的不可变快照（在主线程随刷新任务一起生成），
+  格式化途中修改设置不会影响本轮结果；
+- FormattedRow：一行的格式化结果（各列文本 / 自绘数据与颜色符号，均为元组，按 HEADERS 顺序）；
+- RowFormatter：按代码缓存上次结果，行情对象与显示参数均未变的行直接复用，
+  其余的行一起交给 format_rows 批量计算指标后再逐行格式化字符串。
+"""
+
+from functools import lru_cache
+from typing import NamedTuple
+
+from stockwidget.core.formatters import format_amount, format_volume
+from stockwidget.core.indicators import quote_rows
+from stockwidget.core.markets import strip_market
+
+HEADERS = ("名称", "现价", "涨跌", "涨幅", "浮盈", "买一", "卖一", "委比", "成交量", "成交额", "均价", "K线", "分时")
+COLUMN = {h: i for i, h in enumerate(HEADERS)}
+_ARROWS = {1: "↑", -1: "↓", 0: " "}     # 现价创当日新高 / 新低
+_SPECS = {False: (".2f", "+.2f"), True: (".3f", "+.3f")}   # 是否基金 -> (价格, 涨跌) 的格式
+_new_row = tuple.__new__                                   # 逐行构造 FormattedRow，绕过 NamedTuple 的参数解析
+_short_code = lru_cache(maxsize=1 << 14)(strip_market)     # 自选代码有限，每轮逐行去前缀的开销可省
+
+
+class DisplaySettings(NamedTuple):
+    """格式化用的显示参数快照；types / costs 为 {代码: 类型} / {代码: 成本价}，生成后不再修改。"""
+    type_visible: bool
+    code_visible: bool
+    name_length: int
+    types: dict
+    costs: dict
+
+    def row_key(self, code: str) -> tuple:
+        """影响 code 这一行格式化结果的参数。"""
+        return self.types.get(code), self.costs.get(code), self.type_visible, self.code_visible, self.name_length
+
+
+class FormattedRow(NamedTuple):
+    code: str
+    quote: object       # 格式化所用的行情对象（同一对象即报文未变）
+    key: tuple          # 格式化所用的显示参数（DisplaySettings.row_key）
+    cells: tuple        # 按 HEADERS 顺序的显示文本；K线 / 分时为自绘数据
+    signs: tuple        # 按 HEADERS 顺序的颜色符号：1 涨 / -1 跌 / 0 平
+
+
+def format_row(code: str, data, settings: DisplaySettings) -> FormattedRow:
+    """一个代码的行情 -> FormattedRow（见 format_rows）。"""
+    return format_rows([(code, data)], settings)[0]
+
+
+def format_rows(items: list, settings: DisplaySettings) -> list[FormattedRow]:
+    """[(代码, 行情), ...] -> [FormattedRow, ...]。派生指标与颜色符号由 core.indicators.quote_rows 算出
+    （有 NumPy 时按列一次算出），这里逐行只做字符串格式化。行情对象可能被下一轮复用（报文未变），此处只读不改。"""
+    if not items:
+        return []
+    costs = [settings.costs.get(code) for code, _ in items]
+    values = quote_rows([quote for _, quote in items], costs)
+    types = settings.types
+    type_visible, code_visible, name_length = settings.type_visible, settings.code_visible, settings.name_length
+    rows = []
+    for (code, data), cost, (auction, cur, opening, high, low, change, change_pct, avg, committee, has_book,
+                       profit, has_cost, arrow, paired, unpaired, show_b1, show_s1, b1_mark, s1_mark,
+                       b1_vol, s1_vol, change_sign, profit_sign, committee_sign, avg_sign,
+                       b1_sign, s1_sign) in zip(items, costs, values):
+        type_ = types.get(code)
+
+        # 名称显示
+        name = f"({type_})" if type_ is not None and type_visible else ""
+        name += f"{_short_code(code)} " if code_visible else ""
+        name += data.name if name_length == -1 else data.name[:name_length]
+
+        # 一档盘口：集合竞价时为 匹配量 / 未匹配量，否则为买一 / 卖一量（有量时才显示，否则"-"）
+        if auction:
+            b1_label = f"{paired:d}"
+            s1_label = f"{unpaired:+d}"
+        else:
+            b1_label = f"{b1_vol}{'<' if b1_mark else ' '}" if show_b1 else "-"
+            s1_label = f"{'>' if s1_mark else ' '}{s1_vol}" if show_s1 else "-"
+
+        spec, signed = _SPECS[type_ == "基"]     # 基金价格 3 位小数，其余 2 位
+        prev_close = data.prev_close
+        is_index = type_ == "指"
+        if is_index:
+            # 指数不显示浮盈/买一卖一/委比/均价（均置为"-"）
+            cells = (
+                name, f"{cur:{spec}}{_ARROWS[arrow]}", f"{change:{signed}}", f"{change_pct:+.2f}%",
+                "-", "-", "-", "-",
+                "-" if not data.deals_vol else format_volume(data.deals_vol),
+                "-" if not data.deals_amt else format_amount(data.deals_amt),
+                "-",
+                {"k": (opening, cur, high, low, prev_close), "days": code},
+                {"spark": (code, prev_close)},
+            )
+            signs = (0, change_sign, change_sign, change_sign, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        else:
+            cells = (
+                name,
+                f"{cur:{spec}}{_ARROWS[arrow]}",
+                f"{change:{signed}}",
+                f"{change_pct:+.2f}%",
+                f"{profit:+.2f}%" if has_cost else "-",
+                b1_label,
+                s1_label,
+                f"{committee:+.2f}%" if has_book else "-",
+                format_volume(data.deals_vol),
+                format_amount(data.deals_amt),
+                f"{avg:{spec}}",
+                {"k": (opening, cur, high, low, prev_close), "days": code},
+                {"spark": (code, prev_close)},
+            )
+            signs = (0, change_sign, change_sign, change_sign, profit_sign, b1_sign, s1_sign,
+                     committee_sign, 0, 0, avg_sign, 0, 0)
+        key = (type_, cost, type_visible, code_visible, name_length)    # 即 settings.row_key(code)
+        rows.append(_new_row(FormattedRow, (code, data, key, cells, signs)))
+    return rows
+
+
+class RowFormatter:
+    """带缓存的批量格式化。同一实例应只在一个线程中（或串行地）使用。"""
+
+    def __init__(self):
+        self._cache: dict[str, FormattedRow] = {}
+
+    def format(self, data: dict, settings: DisplaySettings, partial: bool = False) -> tuple[tuple, int]:
+        """{代码: 行情} -> (按 data 顺序的 FormattedRow 元组, 实际重新格式化的行数)。
+        完整结果之后缓存只保留本轮的代码；partial 结果只补充缓存。"""
+        cache = self._cache
+        rows, stale, items = [], [], []
+        for code, quote in data.items():
+            row = cache.get(code)
+            if row is None or row.quote is not quote or row.key != settings.row_key(code):
+                stale.append(len(rows))
+                items.append((code, quote))
+            rows.append(row)
+        for i, row in zip(stale, format_rows(items, settings)):
+            rows[i] = row
+        changed = len(stale)
+        if partial:
+            cache.update((row.code, row) for row in rows)
+        else:
+            self._cache = {row.code: row for row in rows}
+        return tuple(rows), changed
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""调试统计用的小工具（纯 Python，无 Qt 依赖）。"""
+
+
+def percentile(values, pct: float):
+    """values 的第 pct 百分位（最近秩法，取实际样本值）；无样本返回 None。"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))]
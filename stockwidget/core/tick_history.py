@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""当日分时历史：每个代码一个定长环形缓冲（纯 Python，无 Qt 依赖）。
+
+每轮完整结果到达时按代码追加一个点 (时间戳, 现价, 累计成交量, 累计成交额)：
+
+- 存储：四列 ``array.array('d')``，按需倍增直到 capacity，之后覆盖最旧的点，
+  单个代码最多占用 capacity × 32 字节；capacity 按该代码所属市场一个交易日的时长与刷新间隔估算
+  （整个交易时段都能放下，0.25 秒刷新的港股 / 美股 / 期货夜盘也不会覆盖开盘段），
+  只有报文变化才追加，内存随实际点数增长；
+- 去重：报文未变的代码由解析层返回同一个行情对象（见 quotes.payload_cache），不重复追加；
+- 换日：行情的 ``date`` 字段变化时清空该代码的缓冲，只保留当前交易日；
+- 回补：backfill() 把当日分钟线（见 data.intraday）并到已有实时点之前，之后的点照常追加；
+- 零拷贝读取：segments() 按时间顺序返回至多两段 memoryview 切片（环形回绕时为两段），
+  UI 直接遍历，无需复制数组；since() 只产出某个累计点数之后新追加的点，供增量绘制。
+  扩容时换用新数组，已取出的视图仍指向旧数组，不会失效。
+"""
+
+import math
+import time
+from array import array
+
+from stockwidget.core.markets import market_of
+from stockwidget.core.trading_calendar import session_seconds
+
+_FIELDS = ("ts", "price", "volume", "amount")
+_ITEM_BYTES = 8 * len(_FIELDS)
+
+
+class TickRing:
+    """单个代码的环形缓冲。ts 为本地接收时间（time.time()），volume / amount 为当日累计值。"""
+
+    __slots__ = ("capacity", "date", "total", "generation", "_cols", "_start", "_len", "_last")
+
+    INITIAL = 256   # 初始分配的点数
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self.date = ""
+        self.total = 0        # 本交易日累计追加的点数（含已被覆盖的），供增量读取
+        self.generation = 0   # 每次清空加一：读取方据此判断缓存是否失效
+        self._cols = tuple(array("d", bytes(8 * min(self.INITIAL, self.capacity))) for _ in _FIELDS)
+        self._start = 0
+        self._len = 0
+        self._last = None     # 最近一次追加的行情对象（同一对象不重复追加）
+
+    def __len__(self) -> int:
+        return self._len
+
+    def clear(self, keep_entry: bool = False):
+        """清空所有点；keep_entry=True 时保留 last_entry()（重排已有点时用）。"""
+        self.total = 0
+        self.generation += 1
+        self._start = 0
+        self._len = 0
+        if not keep_entry:
+            self._last = None
+
+    def last_entry(self):
+        """最近一次随 append(entry=...) 追加的行情对象（同一对象不应重复追加）；没有为 None。"""
+        return self._last
+
+    def append(self, ts: float, price: float, volume: float, amount: float, entry=None):
+        size = len(self._cols[0])
+        if self._len == size and size < self.capacity:
+            self._grow(min(self.capacity, size * 2))
+            size = len(self._cols[0])
+        if self._len < size:
+            i = (self._start + self._len) % size
+            self._len += 1
+        else:                                   # 已满：覆盖最旧的点
+            i = self._start
+            self._start = (self._start + 1) % size
+        if entry is not None:
+            self._last = entry
+        ts_col, price_col, vol_col, amt_col = self._cols
+        ts_col[i] = ts
+        price_col[i] = price
+        vol_col[i] = volume
+        amt_col[i] = amount
+        self.total += 1
+
+    def _grow(self, size: int):
+        # 按时间顺序复制到新数组（不对旧数组 resize：旧数组可能仍被 memoryview 引用）
+        cols = []
+        for col in self._cols:
+            new = array("d", bytes(8 * size))
+            n = 0
+            for seg in self._segment_ranges():
+                new[n:n + seg[1] - seg[0]] = col[seg[0]:seg[1]]
+                n += seg[1] - seg[0]
+            cols.append(new)
+        self._cols = tuple(cols)
+        self._start = 0
+
+    def _segment_ranges(self) -> list:
+        size = len(self._cols[0])
+        end = self._start + self._len
+        if end <= size:
+            return [(self._start, end)] if self._len else []
+        return [(self._start, size), (0, end - size)]
+
+    def segments(self) -> list:
+        """按时间顺序的至多两段数据，每段为 (ts, price, volume, amount) 四个 memoryview（零拷贝）。"""
+        views = [memoryview(col) for col in self._cols]
+        return [tuple(v[a:b] for v in views) for a, b in self._segment_ranges()]
+
+    def since(self, total: int):
+        """按时间顺序逐个产出累计第 total 个点之后追加的 (ts, price)；已被覆盖的点跳过。"""
+        skip = max(0, self._len - (self.total - total))
+        for ts_seg, price_seg, _, _ in self.segments():
+            n = len(ts_seg)
+            if skip >= n:
+                skip -= n
+                continue
+            yield from zip(ts_seg[skip:], price_seg[skip:])
+            skip = 0
+
+    def last(self):
+        """最新一点 (ts, price, volume, amount)；为空返回 None。"""
+        if not self._len:
+            return None
+        i = (self._start + self._len - 1) % len(self._cols[0])
+        return tuple(col[i] for col in self._cols)
+
+    def nbytes(self) -> int:
+        """已分配的缓冲字节数。"""
+        return len(self._cols[0]) * _ITEM_BYTES
+
+
+class TickHistory:
+    """{代码: TickRing}。record() 在主线程中随每轮完整结果调用，UI 经 ring() / segments() 读取。
+    capacity 为 None 时各代码的容量由 capacity_for() 按交易时长 / 刷新间隔 interval 估算。"""
+
+    MAX_CAPACITY = 1 << 17   # 单个代码的点数上限（4MB；全球指数按 0.25 秒刷新时约覆盖 9 小时）
+
+    def __init__(self, capacity: int | None = None, interval: float = 1.0, clock=time.time):
+        self.capacity = int(capacity) if capacity is not None else None
+        self.interval = float(interval)
+        self._clock = clock
+        self._rings: dict[str, TickRing] = {}
+
+    def capacity_for(self, code: str) -> int:
+        """code 一个交易日按刷新间隔最多产生的点数（留 10% 余量）。"""
+        if self.capacity is not None:
+            return self.capacity
+        points = math.ceil(session_seconds(market_of(code), code) / max(0.1, self.interval) * 1.1)
+        return max(TickRing.INITIAL, min(self.MAX_CAPACITY, points))
+
+    def set_interval(self, interval: float):
+        """刷新间隔变化：已有缓冲的容量只增不减（已记录的点不丢）。"""
+        self.interval = float(interval)
+        for code, ring in self._rings.items():
+            ring.capacity = max(ring.capacity, self.capacity_for(code))
+
+    def _ring_for(self, code: str) -> TickRing:
+        ring = self._rings.get(code)
+        if ring is None:
+            ring = self._rings[code] = TickRing(self.capacity_for(code))
+        return ring
+
+    def record(self, data: dict, now: float | None = None) -> int:
+        """追加一轮结果 {代码: 行情}，返回实际追加的点数（未变化的行情对象不追加）。"""
+        now = self._clock() if now is None else now
+        added = 0
+        for code, entry in data.items():
+            ring = self._ring_for(code)
+            if ring.last_entry() is entry:
+                continue
+            price = entry["current_price"]
+            if not price:
+                continue                       # 停牌 / 集合竞价前无成交价
+            date = entry["date"].replace("/", "-")    # 港股日期为 YYYY/MM/DD
+            if date and date != ring.date:
+                if ring.date:
+                    ring.clear()
+                ring.date = date
+            ring.append(now, price, entry["deals_vol"], entry["deals_amt"], entry)
+            added += 1
+        return added
+
+    def backfill(self, code: str, date: str, points: list) -> int:
+        """把 code 在交易日 date 的分钟线 [(ts, price, volume, amount), ...]（按时间升序）
+        并到已有点之前：只取早于已有首个点的分钟，已有的实时点保持不变。返回并入的点数。"""
+        ring = self._ring_for(code)
+        if not date or (ring.date and ring.date != date):
+            return 0                           # 不是同一交易日（如盘前拿到的是上一交易日的分时）
+        existing = [p for seg in ring.segments() for p in zip(*seg)]
+        first = existing[0][0] if existing else float("inf")
+        bars = [p for p in points if p[0] < first]
+        if not bars:
+            return 0
+        ring.clear(keep_entry=True)
+        ring.date = date
+        for p in bars + existing:
+            ring.append(*p)
+        return len(bars)
+
+    def ring(self, code: str) -> TickRing | None:
+        return self._rings.get(code)
+
+    def segments(self, code: str) -> list:
+        """见 TickRing.segments()；无记录返回空列表。"""
+        ring = self._rings.get(code)
+        return ring.segments() if ring is not None else []
+
+    def retain(self, codes):
+        """只保留 codes 中的代码（自选删除后释放其缓冲）。"""
+        keep = set(codes)
+        for code in [c for c in self._rings if c not in keep]:
+            del self._rings[code]
+
+    def memory(self) -> dict:
+        """各代码的点数与已分配字节数：{代码: (点数, 字节数)}。"""
+        return {code: (len(ring), ring.nbytes()) for code, ring in self._rings.items()}
+
+    def stats(self) -> dict:
+        usage = self.memory()
+        return {"codes": len(usage),
+                "points": sum(n for n, _ in usage.values()),
+                "bytes": sum(b for _, b in usage.values())}
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""各市场交易时段与休市日历（纯 Python，无 Qt / 时区库依赖）。
+
+- A股（沪深京）：集合竞价 9:15 起，连续竞价 9:30–11:30 / 13:00–15:00（北京时间）
+- 港股：开市前时段 9:00 起，9:30–12:00 / 13:00–16:00，收市竞价至 16:10（香港时间）
+- 美股：常规时段 9:30–16:00（美东时间，夏令时按规则计算：3 月第二个周日至 11 月第一个周日）
+- 上期所 / 上期能源期货：日盘 9:00–10:15 / 10:30–11:30 / 13:30–15:00，
+  夜盘 21:00 起按品种收于 23:00 / 次日 1:00 / 次日 2:30；节假日前一交易日无夜盘
+- 全球指数：各地交易所时段交错，按北京时间工作日 7:00 至次日 1:00 近似
+
+休市日：周末 + 按规则可推算的节日（美股全部、港股/A股的公历节日与复活节），
+农历节日（春节、清明、端午、中秋等）每年日期不同，由配置 ``holidays`` 补充：
+``{"cn": ["2027-02-05", ...], "hk": [...], "us": [...]}``。
+"""
+
+import re
+from datetime import date, datetime, timedelta, timezone
+
+# 交易日起点附近的提前量与收盘后的宽限（分钟）：开盘前一分钟开始请求，收盘后再取几次收盘价
+LEAD_MINUTES = 1
+GRACE_MINUTES = 3
+
+_CN_OFFSET = timedelta(hours=8)    # 北京 / 香港时间，无夏令时
+
+
+def _hm(h: int, m: int = 0) -> int:
+    return h * 60 + m
+
+
+# 各时段表：(开始分钟, 结束分钟)，以交易日当天 0 点为基准，结束可超过 24:00（跨夜）
+_A_SESSIONS = ((_hm(9, 15), _hm(11, 30)), (_hm(13), _hm(15)))
+_HK_SESSIONS = ((_hm(9), _hm(12)), (_hm(13), _hm(16, 10)))
+_US_SESSIONS = ((_hm(9, 30), _hm(16)),)
+_GLOBAL_SESSIONS = ((_hm(7), _hm(25)),)
+_FUTURES_DAY = ((_hm(9), _hm(10, 15)), (_hm(10, 30), _hm(11, 30)), (_hm(13, 30), _hm(15)))
+
+# 期货夜盘收盘时间（分钟，跨夜记为 24:00 之后）；未列出的品种按最晚的 2:30 处理，宁可多取不漏取
+_NIGHT_END = {}
+for _p in ("au", "ag", "sc"):
+    _NIGHT_END[_p] = _hm(26, 30)
+for _p in ("cu", "al", "zn", "pb", "ni", "sn", "ss", "bc", "ao"):
+    _NIGHT_END[_p] = _hm(25)
+for _p in ("rb", "hc", "fu", "bu", "ru", "sp", "nr", "lu", "br"):
+    _NIGHT_END[_p] = _hm(23)
+for _p in ("wr", "ec"):
+    _NIGHT_END[_p] = None            # 无夜盘
+_DEFAULT_NIGHT_END = _hm(26, 30)
+_NIGHT_START = _hm(21)
+
+
+# ---------------- 节日规则 ----------------
+
+def easter(year: int) -> date:
+    """公历复活节日期（匿名格里高利算法）。"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """某月第 n 个星期几（weekday: 周一=0）；n=-1 表示最后一个。"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    nxt = date(year + (month == 12), month % 12 + 1, 1)
+    last = nxt - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _us_observed(d: date) -> date:
+    """美股节日遇周六提前到周五、遇周日顺延到周一。"""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+def _us_holidays(year: int) -> set:
+    days = {
+        _nth_weekday(year, 1, 0, 3),                 # 马丁·路德·金纪念日
+        _nth_weekday(year, 2, 0, 3),                 # 总统日
+        easter(year) - timedelta(days=2),            # 耶稣受难日
+        _nth_weekday(year, 5, 0, -1),                # 阵亡将士纪念日
+        _us_observed(date(year, 7, 4)),              # 独立日
+        _nth_weekday(year, 9, 0, 1),                 # 劳动节
+        _nth_weekday(year, 11, 3, 4),                # 感恩节
+        _us_observed(date(year, 12, 25)),            # 圣诞节
+    }
+    if year >= 2022:
+        days.add(_us_observed(date(year, 6, 19)))    # 六月节
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:                      # 元旦逢周六不补休（不提前到上一年）
+        days.add(_us_observed(new_year))
+    return days
+
+
+def _hk_holidays(year: int) -> set:
+    e = easter(year)
+    days = {e - timedelta(days=2), e + timedelta(days=1)}   # 耶稣受难日、复活节星期一
+    for m, d in ((1, 1), (7, 1), (10, 1), (12, 25), (12, 26)):
+        day = date(year, m, d)
+        if day.weekday() == 6:
+            day += timedelta(days=1)                 # 逢周日顺延
+        days.add(day)
+    return days
+
+
+def _cn_holidays(year: int) -> set:
+    days = {date(year, 1, 1)}
+    days.update(date(year, 5, d) for d in (1, 2, 3))      # 劳动节（至少 5/1–5/3 休市）
+    days.update(date(year, 10, d) for d in range(1, 8))   # 国庆节
+    return days
+
+
+_HOLIDAY_RULES = {"cn": _cn_holidays, "hk": _hk_holidays, "us": _us_holidays}
+
+
+# ---------------- 交易日历 ----------------
+
+def _us_offset(now_utc: datetime) -> timedelta:
+    """美东时间相对 UTC 的偏移：夏令时 -4 小时（3 月第二个周日 2:00 至 11 月第一个周日 2:00），否则 -5。"""
+    year = now_utc.year
+    start = datetime.combine(_nth_weekday(year, 3, 6, 2), datetime.min.time(), timezone.utc) + timedelta(hours=7)
+    end = datetime.combine(_nth_weekday(year, 11, 6, 1), datetime.min.time(), timezone.utc) + timedelta(hours=6)
+    return timedelta(hours=-4) if start <= now_utc < end else timedelta(hours=-5)
+
+
+def _local_now(market: str, now: datetime | None = None) -> datetime:
+    """市场当地时间（美股按美东含夏令时，其余按北京时间）；只取其日期与钟点，时区标记仍为 UTC。"""
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(timezone.utc) + (_us_offset(now) if market == "us" else _CN_OFFSET)
+
+
+def local_date(market: str, now: datetime | None = None) -> date:
+    """该市场当地的当天日期。"""
+    return _local_now(market, now).date()
+
+
+def futures_product(code: str) -> str:
+    """期货统一代码的品种前缀：au2512 / au0 -> au。"""
+    m = re.match(r"[a-z]+", str(code or "").strip().lower())
+    return m.group(0) if m else ""
+
+
+def session_seconds(market: str, code: str = "") -> int:
+    """该市场一个完整交易日的交易时长（秒，含各时段的提前量与宽限；期货按有夜盘的交易日计）。"""
+    if market in ("sh", "sz", "bj"):
+        sessions = _A_SESSIONS
+    elif market == "hk":
+        sessions = _HK_SESSIONS
+    elif market == "us":
+        sessions = _US_SESSIONS
+    elif market == "g":
+        sessions = _GLOBAL_SESSIONS
+    else:
+        night_end = _NIGHT_END.get(futures_product(code), _DEFAULT_NIGHT_END)
+        sessions = _FUTURES_DAY + (((_NIGHT_START, night_end),) if night_end is not None else ())
+    return sum(end - start + LEAD_MINUTES + GRACE_MINUTES for start, end in sessions) * 60
+
+
+class TradingCalendar:
+    """按市场判断当前是否处于交易时段。holidays 为额外休市日 {"cn"/"hk"/"us": [ISO 日期, ...]}。"""
+
+    def __init__(self, holidays: dict | None = None):
+        self._extra = {}
+        for region, days in (holidays or {}).items():
+            parsed = set()
+            for d in days or ():
+                try:
+                    parsed.add(date.fromisoformat(str(d).strip()))
+                except ValueError:
+                    continue
+            self._extra[str(region).lower()] = parsed
+        self._rule_cache: dict[tuple, set] = {}
+
+    def is_holiday(self, region: str, day: date) -> bool:
+        key = (region, day.year)
+        days = self._rule_cache.get(key)
+        if days is None:
+            rule = _HOLIDAY_RULES.get(region)
+            days = self._rule_cache[key] = rule(day.year) if rule else set()
+        return day in days or day in self._extra.get(region, ())
+
+    def is_trading_day(self, region: str, day: date) -> bool:
+        return day.weekday() < 5 and not self.is_holiday(region, day)
+
+    def next_trading_day(self, region: str, day: date) -> date:
+        d = day + timedelta(days=1)
+        while not self.is_trading_day(region, d):
+            d += timedelta(days=1)
+        return d
+
+    def sessions(self, market: str, code: str, day: date) -> tuple:
+        """交易日 day 的时段表（非交易日为空）。market 为 markets.market_of 的返回值。"""
+        if market in ("sh", "sz", "bj"):
+            return _A_SESSIONS if self.is_trading_day("cn", day) else ()
+        if market == "hk":
+            return _HK_SESSIONS if self.is_trading_day("hk", day) else ()
+        if market == "us":
+            return _US_SESSIONS if self.is_trading_day("us", day) else ()
+        if market == "g":
+            return _GLOBAL_SESSIONS if day.weekday() < 5 else ()
+        # 期货：日盘 + 夜盘（夜盘仅在下一交易日紧接其后、中间无节假日时开）
+        if not self.is_trading_day("cn", day):
+            return ()
+        night_end = _NIGHT_END.get(futures_product(code), _DEFAULT_NIGHT_END)
+        if night_end is None:
+            return _FUTURES_DAY
+        nxt = day + timedelta(days=3 if day.weekday() == 4 else 1)
+        if self.next_trading_day("cn", day) != nxt:
+            return _FUTURES_DAY
+        return _FUTURES_DAY + ((_NIGHT_START, night_end),)
+
+    def is_open(self, market: str, code: str = "", now: datetime | None = None) -> bool:
+        """该市场此刻是否在交易时段内（含开盘前 LEAD_MINUTES、收盘后 GRACE_MINUTES）。
+        now 为带时区的时间（默认当前 UTC 时间）。"""
+        local = _local_now(market, now)
+        minute = local.hour * 60 + local.minute
+        today = local.date()
+        # 当天的时段，以及前一交易日跨过 24:00 的时段（夜盘 / 全球指数）
+        for day, offset in ((today, 0), (today - timedelta(days=1), 1440)):
+            m = minute + offset
+            for start, end in self.sessions(market, code, day):
+                if start - LEAD_MINUTES <= m < end + GRACE_MINUTES:
+                    return True
+        return False
@@ -9,17 +9,17 @@ import json
 import os
 from datetime import datetime
 
-import requests
 from PySide6.QtCore import QFile, QIODevice
 
 from stockwidget.constants import CODES_BRANCHES, CODES_RAW_URL, LIST_FILES
 from stockwidget.core.config_store import load_file, save_file
+from stockwidget.data.http_client import http_get
 
 
-def fetch_json_from_url(url: str, timeout: int = 10):
-    """从 URL 下载 JSON，失败返回 None。"""
+def fetch_json_from_url(url: str, timeout: float | None = None):
+    """从 URL 下载 JSON，失败返回 None。timeout 为超时上限（默认按主机配置，自适应收紧）。"""
     try:
-        r = requests.get(url, timeout=timeout)
+        r = http_get(url, timeout=timeout)
         r.raise_for_status()
         return r.json()
     except Exception:
@@ -45,7 +45,7 @@ def download_codes(app_name: str) -> dict | None:
         data = None
         for branch in CODES_BRANCHES:
             url = CODES_RAW_URL.format(branch=branch, name=fname)
-            data = fetch_json_from_url(url, timeout=15)
+            data = fetch_json_from_url(url)
             if data and data.get("codes"):
                 break
         if not data or not data.get("codes"):
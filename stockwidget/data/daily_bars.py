@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""多日日K线本地缓存：每个代码一个定长列式二进制文件，可直接 mmap 读取。
+
+文件布局（小端）：
+- 头部 32 字节：魔数 ``SWKD``、版本、容量（天数）、已存天数、最近检查日期（YYYYMMDD）；
+- 之后依次为 日期 / 开 / 高 / 低 / 收 / 量 六列，每列 容量 × float64。
+
+文件创建时即按容量分配，之后只在原位写入（追加新交易日、满后整体左移），
+读取方持有的 mmap 不会因文件改名 / 改长而失效（Windows 下被映射的文件不能替换或截断）。
+
+更新策略：只保存已收盘的交易日（当日 K 线由实时行情绘制）。某代码在市场当地日期当天已检查过
+则不再请求，热启动完全不访问网络；新的一天只请求上次之后的日线并追加。
+"""
+
+import mmap
+import os
+import struct
+
+from stockwidget.constants import APP_NAME
+from stockwidget.core.config_store import config_paths
+from stockwidget.core.markets import market_of
+from stockwidget.core.trading_calendar import local_date
+from stockwidget.data.http_client import HttpClient, shared_client
+from stockwidget.data.quotes import _em_secid
+
+_EM_KLINE_URL = "https://push2his.eastmoney.com/api/qt/stock/kline/get"
+
+_MAGIC = b"SWKD"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHIII")    # 魔数, 版本, 保留, 容量, 已存天数, 最近检查日期
+_HEADER_SIZE = 32
+COLUMNS = ("date", "open", "high", "low", "close", "volume")
+
+
+def _date_int(text: str) -> int:
+    """"YYYY-MM-DD" -> YYYYMMDD。"""
+    return int(str(text)[:10].replace("-", ""))
+
+
+def market_today(code: str) -> int:
+    """代码所属市场当地的当天日期（YYYYMMDD）。"""
+    d = local_date(market_of(code))
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+def parse_klines(code: str, klines: list) -> list:
+    """东财 kline 行 "日期,开,收,高,低,量" -> [(YYYYMMDD, open, high, low, close, volume), ...]。"""
+    lot = 100 if market_of(code) in ("sh", "sz", "bj") else 1
+    bars = []
+    for row in klines:
+        parts = str(row).split(",")
+        if len(parts) < 6:
+            continue
+        try:
+            bars.append((_date_int(parts[0]), float(parts[1]), float(parts[3]), float(parts[4]),
+                         float(parts[2]), float(parts[5] or 0) * lot))
+        except ValueError:
+            continue
+    return bars
+
+
+def request_daily(code: str, since: int = 0, limit: int = 120, client: HttpClient | None = None) -> list:
+    """东财日K线（前复权），返回 since（YYYYMMDD，不含）之后最近 limit 根；请求失败抛出异常。"""
+    params = {
+        "secid": _em_secid(code),
+        "fields1": "f1,f2,f3,f4,f5,f6",
+        "fields2": "f51,f52,f53,f54,f55,f56",
+        "klt": 101,
+        "fqt": 1,
+        "end": "20500101",
+        "lmt": limit,
+    }
+    if since:
+        params["beg"] = str(since + 1)
+    response = (client or shared_client()).get(_EM_KLINE_URL, params=params)
+    response.raise_for_status()
+    klines = ((response.json() or {}).get("data") or {}).get("klines") or []
+    return [b for b in parse_klines(code, klines) if b[0] > since]
+
+
+class DailyBars:
+    """单个代码的只读 mmap 视图。column() / tail() 读取的是文件当前内容（写入方原位更新后立即可见）。"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        magic, version, _, self.capacity, _, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION or len(self._mm) < _HEADER_SIZE + 8 * len(COLUMNS) * self.capacity:
+            self.close()
+            raise ValueError(f"无效的日K线缓存文件: {path}")
+        self._values = memoryview(self._mm)[_HEADER_SIZE:].cast("d")
+
+    def __len__(self) -> int:
+        return _HEADER.unpack_from(self._mm, 0)[4]
+
+    @property
+    def checked(self) -> int:
+        return _HEADER.unpack_from(self._mm, 0)[5]
+
+    def column(self, name: str) -> memoryview:
+        """某一列已存的部分（零拷贝 memoryview，按日期升序）。"""
+        start = COLUMNS.index(name) * self.capacity
+        return self._values[start:start + len(self)]
+
+    def tail(self, n: int) -> list:
+        """最近 n 天的 (open, high, low, close)。"""
+        count = len(self)
+        n = max(0, min(n, count))
+        cols = [self.column(name)[count - n:] for name in ("open", "high", "low", "close")]
+        return list(zip(*cols))
+
+    def close(self):
+        values = getattr(self, "_values", None)
+        if values is not None:
+            values.release()
+            self._values = None
+        self._mm.close()
+        self._file.close()
+
+
+class DailyBarStore:
+    """{代码: 日K线文件} 的读写入口。写入（update）可在后台线程，读取（bars）在主线程。"""
+
+    CAPACITY = 120   # 每个代码最多保存的交易日数
+
+    def __init__(self, directory: str | None = None, capacity: int = CAPACITY):
+        self.directory = directory or os.path.join(config_paths(APP_NAME), "daily")
+        self.capacity = int(capacity)
+        self._readers: dict[str, DailyBars | None] = {}   # None：文件不存在 / 无法读取（避免每次重绘都打开文件）
+
+    def path(self, code: str) -> str:
+        return os.path.join(self.directory, f"{code}.kd")
+
+    def bars(self, code: str) -> DailyBars | None:
+        """code 的 mmap 视图；尚无缓存文件返回 None（结果会被记住，文件写入后须调用 forget）。"""
+        try:
+            return self._readers[code]
+        except KeyError:
+            pass
+        try:
+            reader = DailyBars(self.path(code))
+        except (OSError, ValueError):
+            reader = None
+        self._readers[code] = reader
+        return reader
+
+    def forget(self, codes):
+        """丢弃 codes 记住的“无缓存文件”结果（update 写入这些代码后在读取线程调用）。"""
+        for code in codes:
+            if code in self._readers and self._readers[code] is None:
+                del self._readers[code]
+
+    def close(self):
+        for reader in self._readers.values():
+            if reader is not None:
+                reader.close()
+        self._readers.clear()
+
+    def _header(self, code: str):
+        """(容量, 已存天数, 最近检查日期, 最后一根的日期)；文件不存在返回 None。"""
+        try:
+            with open(self.path(code), "rb") as file:
+                head = file.read(_HEADER_SIZE)
+                magic, version, _, capacity, count, checked = _HEADER.unpack_from(head, 0)
+                if magic != _MAGIC or version != _VERSION:
+                    return None
+                last = 0
+                if count:
+                    file.seek(_HEADER_SIZE + 8 * (count - 1))
+                    last = int(struct.unpack("<d", file.read(8))[0])
+                return capacity, count, checked, last
+        except (OSError, struct.error):
+            return None
+
+    def _create(self, code: str):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(code)
+        with open(path + ".tmp", "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, 0, self.capacity, 0, 0).ljust(_HEADER_SIZE, b"\0"))
+            file.write(bytes(8 * len(COLUMNS) * self.capacity))
+        os.replace(path + ".tmp", path)
+
+    def append(self, code: str, bars: list, checked: int):
+        """追加 bars（按日期升序；不晚于已存最后一天的忽略）并记录检查日期；满后丢弃最旧的天。"""
+        head = self._header(code)
+        if head is None:
+            self._create(code)
+            head = self._header(code)
+        capacity, count, _, last = head
+        bars = [b for b in bars if b[0] > last]
+        with open(self.path(code), "r+b") as file:
+            if count + len(bars) > capacity:
+                columns = self._read_columns(file, capacity, count)
+                keep = capacity - min(len(bars), capacity)
+                merged = [col[count - keep:] if keep else [] for col in columns]
+                for bar in bars[-capacity:]:
+                    for col, value in zip(merged, bar):
+                        col.append(float(value))
+                self._write_rows(file, capacity, 0, merged)
+                count = len(merged[0])
+            elif bars:
+                self._write_rows(file, capacity, count, [list(col) for col in zip(*bars)])
+                count += len(bars)
+            file.seek(0)
+            file.write(_HEADER.pack(_MAGIC, _VERSION, 0, capacity, count, checked))
+
+    @staticmethod
+    def _read_columns(file, capacity: int, count: int) -> list:
+        columns = []
+        for i in range(len(COLUMNS)):
+            file.seek(_HEADER_SIZE + 8 * i * capacity)
+            columns.append(list(struct.unpack(f"<{count}d", file.read(8 * count))))
+        return columns
+
+    @staticmethod
+    def _write_rows(file, capacity: int, start: int, columns: list):
+        for i, col in enumerate(columns):
+            file.seek(_HEADER_SIZE + 8 * (i * capacity + start))
+            file.write(struct.pack(f"<{len(col)}d", *col))
+
+    def update(self, codes: list[str], fetch=request_daily) -> list[str]:
+        """补齐 codes 的日K线：当地日期当天已检查过的代码跳过（不访问网络），其余只请求上次之后的日线。
+        只保存早于当地当天的（已收盘）交易日。返回实际有更新的代码。（阻塞调用，应在后台线程中执行。）"""
+        updated = []
+        for code in codes:
+            if market_of(code) == "g":
+                continue                      # 全球指数东财 secid 未验证
+            today = market_today(code)
+            head = self._header(code)
+            if head is not None and head[2] >= today:
+                continue
+            last = head[3] if head else 0
+            try:
+                bars = fetch(code, since=last, limit=self.capacity)
+            except Exception:
+                continue
+            self.append(code, [b for b in bars if b[0] < today], today)
+            updated.append(code)
+        return updated
+
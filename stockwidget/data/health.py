@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""上游健康度统计：延迟分位数、连续失败计数与自动降级（纯 Python，无 Qt/网络依赖）。
+
+- LatencyWindow：最近 N 次请求耗时的滑动窗口，提供分位数。
+- SourceHealth ：单个行情数据源的健康度。连续失败达到阈值后降级一段时间
+  （退避时间逐次翻倍），到期后重新作为首选源试探，成功即恢复。
+- HostHealth   ：单个上游主机的健康度与熔断器。按实测延迟分布自适应超时；
+  连续失败后熔断（指数退避 + 随机抖动），到期半开放行一个试探请求，成功即闭合。
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+from stockwidget.core.stats import percentile
+
+
+class LatencyWindow:
+    """最近 size 次耗时（秒）的滑动窗口。"""
+
+    def __init__(self, size: int = 50):
+        self._samples = deque(maxlen=max(1, int(size)))
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float):
+        self._samples.append(float(seconds))
+
+    def percentile(self, pct: float) -> float | None:
+        """返回第 pct 百分位耗时；无样本返回 None。"""
+        return percentile(self._samples, pct)
+
+
+class SourceHealth:
+    """单个数据源的健康度：延迟分位数 + 连续失败降级 + 到期重试。"""
+
+    MIN_SAMPLES = 5           # 样本不足时使用默认对冲延迟
+    DEFAULT_HEDGE_DELAY = 1.0
+    MIN_HEDGE_DELAY = 0.2
+    MAX_HEDGE_DELAY = 2.5
+    DEMOTE_AFTER = 3          # 连续失败次数阈值
+    BASE_BACKOFF = 30.0       # 首次降级时长（秒），逐次翻倍
+    MAX_BACKOFF = 300.0
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.latency = LatencyWindow()
+        self.failures = 0          # 连续失败次数
+        self.demotions = 0         # 累计降级次数
+        self._backoff = self.BASE_BACKOFF
+        self._demoted_until = 0.0
+
+    def record_success(self, seconds: float):
+        with self._lock:
+            self.latency.add(seconds)
+            self.failures = 0
+            self._backoff = self.BASE_BACKOFF
+            self._demoted_until = 0.0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.DEMOTE_AFTER and self._demoted_until <= self._clock():
+                self._demoted_until = self._clock() + self._backoff
+                self._backoff = min(self.MAX_BACKOFF, self._backoff * 2)
+                self.demotions += 1
+
+    def is_demoted(self) -> bool:
+        """是否处于降级期；到期后返回 False，由下一次请求充当试探。"""
+        with self._lock:
+            return self._clock() < self._demoted_until
+
+    def hedge_delay(self) -> float:
+        """对冲等待时长：首选源超过其 p95 耗时仍未返回时，向备用源发出同样的请求。"""
+        with self._lock:
+            if len(self.latency) < self.MIN_SAMPLES:
+                return self.DEFAULT_HEDGE_DELAY
+            p95 = self.latency.percentile(95)
+        return max(self.MIN_HEDGE_DELAY, min(self.MAX_HEDGE_DELAY, p95))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "p50": self.latency.percentile(50),
+                "p95": self.latency.percentile(95),
+                "failures": self.failures,
+                "demotions": self.demotions,
+                "demoted": self._clock() < self._demoted_until,
+            }
+
+
+class HostHealth:
+    """单个主机的延迟 / 错误率统计与熔断器（closed -> open -> half_open -> closed）。"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    MIN_SAMPLES = 10          # 样本不足时使用默认超时
+    MIN_TIMEOUT = 1.0         # 自适应超时下限（秒）
+    TIMEOUT_FACTOR = 3.0      # 超时 = p99 × 系数（不超过默认超时）
+    FAIL_THRESHOLD = 3        # 连续失败次数达到后熔断
+    BASE_BACKOFF = 2.0        # 首次熔断时长（秒），再次熔断翻倍
+    MAX_BACKOFF = 60.0
+    JITTER = 0.5              # 熔断时长额外随机增加 0~50%，避免多个客户端同时试探
+
+    def __init__(self, clock=time.monotonic, rand=random.random):
+        self._clock = clock
+        self._rand = rand
+        self._lock = threading.Lock()
+        self.latency = LatencyWindow(100)
+        self._outcomes = deque(maxlen=100)   # 最近请求是否成功
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0                       # 累计熔断次数
+        self.rejected = 0                    # 熔断期间被拒绝的请求数
+        self._backoff = self.BASE_BACKOFF
+        self._open_until = 0.0
+        self._probing = False
+
+    def timeout_for(self, default: float) -> float:
+        """按实测延迟分布给出超时：p99 × 系数，夹在 [MIN_TIMEOUT, default] 之间。"""
+        with self._lock:
+            if len(self.latency) < self.MIN_SAMPLES:
+                return default
+            p99 = self.latency.percentile(99)
+        return max(min(self.MIN_TIMEOUT, default), min(default, p99 * self.TIMEOUT_FACTOR))
+
+    def allow(self) -> bool:
+        """是否放行本次请求。熔断到期后进入半开放状态，只放行一个试探请求。"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self._clock() >= self._open_until:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, seconds: float):
+        with self._lock:
+            self.latency.add(seconds)
+            self._outcomes.append(True)
+            self.failures = 0
+            self.state = self.CLOSED
+            self._backoff = self.BASE_BACKOFF
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                # 试探失败：退避翻倍后重新熔断
+                self._backoff = min(self.MAX_BACKOFF, self._backoff * 2)
+                self._trip()
+            elif self.state == self.CLOSED and self.failures >= self.FAIL_THRESHOLD:
+                self._trip()
+
+    def _trip(self):
+        self.state = self.OPEN
+        self._probing = False
+        self._open_until = self._clock() + self._backoff * (1 + self.JITTER * self._rand())
+        self.trips += 1
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return self._outcomes.count(False) / len(self._outcomes)
+
+    def snapshot(self) -> dict:
+        rate = self.error_rate()
+        with self._lock:
+            return {
+                "state": self.state,
+                "p50": self.latency.percentile(50),
+                "p99": self.latency.percentile(99),
+                "error_rate": rate,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
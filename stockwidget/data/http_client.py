@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""共享 HTTP 客户端：所有网络请求（行情 / 代码列表 / 更新检查）统一经此发出。
+
+- 长连接复用：基于 ``requests.Session`` + ``HTTPAdapter``，按主机维护 keep-alive 连接池，
+  1 秒刷新时每次请求不再重复 TCP + TLS 握手。
+- 压缩协商：默认发送 ``Accept-Encoding: gzip, deflate``。
+- 按主机超时：以 ``HOST_TIMEOUTS`` 为上限，按该主机实测延迟分布自适应收紧。
+- 熔断：主机连续失败后直接拒绝请求（抛 CircuitOpenError），退避到期再放行试探请求，
+  避免一个已失联的主机每次刷新都白等满超时。
+- 请求计数：按主机统计请求数 / 失败数 / 下行字节数，供调试查看。
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from stockwidget.data.health import HostHealth
+
+# 各主机默认超时（秒）；未列出的主机使用 DEFAULT_TIMEOUT
+HOST_TIMEOUTS = {
+    "hq.sinajs.cn": 3,
+    "push2delay.eastmoney.com": 3,
+    "raw.githubusercontent.com": 15,
+    "api.github.com": 5,
+}
+DEFAULT_TIMEOUT = 10
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """主机处于熔断期，请求未发出。"""
+
+
+_DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+
+class HttpClient:
+    """带连接池的 HTTP 客户端（线程安全，可被多个后台线程共用）。"""
+
+    def __init__(self, pool_size: int = 8, timeouts: dict | None = None):
+        self._session = requests.Session()
+        self._session.headers.update(_DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(1, int(pool_size)))
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._timeouts = dict(HOST_TIMEOUTS if timeouts is None else timeouts)
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}
+
+    def timeout_for(self, host: str, limit: float | None = None) -> float:
+        """主机当前超时（秒）：按实测延迟自适应，不超过 limit（默认取 HOST_TIMEOUTS）。"""
+        if limit is None:
+            limit = self._timeouts.get(host, DEFAULT_TIMEOUT)
+        return host_health(host).timeout_for(limit)
+
+    def get(self, url: str, *, params=None, headers=None, timeout=None, stream: bool = False) -> requests.Response:
+        """发送 GET 请求；异常原样抛出（requests.exceptions.RequestException）。
+        timeout 为超时上限，实际超时按主机实测延迟自适应；主机熔断时抛 CircuitOpenError。
+        stream=True 时返回的响应在 iter_content 读完后才计入健康度与字节数（读取出错记为失败）。"""
+        host = urlsplit(url).hostname or ""
+        health = host_health(host)
+        if not health.allow():
+            raise CircuitOpenError(f"{host} 暂时不可用（熔断中）")
+        t0 = time.monotonic()
+        try:
+            resp = self._session.get(url, params=params, headers=headers,
+                                     timeout=self.timeout_for(host, timeout), stream=stream)
+        except requests.exceptions.RequestException:
+            health.record_failure()
+            self._count(host, ok=False)
+            raise
+        ok = resp.status_code < 500
+        if stream:
+            # 流式响应：响应体读完（或中途出错）后再计入健康度与计数
+            return _TrackedStream(self, resp, host, ok, time.monotonic() - t0)
+        self._settle(host, ok, time.monotonic() - t0, len(resp.content))
+        return resp
+
+    def _settle(self, host: str, ok: bool, latency: float, size: int):
+        health = host_health(host)
+        if ok:
+            health.record_success(latency)
+        else:
+            health.record_failure()
+        self._count(host, ok=ok, size=size)
+
+    def _count(self, host: str, ok: bool, size: int = 0):
+        with self._lock:
+            s = self._stats.setdefault(host, {"requests": 0, "errors": 0, "bytes": 0})
+            s["requests"] += 1
+            s["bytes"] += size
+            if not ok:
+                s["errors"] += 1
+
+    def stats(self) -> dict:
+        """按主机返回计数与健康度快照：{host: {"requests", "errors", "bytes", "health"}}。"""
+        with self._lock:
+            stats = {h: dict(s) for h, s in self._stats.items()}
+        for host, s in stats.items():
+            s["health"] = host_health(host).snapshot()
+        return stats
+
+    def close(self):
+        self._session.close()
+
+
+class _TrackedStream:
+    """流式响应包装：iter_content 读完响应体后才把结果与下行字节数计入主机健康度 / 计数；
+    读取中途抛出的网络异常记为失败；调用方提前停止迭代或未读即关闭时按已读部分结算。
+    其余属性透传给原响应。"""
+
+    def __init__(self, client: HttpClient, resp: requests.Response, host: str, ok: bool, latency: float):
+        self._client = client
+        self._resp = resp
+        self._host = host
+        self._ok = ok
+        self._latency = latency   # 收到响应头的耗时（与非流式请求口径一致）
+        self._size = 0
+        self._settled = False
+
+    def __getattr__(self, name):
+        return getattr(self._resp, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def iter_content(self, chunk_size: int = 1, decode_unicode: bool = False):
+        try:
+            for block in self._resp.iter_content(chunk_size, decode_unicode):
+                self._size += len(block)
+                yield block
+        except requests.exceptions.RequestException:
+            self._ok = False
+            raise
+        finally:
+            self._settle()
+
+    def close(self):
+        self._settle()
+        self._resp.close()
+
+    def _settle(self):
+        if not self._settled:
+            self._settled = True
+            self._client._settle(self._host, self._ok, self._latency, self._size)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+_health: dict[str, HostHealth] = {}
+
+
+def host_health(host: str) -> HostHealth:
+    """主机健康度（进程内共享：同一主机的熔断状态对所有客户端生效）。"""
+    h = _health.get(host)
+    if h is None:
+        with _shared_lock:
+            h = _health.setdefault(host, HostHealth())
+    return h
+
+
+def shared_client() -> HttpClient:
+    """进程内共享的 HttpClient（首次调用时创建）。"""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = HttpClient()
+    return _shared
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """经共享客户端发送 GET（参数同 HttpClient.get）。"""
+    return shared_client().get(url, **kwargs)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""当日分钟线回补：盘中启动时一次性拉取自选的当日分时，作为分时历史的开头。
+
+- 数据源：东财 trends2 接口（每分钟一条 "日期 时间,开,收,高,低,量,额,均价"），
+  请求函数可替换（测试中用本地桩函数）；
+- 仅回补北京时间交易的市场（沪深京 / 港股）：分钟时刻按 UTC+8 换算为时间戳；
+- 本地缓存：按自然日一个 JSON 文件（配置目录下 intraday/），只缓存交易日为当天且非空的结果
+  （盘前请求拿到的空数据 / 上一交易日分时不写入，也不返回，稍后再试）；
+  每条缓存记下最后一根分钟线的时刻，盘中重启时若它早于当前时段已走到的时刻（缓存之后又交易过）
+  则重新请求，补上缓存时刻到重启之间的空档；旧日期的缓存文件在保存时清理。
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from stockwidget.constants import APP_NAME
+from stockwidget.core.config_store import config_paths
+from stockwidget.core.markets import market_of
+from stockwidget.core.trading_calendar import TradingCalendar
+from stockwidget.data.http_client import HttpClient, shared_client
+from stockwidget.data.quotes import _em_secid
+
+_EM_TRENDS_URL = "https://push2his.eastmoney.com/api/qt/stock/trends2/get"
+_CN_TZ = timezone(timedelta(hours=8))       # 北京 / 香港时间，无夏令时
+BACKFILL_MARKETS = ("sh", "sz", "bj", "hk")
+STALE_AFTER = 120.0     # 缓存的最后一根分钟线落后于当前时段进度超过此秒数时重新请求
+
+
+def supports_backfill(code: str) -> bool:
+    return market_of(code) in BACKFILL_MARKETS
+
+
+def cn_today() -> str:
+    """北京时间的当天日期 "YYYY-MM-DD"（缓存文件按此命名）。"""
+    return datetime.now(_CN_TZ).strftime("%Y-%m-%d")
+
+
+def session_progress(code: str, now: float, calendar: TradingCalendar) -> float | None:
+    """北京时间当天 code 所属市场的交易时段已走到的时刻（时间戳）：
+    时段内为 now，午休 / 收盘后为最近一个已结束时段的收盘时刻；开盘前或非交易日为 None。"""
+    local = datetime.fromtimestamp(now, _CN_TZ)
+    midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    minute = (now - midnight.timestamp()) / 60
+    reached = None
+    for start, end in calendar.sessions(market_of(code), code, local.date()):
+        if minute >= start:
+            reached = max(reached or 0, min(minute, end))
+    return None if reached is None else midnight.timestamp() + reached * 60
+
+
+def parse_trends(code: str, trends: list) -> tuple[str, list]:
+    """trends 行 -> (交易日 "YYYY-MM-DD", [(时间戳, 收盘价, 累计成交量, 累计成交额), ...])。
+    分钟量 / 额累加为当日累计值，与实时行情的 deals_vol / deals_amt 口径一致（A股量由手换算为股）。"""
+    lot = 100 if market_of(code) in ("sh", "sz", "bj") else 1
+    date, points, vol, amt = "", [], 0.0, 0.0
+    for row in trends:
+        parts = str(row).split(",")
+        if len(parts) < 7:
+            continue
+        try:
+            stamp = datetime.strptime(parts[0], "%Y-%m-%d %H:%M").replace(tzinfo=_CN_TZ)
+            price = float(parts[2])
+            vol += float(parts[5] or 0) * lot
+            amt += float(parts[6] or 0)
+        except ValueError:
+            continue
+        date = parts[0][:10]
+        points.append((stamp.timestamp(), price, vol, amt))
+    return date, points
+
+
+def request_trends(code: str, client: HttpClient | None = None) -> tuple[str, list]:
+    """东财当日分时（单个代码），返回 parse_trends() 的结果；请求失败抛出异常。"""
+    params = {
+        "secid": _em_secid(code),
+        "fields1": "f1,f2,f3,f4,f5,f6,f7,f8",
+        "fields2": "f51,f52,f53,f54,f55,f56,f57,f58",
+        "iscr": 0,
+        "ndays": 1,
+    }
+    response = (client or shared_client()).get(_EM_TRENDS_URL, params=params)
+    response.raise_for_status()
+    trends = ((response.json() or {}).get("data") or {}).get("trends") or []
+    return parse_trends(code, trends)
+
+
+class MinuteBarCache:
+    """按自然日保存的分钟线缓存：{代码: {"date": 交易日, "last": 最后一根分钟线的时间戳,
+    "bars": [[ts, price, volume, amount], ...]}}。"""
+
+    PREFIX = "minute_"
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory or os.path.join(config_paths(APP_NAME), "intraday")
+
+    def path(self, day: str) -> str:
+        return os.path.join(self.directory, f"{self.PREFIX}{day}.json")
+
+    def load(self, day: str) -> dict:
+        try:
+            with open(self.path(day), "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self, day: str, entries: dict):
+        """合并写入当天缓存（先写临时文件再替换），并删除其他日期的缓存文件。"""
+        merged = self.load(day)
+        merged.update(entries)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(day)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(merged, file, ensure_ascii=False, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+        keep = os.path.basename(path)
+        for name in os.listdir(self.directory):
+            if name.startswith(self.PREFIX) and name != keep:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+def backfill(codes: list[str], cache: MinuteBarCache, day: str | None = None,
+             fetch=request_trends, now: float | None = None, calendar: TradingCalendar | None = None) -> dict:
+    """取 codes 的当日分钟线：当天缓存里仍然新鲜的直接读盘，其余经 fetch(code) 请求，
+    交易日为 day 且非空的结果写回缓存。返回 {代码: (交易日, [(ts, price, volume, amount), ...])}；
+    请求失败或尚无当日分时（如盘前）的代码不在结果中。（阻塞调用，应在后台线程中执行。）"""
+    day = day or cn_today()
+    now = time.time() if now is None else now
+    calendar = calendar or TradingCalendar()
+    cached = cache.load(day)
+    result, fetched = {}, {}
+    for code in codes:
+        if not supports_backfill(code):
+            continue
+        entry = cached.get(code)
+        if entry is not None and entry.get("bars"):
+            reached = session_progress(code, now, calendar)
+            if reached is None or float(entry.get("last") or 0) >= reached - STALE_AFTER:
+                result[code] = (entry.get("date", ""), [tuple(p) for p in entry["bars"]])
+                continue
+        try:
+            date, points = fetch(code)
+        except Exception:
+            continue
+        if date != day or not points:
+            continue
+        result[code] = (date, points)
+        fetched[code] = {"date": date, "last": points[-1][0], "bars": [list(p) for p in points]}
+    if fetched:
+        try:
+            cache.save(day, fetched)
+        except OSError:
+            pass
+    return result
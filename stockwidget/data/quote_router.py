@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""按市场路由行情数据源：每个市场有首选源与备用源，一次刷新内并发请求、合并结果。
+
+新浪 / 东财在各市场的覆盖与延迟不同（如北交所、全球指数的东财 secid 未验证）。
+一次刷新的流程：
+1. 按 ``market_of`` 把自选分组，每组发往该市场的首选源（各源的分段请求同时在途）；
+2. 首选源未返回的代码（东财 found-flags 为 False / 新浪空串 / 分段失败）
+   在同一次刷新内改发备用源补齐；
+3. 合并为统一 schema 的 {代码: 行情}，按自选顺序排列。
+
+对冲与故障转移：首选源某一段超过其观测 p95 耗时仍未返回时，把同样的代码发往备用源，
+两者谁先成功返回用谁；连续失败的数据源自动降级（首选/备用互换），到期后再试探恢复。
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from stockwidget.core.markets import market_of
+from stockwidget.data.health import SourceHealth
+from stockwidget.data.http_client import HttpClient
+from stockwidget.data.quotes import (
+    DATA_SOURCE, ChunkFailure, QuoteBatch, gather_chunks, request_chunk, submit_chunks,
+)
+
+SOURCES = ("sina", "eastmoney")
+
+# 市场 -> (首选源, 备用源)；备用为 None 表示仅首选源可用。"" 为期货。
+ROUTES = {
+    "sh": ("sina", "eastmoney"),
+    "sz": ("sina", "eastmoney"),
+    "bj": ("sina", "eastmoney"),     # 东财北交所 secid 未验证，固定新浪优先
+    "hk": ("sina", "eastmoney"),
+    "us": ("sina", "eastmoney"),
+    "g": ("sina", None),             # 全球指数东财 secid 未验证，仅新浪
+    "": ("sina", "eastmoney"),
+}
+
+# 不随用户首选源调整顺序的市场（东财侧未验证）
+_PINNED_MARKETS = {"bj", "g"}
+
+
+def build_routes(preferred: str = DATA_SOURCE) -> dict:
+    """按用户首选源生成路由表：两源都可用的市场把首选源排在前面。"""
+    routes = {}
+    for market, (first, second) in ROUTES.items():
+        if second is not None and market not in _PINNED_MARKETS and preferred == second:
+            first, second = second, first
+        routes[market] = (first, second)
+    return routes
+
+
+def group_by_source(codes: list[str], routes: dict, slot: int = 0) -> dict:
+    """按路由表把代码分组：{数据源: [代码, ...]}（slot=0 首选 / 1 备用，组内保持原顺序）。"""
+    groups = {}
+    for c in codes:
+        source = routes.get(market_of(c), ROUTES[""])[slot]
+        if source is not None:
+            groups.setdefault(source, []).append(c)
+    return groups
+
+
+class QuoteRouter:
+    """按市场路由的多源行情抓取（由抓取线程持有），带对冲请求与自动降级。"""
+
+    def __init__(self, client: HttpClient | None = None, clock=time.monotonic):
+        self.client = client
+        self.health = {s: SourceHealth(clock) for s in SOURCES}
+        self._lock = threading.Lock()
+        self._refetched = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {"refetched": self._refetched, "hedged": self._hedged, "hedge_wins": self._hedge_wins}
+        stats["sources"] = {s: h.snapshot() for s, h in self.health.items()}
+        return stats
+
+    def routes(self, preferred: str = DATA_SOURCE) -> dict:
+        """当前生效的路由表：首选源处于降级期（且备用源正常）时两者互换。"""
+        routes = build_routes(preferred)
+        for market, (first, second) in routes.items():
+            if second is not None and self.health[first].is_demoted() and not self.health[second].is_demoted():
+                routes[market] = (second, first)
+        return routes
+
+    def fetch(self, req_codes: list[str], source: str = DATA_SOURCE, client: HttpClient | None = None,
+              sink=None) -> QuoteBatch:
+        """按路由表并发请求各市场首选源（慢分段对冲到备用源），缺失代码同一次刷新内由备用源补齐。
+        sink(code, entry) 为逐条回调（在分段线程中调用，见 quotes.request_chunk）。"""
+        client = client or self.client
+        codes = [c for c in req_codes if str(c).strip()]
+        if not codes:
+            return QuoteBatch({}, chunks=0)
+        routes = self.routes(source)
+
+        data, failures, chunks = self._fetch_hedged(group_by_source(codes, routes, 0), routes, client, sink)
+
+        missing = [c for c in codes if c not in data]
+        if missing:
+            backup = group_by_source(missing, routes, 1)
+            if backup:
+                more, failures2, n = self._fetch_groups(backup, client, sink)
+                with self._lock:
+                    self._refetched += len(more)
+                data.update(more)
+                chunks += n
+                # 备用源补齐成功的代码不再算作失败
+                failures = [f for f in failures if any(c not in data for c in f.codes)]
+                failures += failures2
+
+        ordered = {c: data[c] for c in codes if c in data}
+        return QuoteBatch(ordered, failures, chunks)
+
+    # ----- 请求与计时 -----
+    def _timed_request(self, chunk: list[str], source: str, client, sink=None) -> dict:
+        """单段请求，并把耗时/失败记入该数据源的健康度。"""
+        t0 = time.monotonic()
+        try:
+            data = request_chunk(chunk, source, client, sink)
+        except Exception:
+            self.health[source].record_failure()
+            raise
+        self.health[source].record_success(time.monotonic() - t0)
+        return data
+
+    def _submit(self, codes: list[str], source: str, client, sink=None) -> list:
+        return submit_chunks(codes, source, client, request=self._timed_request, sink=sink)
+
+    def _fetch_groups(self, groups: dict, client, sink=None) -> tuple[dict, list, int]:
+        # 先提交所有数据源的分段（同时在途），再统一收集
+        pending = []
+        for source, group in groups.items():
+            pending += self._submit(group, source, client, sink)
+        data, failures = gather_chunks(pending)
+        return data, failures, len(pending)
+
+    def _fetch_hedged(self, groups: dict, routes: dict, client, sink=None) -> tuple[dict, list, int]:
+        t0 = time.monotonic()
+        pending = []
+        for source, group in groups.items():
+            deadline = t0 + self.health[source].hedge_delay()
+            pending += [(chunk, fut, deadline) for chunk, fut in self._submit(group, source, client, sink)]
+
+        data, failures, chunks = {}, [], len(pending)
+        for chunk, fut, deadline in pending:
+            wait([fut], timeout=max(0.0, deadline - time.monotonic()))
+            hedges = []
+            if fut.running():
+                # 已发出但超过 p95 仍未返回：同样的代码发往备用源，与首选源竞速
+                # （仍在线程池排队的分段只是尚未轮到，不对冲，避免放大请求量）
+                for alt, group in self._hedge_groups(chunk, routes).items():
+                    hedges += self._submit(group, alt, client, sink)
+            if hedges:
+                with self._lock:
+                    self._hedged += 1
+                chunks += len(hedges)
+            got, lost = self._race(chunk, fut, hedges)
+            data.update(got)
+            failures += lost
+        return data, failures, chunks
+
+    def _hedge_groups(self, chunk: list[str], routes: dict) -> dict:
+        """chunk 的对冲分组 {备用源: [代码, ...]}；有代码无备用源（如全球指数）或备用源处于降级期时
+        不对冲（返回 {}）——对冲胜出时只采用对冲结果，未覆盖的代码会整轮缺失。"""
+        groups = group_by_source(chunk, routes, 1)
+        if sum(len(g) for g in groups.values()) != len(chunk):
+            return {}
+        if any(self.health[alt].is_demoted() for alt in groups):
+            return {}
+        return groups
+
+    def _race(self, chunk: list[str], fut, hedges: list) -> tuple[dict, list]:
+        """首选段 fut 与对冲段 hedges 竞速：取先成功的一方；一方失败则等另一方。"""
+        if not hedges:
+            return gather_chunks([(chunk, fut)])
+        hedge_futs = [h for _, h in hedges]
+        while True:
+            if fut.done() and fut.exception() is None:
+                return fut.result(), []
+            if all(h.done() and h.exception() is None for h in hedge_futs):
+                with self._lock:
+                    self._hedge_wins += 1
+                return gather_chunks(hedges)
+            if fut.done():
+                # 首选段已失败：以对冲结果为准
+                return gather_chunks(hedges)
+            if any(h.done() and h.exception() is not None for h in hedge_futs):
+                # 对冲段失败：退回等待首选段
+                try:
+                    return fut.result(), []
+                except Exception as e:
+                    return {}, [ChunkFailure(chunk, e)]
+            wait([fut] + [h for h in hedge_futs if not h.done()], return_when=FIRST_COMPLETED)
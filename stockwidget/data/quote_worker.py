@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""常驻行情抓取线程：替代“每次定时器触发都新建一个线程”的做法。
+
+- 少量长驻后台线程，共用进程内共享的 HttpClient（shared_client，连接池）与按市场路由的 QuoteRouter。
+- 流水线：最多 max_in_flight 个刷新请求同时在途（亚秒级刷新时上一轮未返回也能发出下一轮）；
+  每个任务按提交顺序编号，较旧任务的结果晚于较新结果到达时直接丢弃（计入 stale_dropped），
+  乱序响应不会覆盖更新的数据。
+- 刷新任务合并：在途请求已达上限时，新任务不会被丢弃，而是替换掉尚未开始的待办任务
+  （只保留最新一次），有线程空出后立即执行；被替换掉的任务计入 skipped。
+- 按交易时段请求：任务可只请求其中一部分代码（active），其余代码沿用上一轮的行情。
+- 渐进显示：任务标记 progressive（如启动后表格尚空）时，流式解析出的行按节流间隔
+  先以 partial 结果回调，首行无需等到最后一个字节到达。
+- 变化检测：报文未变的代码由解析层直接复用上次的行情对象，本线程按对象同一性
+  统计每轮未变化的行数（unchanged_rows）。
+- 行格式化：任务带有显示参数快照（display）时，结果在交付前于本线程格式化为
+  FormattedRow（见 core.row_format，未变化的行直接复用），UI 线程只需把结果应用到模型。
+- stats() 报告队列深度 / 已提交 / 已完成 / 合并跳过 / 乱序丢弃次数 / 未变化行数，
+  以及按主机的请求数 / 失败数 / 下行字节数（http），供调试查看。
+"""
+
+import threading
+import time
+
+import requests
+
+from stockwidget.core.row_format import DisplaySettings, RowFormatter
+from stockwidget.data.http_client import shared_client
+from stockwidget.data.quote_router import QuoteRouter
+from stockwidget.data.quotes import QuoteBatch, payload_cache
+
+
+class QuoteJob:
+    """一次刷新任务：要显示的统一代码列表 + 首选数据源；progressive 为是否渐进回调部分结果。
+    active 为本轮实际请求的代码（None 表示全部）；其余代码沿用上一轮的行情（如所属市场休市）。
+    display 为格式化用的显示参数快照（None 表示不格式化）；seq 为提交序号（由 QuoteWorker.submit 分配）。"""
+
+    __slots__ = ("codes", "source", "progressive", "active", "display", "seq")
+
+    def __init__(self, codes: list, source: str, progressive: bool = False, active=None,
+                 display: DisplaySettings | None = None):
+        self.codes = list(codes)
+        self.source = source
+        self.progressive = bool(progressive)
+        self.active = None if active is None else set(active)
+        self.display = display
+        self.seq = 0
+
+
+class QuoteResult:
+    """一次刷新结果：`ok` 为是否成功，`data` 为 {代码: 行情}，`error` 为错误提示
+    （ok=True 且 error 非空表示部分分段失败）；partial=True 表示本轮尚未结束的渐进结果；
+    seq 为对应任务的提交序号；rows 为按 data 顺序格式化好的 FormattedRow 元组（未格式化时为 None），
+    reformatted 为其中实际重新格式化（未复用上一轮）的行数；replay 为产生该结果的回放器（实时抓取为 None）；
+    requested 为该任务实际请求的代码（其余代码沿用上一轮行情；失败 / 部分 / 回放结果为 None）。"""
+
+    __slots__ = ("ok", "data", "error", "partial", "seq", "rows", "reformatted", "replay", "requested")
+
+    def __init__(self, ok: bool, data: dict | None = None, error: str | None = None, partial: bool = False,
+                 seq: int = 0, replay=None, requested=None):
+        self.ok = bool(ok)
+        self.data = data
+        self.error = error
+        self.partial = bool(partial)
+        self.seq = seq
+        self.replay = replay
+        self.requested = requested
+        self.rows = None
+        self.reformatted = 0
+
+    def format_with(self, formatter: RowFormatter, display: DisplaySettings | None):
+        """按 display 格式化 data（display 为 None 或结果失败时不处理）。"""
+        if display is not None and self.ok and self.data is not None:
+            self.rows, self.reformatted = formatter.format(self.data, display, self.partial)
+
+    def __repr__(self) -> str:
+        n = len(self.data) if self.data else 0
+        return f"QuoteResult(seq={self.seq}, ok={self.ok}, rows={n}, error={self.error!r}, partial={self.partial})"
+
+
+class QuoteWorker:
+    """常驻抓取线程组。on_result(QuoteResult) 在后台线程中按任务序号递增的顺序回调
+    （UI 层应经信号转回主线程）。"""
+
+    PARTIAL_INTERVAL = 0.15   # 渐进结果的最小回调间隔（秒）
+    MAX_IN_FLIGHT = 2         # 同时在途的刷新请求数上限
+
+    def __init__(self, on_result, fetch=None, max_in_flight: int = MAX_IN_FLIGHT):
+        self.client = shared_client()
+        self.router = QuoteRouter(self.client)
+        self._on_result = on_result
+        self._fetch = fetch or self.router.fetch
+        self._cond = threading.Condition()
+        self._deliver_lock = threading.Lock()   # 串行化结果回调，保证序号单调
+        self._pending: QuoteJob | None = None
+        self._busy = 0
+        self._stopped = False
+        self._seq = 0                    # 最近提交的任务序号
+        self._delivered = 0              # 最近交付的完整结果序号
+        self._submitted = 0
+        self._completed = 0
+        self._skipped = 0
+        self._stale = 0                  # 晚于更新结果到达而被丢弃的结果数
+        self._last_rows: dict = {}       # 上一轮完整结果，用于统计未变化的行
+        self._formatter = RowFormatter()  # 在 _deliver_lock 内串行使用
+        self._unchanged_rows = 0         # 最近一轮未变化（报文相同）的行数
+        self._unchanged_total = 0
+        self._threads = [threading.Thread(target=self._run, name=f"QuoteWorker-{i}", daemon=True)
+                         for i in range(max(1, int(max_in_flight)))]
+
+    def start(self):
+        for t in self._threads:
+            if not t.is_alive():
+                t.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending = None
+            self._cond.notify_all()
+
+    def submit(self, job: QuoteJob):
+        """提交刷新任务；若已有待办任务则以新任务替换（合并），计一次 skipped。"""
+        with self._cond:
+            if self._stopped:
+                return
+            if self._pending is not None:
+                self._skipped += 1
+            self._seq += 1
+            job.seq = self._seq
+            self._pending = job
+            self._submitted += 1
+            self._cond.notify()
+
+    def queue_depth(self) -> int:
+        """待处理任务数（含正在执行的）。"""
+        with self._cond:
+            return int(self._pending is not None) + self._busy
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = {
+                "queue_depth": int(self._pending is not None) + self._busy,
+                "in_flight": self._busy,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "skipped": self._skipped,
+                "stale_dropped": self._stale,
+                "unchanged_rows": self._unchanged_rows,
+                "unchanged_total": self._unchanged_total,
+            }
+        stats["router"] = self.router.stats()
+        stats["payload_cache"] = payload_cache.stats()
+        stats["http"] = self.client.stats()
+        return stats
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                job, self._pending = self._pending, None
+                self._busy += 1
+            result = self._execute(job)
+            with self._cond:
+                self._busy -= 1
+                self._completed += 1
+                if self._stopped:
+                    return
+            self._deliver(result, job.display)
+
+    def _deliver(self, result: QuoteResult, display: DisplaySettings | None = None):
+        """按序号交付结果：比已交付的完整结果更旧的直接丢弃，渐进结果在同一任务的完整结果之后
+        （对冲落败的分段仍可能继续回调）也丢弃；需要时先按任务的显示参数快照格式化。"""
+        with self._deliver_lock:
+            if result.seq < self._delivered or (result.partial and result.seq == self._delivered):
+                with self._cond:
+                    self._stale += 1
+                return
+            result.format_with(self._formatter, display)
+            if not result.partial:
+                self._delivered = result.seq
+                if result.ok:
+                    self._count_unchanged(result.data)
+            self._on_result(result)
+
+    def _execute(self, job: QuoteJob) -> QuoteResult:
+        sink = _PartialSink(job, self._deliver, self.PARTIAL_INTERVAL) if job.progressive else None
+        last = self._last_rows
+        codes = job.codes
+        if job.active is not None:
+            # 上一轮没有数据的代码照常请求，其余只请求 active
+            codes = [c for c in job.codes if c in job.active or c not in last]
+        try:
+            batch = self._fetch(codes, source=job.source, client=self.client, sink=sink) if codes \
+                else QuoteBatch({}, chunks=0)
+        except Exception as e:
+            return QuoteResult(False, error=_error_text(e), seq=job.seq)
+        if batch.failures and not batch.data:
+            return QuoteResult(False, error=_error_text(batch.failures[0].error), seq=job.seq)
+        data = batch.data
+        if len(codes) < len(job.codes):
+            requested = set(codes)
+            data = {c: data[c] if c in requested else last[c]
+                    for c in job.codes if c in data or (c not in requested and c in last)}
+        error = f"部分行情请求失败（{len(batch.failures)}/{batch.chunks} 段）" if batch.failures else None
+        return QuoteResult(True, data, error, seq=job.seq, requested=codes)
+
+    def _count_unchanged(self, data: dict):
+        # 报文未变的代码，解析层返回的是上一轮的同一个对象（在 _deliver_lock 内按序调用）
+        last = self._last_rows
+        unchanged = sum(1 for c, e in data.items() if last.get(c) is e)
+        self._last_rows = data
+        with self._cond:
+            self._unchanged_rows = unchanged
+            self._unchanged_total += unchanged
+
+
+class _PartialSink:
+    """渐进结果收集器：分段线程逐条写入，按间隔把已到达的行以 partial 结果回调。"""
+
+    def __init__(self, job: QuoteJob, on_result, interval: float):
+        self._codes = job.codes
+        self._seq = job.seq
+        self._display = job.display
+        self._on_result = on_result
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._last = time.monotonic()
+
+    def __call__(self, code: str, entry):
+        with self._lock:
+            self._rows[code] = entry
+            now = time.monotonic()
+            if now - self._last < self._interval:
+                return
+            self._last = now
+            rows = {c: self._rows[c] for c in self._codes if c in self._rows}
+        self._on_result(QuoteResult(True, rows, partial=True, seq=self._seq), self._display)
+
+
+def _error_text(error: Exception) -> str:
+    if isinstance(error, requests.exceptions.RequestException):
+        return "网络请求失败"
+    return str(error)
@@ -1,52 +1,125 @@
-import requests
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import threading
+from typing import Iterator, Tuple
 
 from stockwidget.core.markets import market_of
+from stockwidget.data.http_client import HttpClient, shared_client
 
 # =====================================================================
-# 统一行情字典 schema（新浪 / 东财 两套数据源返回格式一致）：
-#   data[code] = {
-#       "name": str,  "opening_price": float, "prev_close": float,
-#       "current_price": float, "high_price": float, "low_price": float,
-#       "deals_vol": int, "deals_amt": float,
-#       "purchaser_vol": [买1~买5 量], "purchaser_price": [买1~买5 价],
-#       "seller_vol": [卖1~卖5 量], "seller_price": [卖1~卖5 价],
-#       "date": str, "time": str,
-#   }
-#   注：换手率 / 量比 是东财独有字段（新浪没有），已在 _new_entry 中预留（注释），
-#       启用东财数据源后取消注释即可填充。
+# 统一行情记录 Quote（新浪 / 东财 两套数据源返回格式一致）：
+#   name: str, opening_price / prev_close / current_price / high_price / low_price: float,
+#   deals_vol: int, deals_amt: float,
+#   purchaser_vol / purchaser_price: 买1~买5（长度固定为 5 的 tuple），
+#   seller_vol / seller_price: 卖1~卖5（同上），
+#   date: str, time: str
+#   兼容字典式访问：quote["current_price"] / quote.get("name") / "time" in quote。
+#   注：换手率 / 量比 是东财独有字段（新浪没有），已在 request_eastmoney 中预留（注释）。
 # =====================================================================
 
 # 当前启用的实时行情数据源："sina"（默认）/ "eastmoney"
 DATA_SOURCE = "sina"
 
 _SINA_HEADERS = {"Referer": "https://finance.sina.com.cn", "User-Agent": "Mozilla/5.0"}
+_SINA_QUOTE_URL = "https://hq.sinajs.cn/list="
 _EM_QUOTE_URL = "https://push2delay.eastmoney.com/api/qt/ulist.np/get"   # 东财延迟行情主机（本机代理下可达更稳）
-_Z5 = (0, 0, 0, 0, 0)   # 空五档（港美股/期货只有一档或无盘口）
+_Z5 = (0, 0, 0, 0, 0)   # 空五档（港美股/期货只有一档或无盘口），各条目共用同一对象
+
+def _text(value) -> str:
+    """字段转字符串：新浪快速解析路径传入的是原始 bytes（日期/时间为 ASCII）。"""
+    if isinstance(value, bytes):
+        return value.decode("ascii", "replace")
+    return str(value or "")
+
+
+class Quote:
+    """单个代码的一笔行情（定长 __slots__ 记录，不带 __dict__）。
+
+    五档字段为长度 5 的 tuple，无盘口的市场共用 _Z5；
+    同时提供字典式访问，沿用原 schema 的调用方无需改动。"""
+
+    __slots__ = ("name", "opening_price", "prev_close", "current_price", "high_price", "low_price",
+                 "deals_vol", "deals_amt", "purchaser_vol", "purchaser_price",
+                 "seller_vol", "seller_price", "date", "time")
+
+    def __init__(self, name, opening_price, prev_close, current_price, high_price, low_price,
+                 deals_vol, deals_amt, purchaser_vol, purchaser_price, seller_vol, seller_price,
+                 date, time):
+        self.name = name
+        self.opening_price = opening_price
+        self.prev_close = prev_close
+        self.current_price = current_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.deals_vol = deals_vol
+        self.deals_amt = deals_amt
+        self.purchaser_vol = purchaser_vol
+        self.purchaser_price = purchaser_price
+        self.seller_vol = seller_vol
+        self.seller_price = seller_price
+        self.date = date
+        self.time = time
+
+    # ----- 字典式访问 -----
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self) -> tuple:
+        return self.__slots__
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Quote):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Quote({self.name!r}, current={self.current_price}, time={self.time!r})"
+
+
+def _depth(values) -> tuple:
+    """五档字段：已是 tuple（如 _Z5）直接复用，否则转为 tuple。"""
+    return values if type(values) is tuple else tuple(values)
+
 
 def _new_entry(name, opening, prev_close, current, high, low,
                vol, amt, pur_vol, pur_price, sell_vol, sell_price,
-               date, time) -> dict:
-    """按统一 schema 构造行情条目。"""
-    return {
-        "name": str(name or ""),
-        "opening_price": float(opening or 0),
-        "prev_close": float(prev_close or 0),
-        "current_price": float(current or 0),
-        "high_price": float(high or 0),
-        "low_price": float(low or 0),
-        "deals_vol": int(vol or 0),
-        "deals_amt": float(amt or 0),
-        "purchaser_vol": list(pur_vol),
-        "purchaser_price": list(pur_price),
-        "seller_vol": list(sell_vol),
-        "seller_price": list(sell_price),
-        "date": str(date or ""),
-        "time": str(time or ""),
-        # 东财独有字段（新浪无），预留，取消注释即可启用：
-        # "turnover_rate": None,   # 换手率（%）
-        # "volume_ratio": None,    # 量比
-    }
+               date, time) -> Quote:
+    """按统一 schema 构造行情记录。数值字段可直接传 bytes（float/int 均接受）。"""
+    return Quote(
+        _text(name),
+        float(opening or 0),
+        float(prev_close or 0),
+        float(current or 0),
+        float(high or 0),
+        float(low or 0),
+        int(vol or 0),
+        float(amt or 0),
+        _depth(pur_vol),
+        _depth(pur_price),
+        _depth(sell_vol),
+        _depth(sell_price),
+        _text(date),
+        _text(time),
+    )
 
 
 # ---------------- 统一代码 <-> 数据源代码转换 ----------------
@@ -122,7 +195,7 @@ def _is_index_sina(sname: str) -> bool:
     return False
 
 
-def _parse_sina_a(parts: list, is_index: bool = False) -> dict:
+def _parse_sina_a(parts: list, is_index: bool = False) -> Quote:
     """A股: 0名称 1今开 2昨收 3最新 4最高 5最低 6买一 7卖一 8量 9额
     10~29 五档(量,价...) 30日期 31时间；指数无五档且量单位为手(×100转股)。"""
     if is_index:
@@ -140,16 +213,16 @@ def _parse_sina_a(parts: list, is_index: bool = False) -> dict:
         opening=parts[1], prev_close=parts[2], current=parts[3],
         high=parts[4], low=parts[5],
         vol=parts[8], amt=parts[9],
-        pur_vol=[int(x or 0) for x in parts[10:20:2]],
-        pur_price=[float(x or 0) for x in parts[11:20:2]],
-        sell_vol=[int(x or 0) for x in parts[20:30:2]],
-        sell_price=[float(x or 0) for x in parts[21:30:2]],
+        pur_vol=tuple([int(x or 0) for x in parts[10:20:2]]),
+        pur_price=tuple([float(x or 0) for x in parts[11:20:2]]),
+        sell_vol=tuple([int(x or 0) for x in parts[20:30:2]]),
+        sell_price=tuple([float(x or 0) for x in parts[21:30:2]]),
         date=parts[30] if len(parts) > 30 else "",
         time=parts[31] if len(parts) > 31 else "",
     )
 
 
-def _parse_sina_hk(parts: list, is_index: bool = False) -> dict:
+def _parse_sina_hk(parts: list, is_index: bool = False) -> Quote:
     """港股: 0英文名 1中文名 2今开 3昨收 4最高 5最低 6最新
     7涨跌额 8涨跌幅 9买一价 10卖一价 11成交额 12成交量 ... 17日期 18时间
     港股指数无盘口、量单位为手(×100)、额为千元(×1000)。"""
@@ -169,17 +242,17 @@ def _parse_sina_hk(parts: list, is_index: bool = False) -> dict:
         opening=parts[2], prev_close=parts[3], current=parts[6],
         high=parts[4], low=parts[5],
         vol=parts[12], amt=parts[11],
-        pur_vol=_Z5, pur_price=[float(parts[9] or 0), 0, 0, 0, 0],
-        sell_vol=_Z5, sell_price=[float(parts[10] or 0), 0, 0, 0, 0],
+        pur_vol=_Z5, pur_price=(float(parts[9] or 0), 0, 0, 0, 0),
+        sell_vol=_Z5, sell_price=(float(parts[10] or 0), 0, 0, 0, 0),
         date=parts[17] if len(parts) > 17 else "",
         time=parts[18] if len(parts) > 18 else "",
     )
 
 
-def _parse_sina_us(parts: list, is_index: bool = False) -> dict:
+def _parse_sina_us(parts: list, is_index: bool = False) -> Quote:
     """美股: 0名称 1最新 2涨跌幅 3时间 4涨跌额 5今开 6最高 7最低
     10成交量 ... 26昨收 ... 30成交额；美股指数量单位为手(×100)、无成交额。"""
-    t = (parts[3].split() + ["", ""])[:2] if len(parts) > 3 else ["", ""]
+    t = (_text(parts[3]).split() + ["", ""])[:2] if len(parts) > 3 else ["", ""]
     if is_index:
         return _new_entry(
             name=parts[0],
@@ -201,11 +274,11 @@ def _parse_sina_us(parts: list, is_index: bool = False) -> dict:
     )
 
 
-def _parse_sina_futures(parts: list) -> dict:
+def _parse_sina_futures(parts: list) -> Quote:
     """上期所期货: 0名称 1时间(HHMMSS) 2今开 3最高 4最低 5买价 6卖价
     7最新 8结算价 9昨收(主连为0) 10昨结算 11买量 12卖量 13持仓量
     14成交量 15交易所 16品种 17日期 ... 27均价"""
-    tt = str(parts[1] or "")
+    tt = _text(parts[1])
     time_str = f"{tt[0:2]}:{tt[2:4]}:{tt[4:6]}" if len(tt) >= 6 else ""
     return _new_entry(
         name=parts[0],
@@ -213,14 +286,14 @@ def _parse_sina_futures(parts: list) -> dict:
         current=parts[7], high=parts[3], low=parts[4],
         vol=parts[14] if len(parts) > 14 else 0,
         amt=0,   # 新浪期货响应不含成交额
-        pur_vol=_Z5, pur_price=[float(parts[5] or 0), 0, 0, 0, 0],
-        sell_vol=_Z5, sell_price=[float(parts[6] or 0), 0, 0, 0, 0],
+        pur_vol=_Z5, pur_price=(float(parts[5] or 0), 0, 0, 0, 0),
+        sell_vol=_Z5, sell_price=(float(parts[6] or 0), 0, 0, 0, 0),
         date=parts[17] if len(parts) > 17 else "",
         time=time_str,
     )
 
 
-def _parse_sina_global(parts: list) -> dict:
+def _parse_sina_global(parts: list) -> Quote:
     """全球指数(b_): 0名称 1最新 2涨跌额 3涨跌幅 5北京时间 6日期 8今开 9昨收 10最高 11最低"""
     return _new_entry(
         name=parts[0],
@@ -233,47 +306,174 @@ def _parse_sina_global(parts: list) -> dict:
     )
 
 
-def request_sina(req_codes: list[str]) -> dict:
-    """新浪财经实时行情（A股/港股/美股/上期所期货）。返回 {统一代码: 行情 dict}。"""
+# 新浪 key 前缀 -> (解析函数, 名称字段下标, 是否区分指数)。先按 3 字节前缀查，再按 2 字节查。
+_SINA_DISPATCH = {
+    b"rt_": (_parse_sina_hk, 1, True),         # 港股股票 + 港股指数
+    b"gb_": (_parse_sina_us, 0, True),         # 美股 + 美股指数
+    b"nf_": (_parse_sina_futures, 0, False),
+    b"b_": (_parse_sina_global, 0, False),     # 全球指数(日经/KOSPI/DAX等)
+    b"sh": (_parse_sina_a, 0, True),
+    b"sz": (_parse_sina_a, 0, True),
+    b"bj": (_parse_sina_a, 0, True),
+}
+
+
+# 新浪 key（bytes）-> (统一代码, 解析函数(已绑定 is_index), 名称字段下标)。
+# 自选代码每次刷新都相同，缓存后每行只需一次字典查找，免去 key 解码与前缀判断。
+_sina_key_cache: dict[bytes, tuple] = {}
+_SINA_KEY_CACHE_MAX = 20000
+
+
+def _sina_key_info(skey: bytes):
+    info = _sina_key_cache.get(skey)
+    if info is None:
+        spec = _SINA_DISPATCH.get(skey[:3]) or _SINA_DISPATCH.get(skey[:2])
+        if spec is None:
+            return None
+        parser, name_idx, has_index = spec
+        sname = skey.decode("ascii", "replace")
+        if has_index:
+            parser = partial(parser, is_index=_is_index_sina(sname))
+        info = (_canonical_from_sina(sname), parser, name_idx)
+        if len(_sina_key_cache) >= _SINA_KEY_CACHE_MAX:
+            _sina_key_cache.clear()
+        _sina_key_cache[skey] = info
+    return info
+
+
+# ---------------- 原始报文变化检测 ----------------
+# 收盘后、冷门标的的报文在相邻两次刷新间常常逐字节相同：按代码记住上次报文指纹与解析结果，
+# 报文未变时直接返回上次的行情对象（同一个对象），跳过解析。
+# 下游据此用对象同一性（``is``）判断该行是否变化，格式化 / 表格更新也可一并跳过。
+
+class PayloadCache:
+    """{key: (报文指纹, 行情)} 缓存（线程安全：分段线程并发读写）。"""
+
+    def __init__(self, max_size: int = 20000):
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: dict = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key, fingerprint):
+        """报文指纹与上次相同则返回上次的行情对象，否则返回 None。"""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == fingerprint:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            return None
+
+    def store(self, key, fingerprint, entry):
+        with self._lock:
+            if len(self._entries) >= self._max_size and key not in self._entries:
+                self._entries.clear()
+            self._entries[key] = (fingerprint, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# 进程内共享的报文缓存（新浪按返回 key，东财按 "em:" + 统一代码）
+payload_cache = PayloadCache()
+
+
+def parse_sina_line(line: bytes, cache: PayloadCache | None = payload_cache):
+    """解析一行 ``var hq_str_<key>="f0,f1,...";``（原始 bytes），返回 (统一代码, Quote)；
+    无效行 / 空数据（代码不存在）返回 None。
+
+    只对名称字段做 GBK 解码；数值字段直接以 bytes 交给 float()/int()，
+    schema 未用到的字段（涨跌额、结算价等）不做任何转换。schema 内的数值（含五档）仍在此处
+    转换而非读取时转换：指标计算每轮都会读取每行五档，延迟转换只会把开销挪到 GUI 线程
+    （收益上限见 benchmarks/bench_sina_parse.py）。
+    cache 非空时，报文与上次完全相同则直接返回上次的行情对象（不再解析）。"""
+    i = line.find(b"hq_str_")
+    if i < 0:
+        return None
+    j = line.find(b'="', i)
+    k = line.rfind(b'"')
+    if j < 0 or k <= j + 1:
+        return None
+    skey = line[i + 7:j].strip()
+    info = _sina_key_info(skey)
+    if info is None:
+        return None
+    code, parser, name_idx = info
+    body = line[j + 2:k]
+    if cache is not None:
+        fingerprint = hash(body)
+        entry = cache.lookup(skey, fingerprint)
+        if entry is not None:
+            return code, entry
+    parts = body.split(b",")
+    if len(parts) < 3:
+        return None
+    parts[name_idx] = parts[name_idx].decode("gbk", "replace")
+    entry = parser(parts)
+    if cache is not None:
+        cache.store(skey, fingerprint, entry)
+    return code, entry
+
+
+def parse_sina(raw: bytes, cache: PayloadCache | None = payload_cache) -> dict:
+    """解析新浪整段响应（原始 bytes），返回 {统一代码: Quote}。"""
     data = {}
+    for line in raw.split(b"\n"):
+        parsed = parse_sina_line(line, cache)
+        if parsed is not None:
+            data[parsed[0]] = parsed[1]
+    return data
+
+
+_SINA_STREAM_CHUNK = 16 * 1024   # 流式读取块大小（字节）
+
+
+def iter_sina(req_codes: list[str], client: HttpClient | None = None) -> Iterator[tuple[str, dict]]:
+    """流式请求新浪行情：边接收边解析，每收到一行完整的 ``var hq_str_...;`` 即产出 (统一代码, 行情)。
+    大自选下首行可在响应结束前就交给调用方，且无需缓存整段响应体。"""
     if not req_codes:
-        return {}
+        return
     label = ",".join(_sina_code(c) for c in req_codes if str(c).strip())
-    url = "https://hq.sinajs.cn/list=" + label
-    response = requests.get(url, headers=_SINA_HEADERS, timeout=3)
-    response.encoding = "gbk"
-    for line in response.text.split("\n"):
-        if not line or '"' not in line:
-            continue
-        key = line.split('="')[0]
-        body = line.split('="')[1]
-        if '"' not in body:
-            continue
-        parts = body.split(",")
-        if len(parts) < 3 or "hq_str_" not in key:
-            continue
-        sname = key.split("hq_str_", 1)[1].strip()
-        if sname.startswith("rt_"):
-            entry = _parse_sina_hk(parts, is_index=_is_index_sina(sname))      # 港股股票 + 港股指数
-        elif sname.startswith("gb_"):
-            entry = _parse_sina_us(parts, is_index=_is_index_sina(sname))      # 美股 + 美股指数
-        elif sname.startswith("nf_"):
-            entry = _parse_sina_futures(parts)
-        elif sname.startswith("b_"):
-            entry = _parse_sina_global(parts)  # 全球指数(日经/KOSPI/DAX等)
-        elif sname.startswith(("sh", "sz", "bj")):
-            entry = _parse_sina_a(parts, is_index=_is_index_sina(sname))
-        else:
-            continue
-        data[_canonical_from_sina(sname)] = entry
+    url = _SINA_QUOTE_URL + label
+    response = (client or shared_client()).get(url, headers=_SINA_HEADERS, stream=True)
+    with response:
+        tail = b""
+        for block in response.iter_content(_SINA_STREAM_CHUNK):
+            lines = (tail + block).split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                parsed = parse_sina_line(line)
+                if parsed is not None:
+                    yield parsed
+        if tail:
+            parsed = parse_sina_line(tail)
+            if parsed is not None:
+                yield parsed
+
+
+def request_sina(req_codes: list[str], client: HttpClient | None = None, sink=None) -> dict:
+    """新浪财经实时行情（A股/港股/美股/上期所期货）。返回 {统一代码: Quote}。
+    sink(code, entry) 若给出，则每解析完一个代码就回调一次（流式，早于整段响应结束）。"""
+    data = {}
+    for code, entry in iter_sina(req_codes, client):
+        data[code] = entry
+        if sink is not None:
+            sink(code, entry)
     return data
 
 
 # ---------------- 东财解析 ----------------
 
-def request_eastmoney(req_codes: list[str]) -> Tuple[list, dict]:
+def request_eastmoney(req_codes: list[str], client: HttpClient | None = None) -> Tuple[list, dict]:
     """东方财富实时行情（A股/港股/美股/上期所期货），字段与新浪统一。
-    东财独有字段（换手率 f8 / 量比 f10）已随请求拉取，字典中预留（注释）。"""
+    东财独有字段（换手率 f8 / 量比 f10）已随请求拉取，填充代码预留（注释）。"""
     data = {}
     if not req_codes:
         return [], {}
@@ -284,13 +484,18 @@ def request_eastmoney(req_codes: list[str]) -> Tuple[list, dict]:
         "fltt": 2,
         "invt": 2,
     }
-    response = requests.get(_EM_QUOTE_URL, params=params, timeout=3)
+    response = (client or shared_client()).get(_EM_QUOTE_URL, params=params)
     diff = ((response.json() or {}).get("data") or {}).get("diff") or []
     raw_to_code = {s.split(".", 1)[1]: c for c, s in zip(req_codes, secids)}
     for d in diff:
         code = raw_to_code.get(d.get("f12"))
         if code is None:
             continue
+        key, fingerprint = "em:" + code, hash(tuple(d.items()))
+        entry = payload_cache.lookup(key, fingerprint)
+        if entry is not None:
+            data[code] = entry
+            continue
         vol = d.get("f5") or 0
         if market_of(code) in ("sh", "sz", "bj"):
             vol = vol * 100   # 东财 A股 f5 单位是“手”，新浪为“股”，统一为股
@@ -302,17 +507,144 @@ def request_eastmoney(req_codes: list[str]) -> Tuple[list, dict]:
             pur_vol=_Z5, pur_price=_Z5, sell_vol=_Z5, sell_price=_Z5,
             date="", time="",
         )
-        # 东财独有字段（新浪无），预留，取消注释即可填充：
-        # entry["turnover_rate"] = d.get("f8")   # 换手率（%）
-        # entry["volume_ratio"] = d.get("f10")   # 量比
+        # 东财独有字段（新浪无），预留：在 Quote.__slots__ 中加入字段后取消注释即可填充：
+        # entry.turnover_rate = d.get("f8")   # 换手率（%）
+        # entry.volume_ratio = d.get("f10")   # 量比
+        payload_cache.store(key, fingerprint, entry)
         data[code] = entry
     return [c in data for c in req_codes], data
 
 
-def request_quote(req_codes: list[str], source: str = DATA_SOURCE) -> dict:
-    """统一行情入口，返回 {统一代码: 行情 dict}。默认使用 DATA_SOURCE（当前为新浪）。"""
+# ---------------- 分段并发请求 ----------------
+# 自选较多时一次请求会超出 URL 长度限制，且单个慢响应拖住整表：
+# 按代码数 / URL 长度把自选拆成多段，经有界线程池并发请求后合并为 {代码: 行情}。
+
+_SINA_MAX_CODES = 150      # 新浪单次请求代码数上限
+_EM_MAX_CODES = 100        # 东财单次请求 secid 数上限
+_MAX_URL_LEN = 4000        # 单次请求 URL 长度上限（字符）
+_MAX_PARALLEL = 6          # 同时在途的分段请求数
+_EM_PARAMS_LEN = 120       # 东财除 secids 外其余查询参数的大致长度
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def chunk_pool() -> ThreadPoolExecutor:
+    """分段请求共用的有界线程池（首次使用时创建，常驻复用）。"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=_MAX_PARALLEL, thread_name_prefix="quote-chunk")
+    return _pool
+
+
+def split_chunks(codes: list[str], token, base_len: int,
+                 max_codes: int, max_len: int = _MAX_URL_LEN) -> list[list[str]]:
+    """按代码数与 URL 长度拆分代码列表。token(code) 为该代码在 URL 中的写法，以逗号分隔。"""
+    chunks, cur, cur_len = [], [], base_len
+    for c in codes:
+        n = len(token(c)) + 1
+        if cur and (len(cur) >= max_codes or cur_len + n > max_len):
+            chunks.append(cur)
+            cur, cur_len = [], base_len
+        cur.append(c)
+        cur_len += n
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+def _source_chunks(codes: list[str], source: str) -> list[list[str]]:
+    if source == "eastmoney":
+        return split_chunks(codes, _em_secid, len(_EM_QUOTE_URL) + _EM_PARAMS_LEN, _EM_MAX_CODES)
+    return split_chunks(codes, _sina_code, len(_SINA_QUOTE_URL), _SINA_MAX_CODES)
+
+
+def request_chunk(codes: list[str], source: str, client: HttpClient | None, sink=None) -> dict:
+    """按数据源请求一段代码（单次 HTTP 请求），返回 {统一代码: 行情}。
+    sink(code, entry) 为逐条回调（新浪为流式逐行，东财在响应解析后逐条）。"""
     if source == "eastmoney":
-        _, data = request_eastmoney(req_codes)
+        _, data = request_eastmoney(codes, client=client)
+        if sink is not None:
+            for code, entry in data.items():
+                sink(code, entry)
         return data
-    return request_sina(req_codes)
+    return request_sina(codes, client=client, sink=sink)
+
+
+class ChunkFailure:
+    """单段请求失败：`codes` 为该段代码，`error` 为异常对象。"""
+
+    __slots__ = ("codes", "error")
+
+    def __init__(self, codes: list[str], error: Exception):
+        self.codes = codes
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"ChunkFailure(codes={len(self.codes)}, error={self.error!r})"
+
+
+class QuoteBatch:
+    """一次（可能分段的）行情请求结果：`data` 为合并后的 {代码: 行情}，
+    `failures` 为失败分段列表，`chunks` 为总分段数。"""
+
+    __slots__ = ("data", "failures", "chunks")
+
+    def __init__(self, data: dict, failures: list | None = None, chunks: int = 1):
+        self.data = data
+        self.failures = failures or []
+        self.chunks = chunks
+
+    def __repr__(self) -> str:
+        return f"QuoteBatch(rows={len(self.data)}, failures={len(self.failures)}/{self.chunks})"
+
+
+def submit_chunks(codes: list[str], source: str, client: HttpClient | None = None,
+                  request=request_chunk, sink=None) -> list:
+    """把代码按数据源拆段后提交到分段线程池，返回 [(分段代码, Future), ...]（不等待结果）。
+    request(chunk, source, client, sink) 为单段请求函数，默认 request_chunk。"""
+    pool = chunk_pool()
+    return [(chunk, pool.submit(request, chunk, source, client, sink))
+            for chunk in _source_chunks(codes, source)]
+
+
+def gather_chunks(pending: list) -> tuple[dict, list]:
+    """等待 submit_chunks 提交的分段完成，返回 (合并数据, 失败分段列表)。"""
+    data, failures = {}, []
+    for chunk, fut in pending:
+        try:
+            data.update(fut.result())
+        except Exception as e:
+            failures.append(ChunkFailure(chunk, e))
+    return data, failures
+
+
+def fetch_quotes(req_codes: list[str], source: str = DATA_SOURCE,
+                 client: HttpClient | None = None) -> QuoteBatch:
+    """分段并发请求行情并合并；单段失败记入 failures，不影响其余分段。"""
+    codes = [c for c in req_codes if str(c).strip()]
+    if not codes:
+        return QuoteBatch({}, chunks=0)
+    chunks = _source_chunks(codes, source)
+    if len(chunks) == 1:
+        try:
+            return QuoteBatch(request_chunk(chunks[0], source, client))
+        except Exception as e:
+            return QuoteBatch({}, [ChunkFailure(chunks[0], e)])
+
+    pending = submit_chunks(codes, source, client)
+    data, failures = gather_chunks(pending)
+    # 按请求顺序重排，保持与自选列表一致的显示顺序
+    ordered = {c: data[c] for c in codes if c in data}
+    return QuoteBatch(ordered, failures, len(pending))
+
 
+def request_quote(req_codes: list[str], source: str = DATA_SOURCE, client: HttpClient | None = None) -> dict:
+    """统一行情入口，返回 {统一代码: Quote}。默认使用 DATA_SOURCE（当前为新浪）。
+    全部分段都失败时抛出第一段的异常；部分失败时返回成功部分。"""
+    batch = fetch_quotes(req_codes, source, client=client)
+    if batch.failures and not batch.data:
+        raise batch.failures[0].error
+    return batch.data
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""行情回放：把逐笔日志（见 tick_log）按录制时的节奏重新喂给浮窗。
+
+- 轮次：录制时同一次 record() 的记录共用一个接收时间，回放按接收时间把记录还原为一轮轮结果；
+  每轮交付的是截至该轮所有代码的最新行情（与实时刷新一样是整表），
+  本轮未变化的代码沿用上一轮的同一个行情对象，下游按对象同一性跳过未变行的逻辑照常生效；
+- 速度：speed 为 1 / 10 / 100 倍速按录制间隔的 1/speed 等待，speed=0 为最快（不等待）；
+- 背压：每交付一轮先等 UI 调用 ack() 表示处理完毕，再交付下一轮，Qt 事件队列不会堆积；
+- 结果经 on_result(QuoteResult) 在回放线程中回调，与 QuoteWorker 相同（UI 层经信号转回主线程）；
+  交付的结果带 replay=回放器本身，UI 据此区分实时结果与回放结果（含已停止的回放器残留在队列中的结果）；
+  current / ts 为最近交付的结果及其录制时的接收时间；
+- 格式化：给出 display（返回主线程生成好的显示参数快照）时，结果在回放线程中格式化后再交付，
+  与实时抓取一致。
+"""
+
+import threading
+import time
+
+from stockwidget.core.row_format import RowFormatter
+from stockwidget.data.quote_worker import QuoteResult
+from stockwidget.data.tick_log import TickLog
+
+SPEEDS = (1, 10, 100, 0)   # 0 为最快
+
+
+def iter_rounds(log: TickLog):
+    """按接收时间分组：产出 (接收时间, {代码: 行情})，只含该轮录制到的（变化的）代码。"""
+    ts, changed = None, {}
+    for t, code, quote in log:
+        if t != ts and changed:
+            yield ts, changed
+            changed = {}
+        ts = t
+        changed[code] = quote
+    if changed:
+        yield ts, changed
+
+
+class ReplayPlayer:
+    """回放线程。on_result(QuoteResult) 在回放线程中回调；UI 处理完每轮后应调用 ack()。"""
+
+    ACK_TIMEOUT = 5.0   # UI 迟迟不 ack（如窗口隐藏）时的最长等待（秒）
+
+    def __init__(self, path: str, on_result, speed: float = 1, on_finished=None, display=None,
+                 sleep=time.sleep):
+        self.path = path
+        self.speed = max(0.0, float(speed))
+        self._on_result = on_result
+        self._on_finished = on_finished
+        self._display = display
+        self._formatter = RowFormatter()
+        self._sleep = sleep
+        self._acked = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.rounds = 0
+        self.records = 0
+        self.finished = False
+        self.current = None         # 最近交付的 QuoteResult
+        self.ts = None              # current 录制时的接收时间
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ReplayPlayer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._acked.set()
+
+    def ack(self):
+        """UI 已处理完上一轮结果。"""
+        self._acked.set()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        try:
+            log = TickLog(self.path)
+        except (OSError, ValueError) as e:
+            self.finished = True
+            self._emit(QuoteResult(False, error=f"无法打开回放文件：{e}"))
+            return
+        try:
+            self._play(log)
+        finally:
+            log.close()
+            self.finished = True
+        if self._on_finished is not None and not self._stopped.is_set():
+            self._on_finished()
+
+    def _emit(self, result: QuoteResult):
+        if self._display is not None:
+            result.format_with(self._formatter, self._display())
+        self._acked.clear()
+        self.current = result
+        self._on_result(result)
+        self._acked.wait(self.ACK_TIMEOUT)
+
+    def _play(self, log: TickLog):
+        state, prev_ts = {}, None
+        for ts, changed in iter_rounds(log):
+            if self._stopped.is_set():
+                return
+            if prev_ts is not None and self.speed > 0:
+                delay = (ts - prev_ts) / self.speed
+                if delay > 0:
+                    self._sleep(delay)
+            prev_ts = ts
+            state.update(changed)
+            self.rounds += 1
+            self.records += len(changed)
+            self.ts = ts
+            self._emit(QuoteResult(True, dict(state), seq=self.rounds, replay=self))
+
+    def stats(self) -> dict:
+        return {"path": self.path, "speed": self.speed, "rounds": self.rounds,
+                "records": self.records, "finished": self.finished}
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""逐笔行情记录：按日追加写入定长二进制记录，可直接 mmap 读取。
+
+每个自然日（北京时间）两份文件，位于配置目录下 ticks/：
+
+- ``YYYY-MM-DD.ticks``：定长记录（RECORD.size 字节，小端），字段与 Quote 一一对应，
+  另加本地接收时间；名称 / 代码 / 日期以字符串表序号存储，时间存为当天秒数；
+- ``YYYY-MM-DD.names``：字符串表，每行一个（UTF-8），行号即序号，只追加。
+
+写入：record() 只把 (接收时间, 代码, 行情) 放进队列，打包与写盘在后台线程完成；
+同一个行情对象（报文未变）不重复记录。fsync 按 FSYNC_INTERVAL 批量进行，崩溃时最多丢失
+最近一个间隔内的记录；读取方按整条记录截断，不会读到半条。
+"""
+
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+from stockwidget.constants import APP_NAME
+from stockwidget.core.config_store import config_paths
+from stockwidget.core.phase_lock import seconds_of_day
+from stockwidget.data.quotes import Quote
+
+# 接收时间, 代码, 名称, 日期, 时间(当天秒数, -1 为空), 今开/昨收/现价/最高/最低, 成交量, 成交额,
+# 买1~5量, 买1~5价, 卖1~5量, 卖1~5价
+RECORD = struct.Struct("<dIIIi5dqd5I5d5I5d")
+_CN_OFFSET = 8 * 3600
+# 打包单条记录时可能抛出的数据错误（与写盘的 OSError 分开处理）
+_BAD_RECORD = (struct.error, ValueError, TypeError, KeyError, OverflowError)
+
+
+def log_day(ts: float) -> str:
+    """时间戳所在的北京时间日期（日志按此分文件）。"""
+    return time.strftime("%Y-%m-%d", time.gmtime(ts + _CN_OFFSET))
+
+
+def _time_text(sod: int) -> str:
+    if sod < 0:
+        return ""
+    return f"{sod // 3600:02d}:{sod // 60 % 60:02d}:{sod % 60:02d}"
+
+
+class _DayFiles:
+    """某一天的记录文件与字符串表（仅后台写线程使用）。"""
+
+    def __init__(self, directory: str, day: str):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, day)
+        self.names_file = open(base + ".names", "a+", encoding="utf-8", newline="\n")
+        self.names_file.seek(0)
+        lines = self.names_file.read().split("\n")
+        if lines[-1]:
+            self.names_file.write("\n")       # 上次异常退出留下的半行：补换行（该序号不会被引用）
+        self.ids = {}
+        for i, line in enumerate(lines[:-1] + ([lines[-1]] if lines[-1] else [])):
+            self.ids.setdefault(line, i)
+        self.next_id = len(lines) - 1 + (1 if lines[-1] else 0)
+        self.names_dirty = False
+        self.ticks = open(base + ".ticks", "ab")
+        # 上次异常退出可能留下半条记录：截掉，保证记录对齐
+        size = self.ticks.tell()
+        if size % RECORD.size:
+            self.ticks.truncate(size - size % RECORD.size)
+            self.ticks.seek(0, os.SEEK_END)
+
+    def intern(self, text: str) -> int:
+        i = self.ids.get(text)
+        if i is None:
+            i = self.ids[text] = self.next_id
+            self.next_id += 1
+            self.names_file.write(text.replace("\n", " ") + "\n")
+            self.names_dirty = True
+        return i
+
+    def flush(self, sync: bool):
+        self.names_file.flush()      # 字符串表先落盘，记录引用的序号总能解析
+        self.ticks.flush()
+        if sync:
+            os.fsync(self.names_file.fileno())
+            os.fsync(self.ticks.fileno())
+
+    def close(self):
+        self.flush(True)
+        self.names_file.close()
+        self.ticks.close()
+
+
+class TickRecorder:
+    """后台写盘的逐笔记录器。record() 在主线程调用，开销只有一次入队。"""
+
+    FSYNC_INTERVAL = 2.0    # 批量 fsync 的间隔（秒）
+    BATCH = 4096            # 单次最多打包的记录数
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory or os.path.join(config_paths(APP_NAME), "ticks")
+        self._queue: queue.Queue = queue.Queue()
+        self._last: dict = {}          # 代码 -> 最近记录的行情对象
+        self._lock = threading.Lock()
+        self._records = 0
+        self._bytes = 0
+        self._fsyncs = 0
+        self._errors = 0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="TickRecorder", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """写完队列中剩余的记录、fsync 后退出。"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def record(self, data: dict, now: float | None = None) -> int:
+        """登记一轮结果 {代码: 行情}；返回入队的条数（与上次同一对象的代码不记录）。"""
+        now = time.time() if now is None else now
+        last = self._last
+        items = [(code, entry) for code, entry in data.items() if last.get(code) is not entry]
+        if not items:
+            return 0
+        for code, entry in items:
+            last[code] = entry
+        self._queue.put((now, items))
+        return len(items)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"records": self._records, "bytes": self._bytes, "fsyncs": self._fsyncs,
+                    "errors": self._errors, "queued": self._queue.qsize()}
+
+    def _run(self):
+        files, day, last_sync, dirty = None, None, time.monotonic(), False
+        while True:
+            try:
+                item = self._queue.get(timeout=self.FSYNC_INTERVAL)
+            except queue.Empty:
+                item = ()
+            batch = [item] if item else []
+            stop = item is None
+            while not stop and len(batch) < self.BATCH:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                else:
+                    batch.append(nxt)
+            try:
+                for now, items in batch:
+                    d = log_day(now)
+                    if d != day:
+                        if files is not None:
+                            files.close()
+                        files, day = _DayFiles(self.directory, d), d
+                    packed = []
+                    for code, entry in items:
+                        try:
+                            packed.append(self._pack(files, now, code, entry))
+                        except _BAD_RECORD:
+                            # 单条行情字段异常（缺字段 / 负数成交量 / NaN 转整数等）：跳过该条并计数
+                            with self._lock:
+                                self._errors += 1
+                    buf = b"".join(packed)
+                    if files.names_dirty:
+                        files.names_file.flush()    # 新字符串先于引用它的记录写出
+                        files.names_dirty = False
+                    files.ticks.write(buf)
+                    dirty = True
+                    with self._lock:
+                        self._records += len(packed)
+                        self._bytes += len(buf)
+                t = time.monotonic()
+                if files is not None and dirty and (stop or t - last_sync >= self.FSYNC_INTERVAL):
+                    files.flush(True)
+                    last_sync, dirty = t, False
+                    with self._lock:
+                        self._fsyncs += 1
+            except OSError:
+                with self._lock:
+                    self._errors += 1
+            if stop:
+                if files is not None:
+                    files.close()
+                return
+
+    @staticmethod
+    def _pack(files: _DayFiles, now: float, code: str, q) -> bytes:
+        sod = seconds_of_day(q["time"])
+        return RECORD.pack(
+            now, files.intern(code), files.intern(q["name"]), files.intern(q["date"]),
+            -1 if sod is None else sod,
+            q["opening_price"], q["prev_close"], q["current_price"], q["high_price"], q["low_price"],
+            int(q["deals_vol"]), q["deals_amt"],
+            *(min(int(v), 0xFFFFFFFF) for v in q["purchaser_vol"]), *q["purchaser_price"],
+            *(min(int(v), 0xFFFFFFFF) for v in q["seller_vol"]), *q["seller_price"],
+        )
+
+
+class TickLog:
+    """一天的逐笔记录（只读 mmap）。len() 为打开时已完整写入的记录数；refresh() 重新映射以看到新追加的记录。"""
+
+    def __init__(self, path: str):
+        base = path[:-len(".ticks")] if path.endswith(".ticks") else path
+        self.path = base + ".ticks"
+        self._names_path = base + ".names"
+        self._file = open(self.path, "rb")
+        self._mm = None
+        self.names: list[str] = []
+        self.refresh()
+
+    def refresh(self):
+        with open(self._names_path, "r", encoding="utf-8", newline="\n") as file:
+            self.names = [line.rstrip("\n") for line in file]
+        size = os.fstat(self._file.fileno()).st_size
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._count = size // RECORD.size
+        if self._count:
+            self._mm = mmap.mmap(self._file.fileno(), self._count * RECORD.size, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def raw(self, i: int) -> tuple:
+        """第 i 条记录的原始字段（RECORD 解包结果）。"""
+        return RECORD.unpack_from(self._mm, i * RECORD.size)
+
+    def read(self, i: int) -> tuple:
+        """第 i 条记录 -> (接收时间, 代码, Quote)。"""
+        f = self.raw(i)
+        names = self.names
+        return f[0], names[f[1]], Quote(
+            names[f[2]], f[5], f[6], f[7], f[8], f[9], f[10], f[11],
+            f[12:17], f[17:22], f[22:27], f[27:32], names[f[3]], _time_text(f[4]))
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self.read(i)
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
@@ -1,5 +1,6 @@
 import re
-import requests
+
+from stockwidget.data.http_client import http_get
 
 GITHUB_REPO = "sbr0574/StockWidget"
 PROJECT_URL = "https://github.com/sbr0574/StockWidget"
@@ -20,9 +21,8 @@ def _version_tuple(version: str) -> tuple:
 def get_latest_release() -> dict | None:
     """获取 GitHub 最新 Release 信息；失败返回 None。"""
     try:
-        resp = requests.get(
+        resp = http_get(
             f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest",
-            timeout=5,
             headers={"User-Agent": "StockWidget"},
         )
         if resp.status_code != 200:
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""调试视图：各代码的有效刷新间隔 / 变化统计 / 分时缓冲占用，锁相状态与数据陈旧度，以及抓取线程的计数（每秒刷新）。"""
+
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import QDialog, QHeaderView, QLabel, QTableWidget, QTableWidgetItem, QVBoxLayout
+
+_COLUMNS = (
+    ("代码", "code"),
+    ("交易中", "open"),
+    ("刷新间隔(s)", "cadence"),
+    ("连续未变", "streak"),
+    ("变化次数", "changes"),
+    ("观测次数", "observations"),
+    ("波动(%)", "volatility"),
+    ("分时点数", "ticks"),
+    ("分时内存", "tick_bytes"),
+)
+
+
+def _seconds(value) -> str:
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def _phase_text(phase: dict) -> str:
+    if phase.get("locked"):
+        head = f"锁相：周期 {phase['period']}s，相位 {phase['phase']}，延迟 {_seconds(phase['lag'])}"
+    else:
+        head = "锁相：未锁定（按配置间隔刷新）"
+    return f"{head}　陈旧度 p50 {_seconds(phase.get('staleness_p50'))} / p95 {_seconds(phase.get('staleness_p95'))}"
+
+
+def _recorder_text(rec) -> str:
+    if not rec:
+        return ""
+    return f"　记录 {rec['records']} 条 / {rec['bytes'] / 1048576:.1f}M，fsync {rec['fsyncs']} 次，待写 {rec['queued']}"
+
+
+def _process_text(proc, replay) -> str:
+    if not proc or not proc["count"]:
+        return ""
+    head = ""
+    if replay:
+        speed = f"{replay['speed']:g}×" if replay["speed"] else "最快"
+        head = f"　回放 {replay['rounds']} 轮（{speed}）"
+    return f"{head}　每轮处理 p50 {proc['p50'] * 1000:.2f}ms / p95 {proc['p95'] * 1000:.2f}ms"
+
+
+def _http_text(hosts) -> str:
+    if not hosts:
+        return ""
+    return "\n" + "　".join(f"{host} 请求 {s['requests']} / 失败 {s['errors']} / {s['bytes'] / 1048576:.1f}M"
+                             for host, s in sorted(hosts.items()))
+
+
+def _cell_text(key: str, value) -> str:
+    if key == "open":
+        return "是" if value else "否"
+    if key == "cadence":
+        return f"{value:g}"
+    if key == "volatility":
+        return f"{value:.3f}"
+    if key == "tick_bytes":
+        return f"{value / 1024:.1f}K"
+    return str(value)
+
+
+class DebugDialog(QDialog):
+    """只读调试窗口；win 为 FloatLabel（提供 cadence_table() / fetch_stats()）。"""
+
+    def __init__(self, win, parent=None):
+        super().__init__(parent or win)
+        self.win = win
+        self.setWindowTitle("调试信息")
+        self.resize(640, 360)
+
+        self.summary = QLabel(self)
+        self.summary.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.table = QTableWidget(0, len(_COLUMNS), self)
+        self.table.setHorizontalHeaderLabels([title for title, _ in _COLUMNS])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.summary)
+        layout.addWidget(self.table)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000)
+        self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._timer.stop()
+
+    def refresh(self):
+        stats = self.win.fetch_stats()
+        sched = stats.get("scheduler", {})
+        self.summary.setText(
+            f"已提交 {stats['submitted']} / 已完成 {stats['completed']} / 合并跳过 {stats['skipped']}　"
+            f"未变化行 {stats['unchanged_rows']}　"
+            f"模型重置 {stats['model']['resets']} 次，增量更新 {stats['model']['cells_changed']} 格，"
+            f"重新布局 {stats['layout']['per_minute']} 次/分　"
+            f"K线缓存 {stats['kline']['size']} 张，命中 {stats['kline']['hits']} / 未命中 {stats['kline']['misses']}　"
+            f"定时 {sched.get('ticks', 0)} 次，空闲 {sched.get('idle_ticks', 0)} 次，"
+            f"略过代码 {sched.get('skipped', 0)} 个　"
+            f"分时 {stats['history']['points']} 点 / {stats['history']['bytes'] / 1024:.0f}K"
+            + _recorder_text(stats.get("recorder"))
+            + _process_text(stats.get("process"), stats.get("replay")) + "\n"
+            + _phase_text(sched.get("phase", {}))
+            + _http_text(stats.get("http")))
+
+        rows = self.win.cadence_table()
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for col, (_, key) in enumerate(_COLUMNS):
+                item = QTableWidgetItem(_cell_text(key, row[key]))
+                if col:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(r, col, item)
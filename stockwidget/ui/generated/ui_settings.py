@@ -16,9 +16,9 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
 from PySide6.QtWidgets import (QAbstractItemView, QApplication, QCheckBox, QComboBox,
-    QDialog, QFontComboBox, QGroupBox, QHeaderView,
-    QKeySequenceEdit, QLabel, QPushButton, QSizePolicy,
-    QSlider, QSpinBox, QTabWidget, QTableWidget,
+    QDialog, QDoubleSpinBox, QFontComboBox, QGroupBox,
+    QHeaderView, QKeySequenceEdit, QLabel, QPushButton,
+    QSizePolicy, QSlider, QTabWidget, QTableWidget,
     QTableWidgetItem, QWidget)
 
 class Ui_SettingDialog(object):
@@ -116,6 +116,9 @@ class Ui_SettingDialog(object):
         self.cb_kline = QCheckBox(self.gb_data)
         self.cb_kline.setObjectName(u"cb_kline")
         self.cb_kline.setGeometry(QRect(130, 55, 71, 24))
+        self.cb_spark = QCheckBox(self.gb_data)
+        self.cb_spark.setObjectName(u"cb_spark")
+        self.cb_spark.setGeometry(QRect(130, 85, 61, 24))
         self.cb_profit = QCheckBox(self.gb_data)
         self.cb_profit.setObjectName(u"cb_profit")
         self.cb_profit.setGeometry(QRect(10, 115, 61, 24))
@@ -134,11 +137,13 @@ class Ui_SettingDialog(object):
         self.label_interval = QLabel(self.gb_data_setting)
         self.label_interval.setObjectName(u"label_interval")
         self.label_interval.setGeometry(QRect(10, 55, 81, 26))
-        self.sb_interval = QSpinBox(self.gb_data_setting)
+        self.sb_interval = QDoubleSpinBox(self.gb_data_setting)
         self.sb_interval.setObjectName(u"sb_interval")
         self.sb_interval.setGeometry(QRect(100, 55, 95, 26))
-        self.sb_interval.setMinimum(1)
-        self.sb_interval.setMaximum(60)
+        self.sb_interval.setDecimals(2)
+        self.sb_interval.setMinimum(0.250000000000000)
+        self.sb_interval.setMaximum(60.000000000000000)
+        self.sb_interval.setSingleStep(0.250000000000000)
         self.gb_name = QGroupBox(self.data)
         self.gb_name.setObjectName(u"gb_name")
         self.gb_name.setGeometry(QRect(350, 100, 201, 81))
@@ -374,6 +379,7 @@ class Ui_SettingDialog(object):
         self.cb_b1s1.setText(QCoreApplication.translate("SettingDialog", u"\u4e70\u4e00/\u5356\u4e00", None))
         self.cb_commi.setText(QCoreApplication.translate("SettingDialog", u"\u59d4\u6bd4", None))
         self.cb_kline.setText(QCoreApplication.translate("SettingDialog", u"\u65e5K\u7ebf", None))
+        self.cb_spark.setText(QCoreApplication.translate("SettingDialog", u"\u5206\u65f6", None))
         self.cb_profit.setText(QCoreApplication.translate("SettingDialog", u"\u6d6e\u76c8", None))
         self.gb_data_setting.setTitle(QCoreApplication.translate("SettingDialog", u"\u6570\u636e\u8bbe\u7f6e", None))
         self.label_source.setText(QCoreApplication.translate("SettingDialog", u"\u6570\u636e\u6e90\uff1a", None))
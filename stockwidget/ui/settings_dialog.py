@@ -224,6 +224,7 @@ class SettingsDialog(QDialog):
         self.cb_b1s1 = self.ui.cb_b1s1
         self.cb_commi = self.ui.cb_commi
         self.cb_kline = self.ui.cb_kline
+        self.cb_spark = self.ui.cb_spark
         self.cb_profit = self.ui.cb_profit
         self.cmb_namelen = self.ui.cmb_namelen
 
@@ -269,6 +270,7 @@ class SettingsDialog(QDialog):
         self.cb_b1s1.toggled.connect(self._on_b1s1_toggled)
         self.cb_commi.toggled.connect(partial(self._on_flag_toggled, "委比"))
         self.cb_kline.toggled.connect(partial(self._on_flag_toggled, "K线"))
+        self.cb_spark.toggled.connect(partial(self._on_flag_toggled, "分时"))
         self.cb_profit.toggled.connect(partial(self._on_flag_toggled, "浮盈"))
 
         self.btn_add = self.ui.btn_add
@@ -313,6 +315,7 @@ class SettingsDialog(QDialog):
         self.cb_b1s1.setChecked(self.win.b1s1_visible)
         self.cb_commi.setChecked(self.win.header_is_visible("委比"))
         self.cb_kline.setChecked(self.win.header_is_visible("K线"))
+        self.cb_spark.setChecked(self.win.header_is_visible("分时"))
         self.cb_profit.setChecked(self.win.profit_visible)
 
         # 名称显示字数: 0=不显示, -1=全部显示, 1-4=前 N 个字
@@ -637,7 +640,7 @@ class SettingsDialog(QDialog):
         self.list_codes.blockSignals(False)
         self.list_codes.setCurrentCell(dst, 1)
 
-    def _on_interval_changed(self, value: int):
+    def _on_interval_changed(self, value: float):
         self.win.set_refresh_interval(value)
 
     def _on_source_changed(self, idx: int):
@@ -836,6 +839,7 @@ class SettingsDialog(QDialog):
             (self.cb_avg, "均价"),
             (self.cb_commi, "委比"),
             (self.cb_kline, "K线"),
+            (self.cb_spark, "分时"),
             (self.cb_profit, "浮盈"),
         ):
             self._set_checked_blocked(cb, self.win.header_is_visible(header))
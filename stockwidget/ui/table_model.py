@@ -1,62 +1,79 @@
-from PySide6.QtCore import Qt, QRect, QAbstractTableModel, QModelIndex
-from PySide6.QtGui import QColor, QPainter, QPen, QBrush
+from PySide6.QtCore import Qt, QRect, QSize, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor, QPainter, QPainterPath, QPen, QBrush, QPixmap
 from PySide6.QtWidgets import QStyledItemDelegate
 
+from stockwidget.core.candle_cache import LruCache, candle_offsets
+from stockwidget.core.row_diff import changed_spans, plan_row_ops
+
 # ----- 颜色配置 -----
 UP_COLOR = QColor("#dd2100")
 DOWN_COLOR = QColor("#019933")
 NEUTRAL_COLOR = QColor("#494949")
 
+HISTORY_ROLE = Qt.UserRole + 1   # K线单元格：多日K线所用的代码
+
+# 预计算单元格 (显示文本, 前景色, 对齐, UserRole, HISTORY_ROLE) 中各角色所在的位置
+_ROLE_SLOT = {
+    Qt.DisplayRole: 0,
+    Qt.ForegroundRole: 1,
+    Qt.TextAlignmentRole: 2,
+    Qt.UserRole: 3,
+    HISTORY_ROLE: 4,
+}
+_SLOT_ROLES = sorted(_ROLE_SLOT, key=_ROLE_SLOT.get)
+_ALIGN_RIGHT = Qt.AlignRight | Qt.AlignVCenter
+_ALIGN_LEFT = Qt.AlignLeft | Qt.AlignVCenter
+
+
 class SimpleTableModel(QAbstractTableModel):
     """
-    主浮窗表格数据与格式
+    主浮窗表格数据与格式。
+    各单元格的显示文本 / 前景色 / 对齐 / 自绘数据在更新时预先算好，data() 只做查表；
+    表头不变时按行键（代码）增量更新：行增删 / 移动发出对应的行信号，
+    内容只对变化的单元格区间、变化的角色发出 dataChanged，不再整表重置。
     """
     def __init__(self, rows=None, headers=None, align_right_cols=None, parent=None):
         super().__init__(parent)
         self.default_color = False
         self.fg_color = QColor("#FFFFFF")
-        self._rows = rows or []
         self._headers = headers or []
-        self._align_right = align_right_cols or []
-        self._row_meta = []
+        self._align_right = set(align_right_cols or [])
+        self._keys = []
+        self._signs = [[0] * len(row) for row in rows or []]
+        self._cells = [self._make_row(row, signs) for row, signs in zip(rows or [], self._signs)]
+        self.resets = 0            # 整表重置次数
+        self.cells_changed = 0     # 增量更新中发出 dataChanged 的单元格数
 
     def set_color_scheme(self, use_default: bool, fg: QColor):
-        self.default_color = bool(use_default)
-        self.fg_color = QColor(fg)
+        use_default, fg = bool(use_default), QColor(fg)
+        if use_default == self.default_color and fg == self.fg_color:
+            return
+        self.default_color = use_default
+        self.fg_color = fg
+        if self._cells:
+            self._cells = [[(t, self._foreground(sign), a, u, h) for (t, _, a, u, h), sign in zip(row, signs)]
+                           for row, signs in zip(self._cells, self._signs)]
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._cells) - 1, len(self._headers) - 1),
+                                  [Qt.ForegroundRole])
 
     def rowCount(self, parent=QModelIndex()):
-        return len(self._rows)
+        return len(self._cells)
     
     def columnCount(self, parent=QModelIndex()):
         return len(self._headers)
 
     def data(self, index, role=Qt.DisplayRole):
-        r, c = index.row(), index.column()
-        cell = self._rows[r][c]
-
-        if role == Qt.UserRole:
-            if isinstance(cell, dict) and "k" in cell:
-                return cell["k"]
+        slot = _ROLE_SLOT.get(role)
+        if slot is None:
             return None
+        return self._cells[index.row()][index.column()][slot]
 
-        if role == Qt.DisplayRole:
-            return "" if isinstance(cell, dict) else str(cell)
+    def headers(self) -> list:
+        return self._headers
 
-        if role == Qt.TextAlignmentRole:
-            return (Qt.AlignRight | Qt.AlignVCenter) if c in self._align_right else (Qt.AlignLeft | Qt.AlignVCenter)
-
-        if role == Qt.ForegroundRole:
-            if not self.default_color:
-                return self.fg_color
-
-            sign = self._row_meta[r][c]
-            if sign > 0:
-                return UP_COLOR
-            if sign < 0:
-                return DOWN_COLOR
-            return NEUTRAL_COLOR
-
-        return None
+    def column_texts(self, col: int):
+        """第 col 列各行的显示文本（测量列宽用）。"""
+        return (row[col][0] for row in self._cells)
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if role != Qt.DisplayRole:
@@ -65,12 +82,74 @@ class SimpleTableModel(QAbstractTableModel):
             return self._headers[section]
         return None
 
-    def set_rows_headers(self, rows, headers, meta):
-        self.beginResetModel()
-        self._rows = rows
-        self._headers = headers
-        self._row_meta = meta
-        self.endResetModel()
+    def _foreground(self, sign):
+        if not self.default_color:
+            return self.fg_color
+        if sign > 0:
+            return UP_COLOR
+        if sign < 0:
+            return DOWN_COLOR
+        return NEUTRAL_COLOR
+
+    def _make_row(self, row, signs):
+        """一行原始单元格 -> 预计算的 (文本, 前景色, 对齐, UserRole, HISTORY_ROLE) 元组列表。"""
+        cells = []
+        for c, value in enumerate(row):
+            align = _ALIGN_RIGHT if c in self._align_right else _ALIGN_LEFT
+            if isinstance(value, dict):
+                cells.append(("", self._foreground(signs[c]), align,
+                              value.get("k", value.get("spark")), value.get("days")))
+            else:
+                cells.append((str(value), self._foreground(signs[c]), align, None, None))
+        return cells
+
+    def set_rows_headers(self, rows, headers, meta, keys=None):
+        """更新整表。keys 为各行的行键（代码）；表头变化或未给出 keys 时整表重置，否则增量更新。"""
+        cells = [self._make_row(row, signs) for row, signs in zip(rows, meta)]
+        if keys is None or headers != self._headers or len(set(keys)) != len(keys):
+            self.beginResetModel()
+            self._headers = list(headers)
+            self._cells = cells
+            self._signs = list(meta)
+            self._keys = list(keys) if keys is not None else []
+            self.endResetModel()
+            self.resets += 1
+            return
+
+        keys = list(keys)
+        old = dict(zip(self._keys, self._cells))
+        new_cells = dict(zip(keys, cells))
+        new_signs = dict(zip(keys, meta))
+        for op, a, b in plan_row_ops(self._keys, keys):
+            if op == "remove":
+                self.beginRemoveRows(QModelIndex(), a, a + b - 1)
+                del self._keys[a:a + b], self._cells[a:a + b], self._signs[a:a + b]
+                self.endRemoveRows()
+            elif op == "move":
+                # Qt 的目标行是移动前行序中的位置：上移时即 b
+                self.beginMoveRows(QModelIndex(), a, a, QModelIndex(), b)
+                for seq in (self._keys, self._cells, self._signs):
+                    seq.insert(b, seq.pop(a))
+                self.endMoveRows()
+            else:
+                self.beginInsertRows(QModelIndex(), a, a + b - 1)
+                added = keys[a:a + b]
+                self._keys[a:a] = added
+                self._cells[a:a] = [new_cells[k] for k in added]
+                self._signs[a:a] = [new_signs[k] for k in added]
+                self.endInsertRows()
+
+        for r, key in enumerate(keys):
+            before, after = old.get(key), new_cells[key]
+            self._signs[r] = new_signs[key]
+            if before is None or before is after:
+                continue
+            self._cells[r] = after
+            for first, last in changed_spans(before, after):
+                roles = [role for slot, role in enumerate(_SLOT_ROLES)
+                         if any(before[c][slot] != after[c][slot] for c in range(first, last + 1))]
+                self.cells_changed += last - first + 1
+                self.dataChanged.emit(self.index(r, first), self.index(r, last), roles)
 
     def set_align_right_cols(self, cols_idx):
         self._align_right = set(cols_idx or [])
@@ -78,21 +157,67 @@ class SimpleTableModel(QAbstractTableModel):
 
 class KLineDelegate(QStyledItemDelegate):
     """
-    当日K线图，基于昨收，今开，最高，最低，实时价
+    当日K线图，基于昨收，今开，最高，最低，实时价；
+    days > 0 时在左侧加画最近 days 个交易日的K线（取自 DailyBarStore 的 mmap 缓存）。
+    当日K线按量化后的像素坐标 / 单元格尺寸 / 缩放 / 配色缓存为 QPixmap（LRU），
+    多日K线按代码 / 天数 / 最后一根的日期与量化后的当日K线缓存（同一 LRU），
+    悬停、拖动、置顶定时器等引起的重绘只需贴图；画笔与画刷随配色预先生成
     """
-    def __init__(self, parent=None, base_pt=12):
+    CACHE_SIZE = 512   # 缓存的K线贴图数
+
+    def __init__(self, parent=None, base_pt=12, store=None):
         super().__init__(parent)
         self.default_color = False
         self.fg = QColor("#FFFFFF")
         self.base_pt = max(1, int(base_pt))
         self.scale = 1.0  # 缩放
+        self.store = store
+        self.days = 0
+        self.cache = LruCache(self.CACHE_SIZE)
+        self._build_pens()
+
+    def _build_pens(self):
+        """按当前配色生成各涨跌方向（1 / -1 / 0）的画笔、画刷与昨收虚线画笔。"""
+        colors = {1: UP_COLOR, -1: DOWN_COLOR, 0: NEUTRAL_COLOR} if self.default_color \
+            else dict.fromkeys((1, -1, 0), self.fg)
+        self._pens = {d: QPen(color, 1) for d, color in colors.items()}
+        self._brushes = {d: QBrush(color) for d, color in colors.items()}
+        dash_col = QColor(NEUTRAL_COLOR if self.default_color else self.fg)
+        dash_col.setAlpha(180)
+        self._dash_pen = QPen(dash_col, 1, Qt.DashLine)
+        self._scheme = (self.default_color, self.fg.rgba())
 
     def update_scheme(self, default_color: bool, fg: QColor):
         self.default_color = bool(default_color)
         self.fg = QColor(fg)
+        if (self.default_color, self.fg.rgba()) != self._scheme:
+            self._build_pens()
+            self.cache.clear()
 
     def set_point_size(self, pt: int):
-        self.scale = max(0.5, min(1.5, float(pt) / float(self.base_pt)))
+        scale = max(0.5, min(1.5, float(pt) / float(self.base_pt)))
+        if scale != self.scale:
+            self.scale = scale
+            self.cache.clear()
+
+    def set_days(self, days: int):
+        self.days = max(0, int(days))
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
+    def _slot_width(self) -> int:
+        return max(4, int(7 * self.scale))
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        if self.days and self.store is not None:
+            size.setWidth(max(size.width(), (self.days + 1) * self._slot_width() + 4))
+        return size
+
+    @staticmethod
+    def _direction(o, c) -> int:
+        return (c > o) - (c < o)
 
     def paint(self, painter: QPainter, option, index):
         k = index.data(Qt.UserRole)
@@ -100,67 +225,251 @@ class KLineDelegate(QStyledItemDelegate):
             super().paint(painter, option, index)
             return
 
-        o, c, h, l, p = k
-        if h < l: h, l = l, h
-
         cell = option.rect
-        rect = cell.adjusted(2, 2, -2, -2)
+        w, h = cell.width(), cell.height()
+        if w <= 0 or h <= 0:
+            return
+        dpr = painter.device().devicePixelRatioF() if painter.device() is not None else 1.0
 
-        sc = max(0.5, min(1.5, self.scale))
-        vpad = max(2, int(rect.height() * (0.12 + 0.06 * (sc - 1))))   # ~12%~18%
-        h_eff = max(2, rect.height() - 2 * vpad)
-        krect = QRect(rect.left(), rect.top() + vpad, rect.width(), h_eff)
+        if self.days and self.store is not None:
+            code = index.data(HISTORY_ROLE) or ""
+            bars = self.store.bars(code)
+            past = bars.tail(self.days) if bars is not None else []
+            if past:
+                # 当日K线按多日刻度（只含历史）量化到像素：价格的细微跳动不改变缓存键
+                lo = min(bar[2] for bar in past)
+                span = (max(bar[1] for bar in past) - lo) or 1.0
+                today = tuple(round((v - lo) / span * h) for v in k[:4])
+                dates = bars.column("date")
+                key = ("strip", w, h, dpr, self.scale, self._scheme, code, len(past),
+                       dates[-1] if len(dates) else 0) + today
+                self._draw_cached(painter, cell, key, dpr, lambda p: self._paint_strip(p, w, h, past, k))
+                return
 
-        def y_for(v):
-            if h == l == p:
-                y = 0.5
-            else:
-                y = (v - min(l,p)) / (max(h,p) - min(l,p))
-            return krect.top() + (1 - y) * krect.height()
+        sc = max(0.5, min(1.5, self.scale))
+        vpad = max(2, int((h - 4) * (0.12 + 0.06 * (sc - 1))))   # ~12%~18%
+        h_eff = max(2, h - 4 - 2 * vpad)
+        o, c = k[0], k[1]
+        offsets = candle_offsets(*k, h_eff)
+        key = (w, h, dpr, sc, self._scheme, self._direction(o, c)) + offsets
+        self._draw_cached(painter, cell, key, dpr,
+                          lambda p: self._render_candle(p, w, h, vpad, h_eff, sc, self._direction(o, c), offsets))
 
-        y_o, y_c, y_h, y_l, y_p = (y_for(o), y_for(c), y_for(h), y_for(l), y_for(p))
+    def _draw_cached(self, painter: QPainter, cell: QRect, key: tuple, dpr: float, render):
+        """按 key 取缓存贴图（未命中时以 render(QPainter) 在透明贴图上绘制并缓存）并贴到单元格。"""
+        pixmap = self.cache.get(key)
+        if pixmap is None:
+            w, h = cell.width(), cell.height()
+            pixmap = QPixmap(max(1, round(w * dpr)), max(1, round(h * dpr)))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.transparent)
+            p = QPainter(pixmap)
+            render(p)
+            p.end()
+            self.cache.put(key, pixmap)
+        painter.drawPixmap(cell.topLeft(), pixmap)
 
-        painter.save()
-        painter.setClipRect(cell)
+    def _render_candle(self, painter: QPainter, w: int, h: int, vpad: int, h_eff: int, sc: float,
+                       direction: int, offsets: tuple):
+        """在 (0, 0, w, h) 的贴图上画当日K线；offsets 为 candle_offsets 的结果（相对K线区域顶部）。"""
         painter.setRenderHint(QPainter.Antialiasing, True)
+        krect = QRect(2, 2 + vpad, max(0, w - 4), h_eff)
+        y_o, y_c, y_h, y_l, y_p = (krect.top() + y for y in offsets)
 
         body_w = max(5, min(int(krect.width() * 0.4 * sc), 10))
         x = krect.center().x()
 
         # 昨收虚线
-        dash_col = QColor(NEUTRAL_COLOR if self.default_color else self.fg)
-        dash_col.setAlpha(180)
-        painter.setPen(QPen(dash_col, 1, Qt.DashLine))
+        painter.setPen(self._dash_pen)
         painter.drawLine(x - body_w, y_p, x + body_w, y_p)
 
-        kcolor = self.fg
-        if self.default_color:
-            if c>o:
-                kcolor = UP_COLOR
-            elif c<o:
-                kcolor = DOWN_COLOR
-            else:
-                kcolor = NEUTRAL_COLOR
-
         top, bot = min(y_o, y_c), max(y_o, y_c)
         body_h = max(2, bot - top)
         body_x = x - body_w // 2
 
-        painter.setPen(QPen(kcolor, 1))
-        if c != o:
+        painter.setPen(self._pens[direction])
+        if direction:
             # 实体
             painter.drawRect(body_x, top, body_w, body_h)
         else:
             # 一字实体
-            painter.drawLine(body_x, y_c, body_x+body_w, y_c)
+            painter.drawLine(body_x, y_c, body_x + body_w, y_c)
         if y_h < top:
             # 上影线
             painter.drawLine(x, y_h, x, top)
         if y_l > bot:
             # 下影线
             painter.drawLine(x, bot, x, y_l)
-        if c < o: 
+        if direction < 0:
             # 填充实体（空阳线）
-            painter.fillRect(body_x, top, body_w, body_h, QBrush(kcolor))
+            painter.fillRect(body_x, top, body_w, body_h, self._brushes[direction])
+
+    def _paint_strip(self, painter: QPainter, w: int, h: int, past: list, k: tuple):
+        """在 (0, 0, w, h) 的贴图上画多日K线：past 为 [(open, high, low, close), ...]，末尾接当日（k）。
+        各K线共用价格刻度。"""
+        o, c, kh, kl, _ = k
+        candles = list(past) + [(o, max(kh, kl), min(kh, kl), c)]
+        lo = min(bar[2] for bar in candles)
+        hi = max(bar[1] for bar in candles)
+        span = (hi - lo) or 1.0
+
+        rect = QRect(2, 2, w - 4, h - 4)
+        vpad = max(2, int(rect.height() * 0.12))
+        rect = rect.adjusted(0, vpad, 0, -vpad)
+        slot = self._slot_width()
+        body_w = max(2, slot - 2)
+        left = rect.right() - slot * len(candles) + 1   # 右对齐：当日K线贴右侧
+
+        def y_for(v):
+            return rect.top() + (hi - v) / span * rect.height()
+
+        for i, (bo, bh, bl, bc) in enumerate(candles):
+            d = self._direction(bo, bc)
+            x = left + i * slot
+            xc = x + body_w // 2
+            top, bot = y_for(max(bo, bc)), y_for(min(bo, bc))
+            painter.setPen(self._pens[d])
+            painter.drawLine(xc, y_for(bh), xc, y_for(bl))
+            if d < 0:
+                painter.fillRect(x, top, body_w, max(1, bot - top), self._brushes[d])
+            else:
+                painter.drawRect(x, top, body_w - 1, max(1, bot - top))
+
+
+class _SparkPath:
+    """单个代码的分时路径缓存：x 为相对首点的秒数，y 为价格（数据坐标，绘制时再变换到单元格）。"""
+
+    __slots__ = ("ring", "generation", "total", "path", "t0", "t1", "lo", "hi", "seg_x")
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.generation = ring.generation
+        self.total = 0
+        self.path = QPainterPath()
+        self.t0 = None
+        self.t1 = 0.0
+        self.lo = self.hi = 0.0
+        self.seg_x = 0.0      # 末端顶点所在时间段的起点
+
+    def extend(self, step: float):
+        """追加 ring 中新到的点；step 秒内的点只移动末端顶点，路径顶点数随时长有界。"""
+        path = self.path
+        for ts, price in self.ring.since(self.total):
+            if self.t0 is None:
+                self.t0 = ts
+                self.lo = self.hi = price
+                path.moveTo(0.0, price)
+                continue
+            x = ts - self.t0
+            if path.elementCount() > 1 and x - self.seg_x < step:
+                path.setElementPositionAt(path.elementCount() - 1, x, price)
+            else:
+                path.lineTo(x, price)
+                self.seg_x = x
+            self.t1 = x
+            if price < self.lo:
+                self.lo = price
+            elif price > self.hi:
+                self.hi = price
+        self.total = self.ring.total
+
+
+class SparklineDelegate(QStyledItemDelegate):
+    """
+    当日分时走势（迷你折线），数据取自 TickHistory；
+    每个代码缓存一条 QPainterPath，新点到达时只追加末尾，重绘不重建路径
+    """
+    STEP = 30.0   # 路径顶点的最小时间间隔（秒）
+
+    def __init__(self, history, parent=None, base_pt=12):
+        super().__init__(parent)
+        self.history = history
+        self.default_color = False
+        self.fg = QColor("#FFFFFF")
+        self.base_pt = max(1, int(base_pt))
+        self.scale = 1.0  # 缩放
+        self._paths: dict[str, _SparkPath] = {}
+        self._pen = QPen(self.fg, 1)
+        self._pen.setCosmetic(True)   # 线宽不随坐标变换缩放
+
+    def update_scheme(self, default_color: bool, fg: QColor):
+        self.default_color = bool(default_color)
+        self.fg = QColor(fg)
+
+    def set_point_size(self, pt: int):
+        self.scale = max(0.5, min(1.5, float(pt) / float(self.base_pt)))
+
+    def retain(self, codes):
+        """丢弃不在 codes 中的代码的路径缓存。"""
+        keep = set(codes)
+        for code in [c for c in self._paths if c not in keep]:
+            del self._paths[code]
+
+    def sizeHint(self, option, index):
+        fm = option.fontMetrics
+        return QSize(int(fm.height() * 4 * self.scale), fm.height())
+
+    def _path_for(self, code: str):
+        ring = self.history.ring(code)
+        if ring is None or not len(ring):
+            self._paths.pop(code, None)
+            return None
+        sp = self._paths.get(code)
+        if sp is None or sp.ring is not ring or sp.generation != ring.generation:
+            sp = self._paths[code] = _SparkPath(ring)
+        if sp.total != ring.total:
+            sp.extend(self.STEP)
+        return sp
+
+    def paint(self, painter: QPainter, option, index):
+        payload = index.data(Qt.UserRole)
+        if not payload or not isinstance(payload, tuple) or len(payload) != 2:
+            super().paint(painter, option, index)
+            return
+        code, prev_close = payload
+        sp = self._path_for(code)
+        if sp is None:
+            super().paint(painter, option, index)
+            return
+
+        cell = option.rect
+        rect = cell.adjusted(2, 2, -2, -2)
+        vpad = max(2, int(rect.height() * 0.12))
+        rect = rect.adjusted(0, vpad, 0, -vpad)
+        if rect.width() < 2 or rect.height() < 2:
+            return
+
+        lo, hi = sp.lo, sp.hi
+        if prev_close:
+            lo, hi = min(lo, prev_close), max(hi, prev_close)
+        span_y = (hi - lo) or 1.0
+        span_x = sp.t1 or 1.0
+        sx = rect.width() / span_x
+        sy = rect.height() / span_y
+
+        color = self.fg
+        if self.default_color:
+            last = sp.ring.last()[1]
+            ref = prev_close or last
+            color = UP_COLOR if last > ref else DOWN_COLOR if last < ref else NEUTRAL_COLOR
+
+        painter.save()
+        painter.setClipRect(cell)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+
+        # 昨收虚线
+        if prev_close:
+            dash_col = QColor(NEUTRAL_COLOR if self.default_color else self.fg)
+            dash_col.setAlpha(120)
+            painter.setPen(QPen(dash_col, 1, Qt.DashLine))
+            y_p = rect.bottom() - (prev_close - lo) * sy
+            painter.drawLine(rect.left(), y_p, rect.right(), y_p)
+
+        # 数据坐标 -> 单元格：x 向右为时间，y 向上为价格
+        painter.translate(rect.left(), rect.bottom() + lo * sy)
+        painter.scale(sx, -sy)
+        self._pen.setColor(color)
+        painter.setPen(self._pen)
+        painter.drawPath(sp.path)
 
-        painter.restore()
\ No newline at end of file
+        painter.restore()
@@ -1,20 +1,31 @@
+from collections import deque
 from functools import partial
-import requests
-import threading
+import os
 import sys
+import threading
+import time
 
 from PySide6.QtCore import Qt, QTimer, Signal
 from PySide6.QtGui import QFont, QAction, QColor
-from PySide6.QtWidgets import QApplication, QWidget, QMenu, QVBoxLayout, QLabel, QTableView, QHeaderView, QAbstractItemView, QFrame, QStyledItemDelegate
+from PySide6.QtWidgets import QApplication, QWidget, QMenu, QVBoxLayout, QLabel, QTableView, QHeaderView, QAbstractItemView, QFrame, QStyledItemDelegate, QFileDialog
 
-from stockwidget.ui.table_model import SimpleTableModel, KLineDelegate
+from stockwidget.ui.table_model import SimpleTableModel, KLineDelegate, SparklineDelegate
 from stockwidget.ui.drag_mixin import DragBehaviorMixin
+from stockwidget.ui.debug_dialog import DebugDialog
 from stockwidget.platform.hotkeys import GlobalHotkeyManager, HotkeyResult
-from stockwidget.data.quotes import request_quote
-from stockwidget.core.markets import strip_market
-from stockwidget.core.formatters import format_volume, format_amount
+from stockwidget.data.quote_worker import QuoteJob, QuoteWorker
+from stockwidget.data.intraday import MinuteBarCache, backfill, supports_backfill
+from stockwidget.data.daily_bars import DailyBarStore
+from stockwidget.data.tick_log import TickRecorder
+from stockwidget.data.replay import SPEEDS as REPLAY_SPEEDS, ReplayPlayer
+from stockwidget.core.row_format import COLUMN, HEADERS, DisplaySettings, RowFormatter
+from stockwidget.core.stats import percentile
 from stockwidget.core.watchlist import normalize_watchlist
 from stockwidget.core.geometry import resolve_restore_position
+from stockwidget.core.poll_scheduler import PollScheduler
+from stockwidget.core.column_fit import ColumnFit, RateCounter
+from stockwidget.core.tick_history import TickHistory
+from stockwidget.core.trading_calendar import TradingCalendar
 from stockwidget.platform.capabilities import (
     is_wayland,
     hotkeys_supported, click_through_supported,
@@ -29,8 +40,14 @@ class FloatLabel(DragBehaviorMixin, QWidget):
     click_through_hotkey_triggered = Signal()
     click_through_changed = Signal(bool)
     display_flags_changed = Signal()  # 显示指标/表头/网格/默认颜色等显示相关设置变化
-    data_ready = Signal(object)  # 后台线程请求完成后发回主线程: (ok, ret, data, error)
-    ALL_HEADERS = ["名称", "现价", "涨跌", "涨幅", "浮盈", "买一", "卖一", "委比", "成交量", "成交额", "均价", "K线"]
+    data_ready = Signal(object)  # 抓取线程请求完成后发回主线程: QuoteResult
+    daily_ready = Signal(list)  # 日K线缓存更新完成后发回主线程: 有更新的代码
+    backfill_ready = Signal(list, dict)  # 分钟线回补完成后发回主线程: 请求的代码, {代码: (交易日, 分钟线)}
+    replay_finished = Signal()  # 回放线程交付完最后一轮
+    KLINE_DAY_CHOICES = (0, 5, 10, 20)  # K线列可选的历史天数（0 为只画当日）
+    BACKFILL_RETRY = 60.0               # 分钟线回补失败后再试的间隔（秒）
+    REFRESH_RANGE = (0.25, 60.0)  # 刷新间隔范围（秒），支持小数（集合竞价 / 开盘时可设 0.25–0.5 秒）
+    ALL_HEADERS = list(HEADERS)
     HEADER_ATTR_MAP = {
         "名称": "name_visible",
         "现价": "price_visible",
@@ -44,6 +61,7 @@ class FloatLabel(DragBehaviorMixin, QWidget):
         "成交额": "amount_visible",
         "均价": "avg_visible",
         "K线": "kline_visible",
+        "分时": "spark_visible",
     }
 
     def __init__(self, cfg: dict, codes_list: dict):
@@ -76,6 +94,8 @@ class FloatLabel(DragBehaviorMixin, QWidget):
         self.amount_visible     = bool(cfg.get("amount_visible", False))
         self.avg_visible        = bool(cfg.get("avg_visible", False))
         self.kline_visible      = bool(cfg.get("kline_visible", False))
+        self.spark_visible      = bool(cfg.get("spark_visible", False))
+        self.kline_days         = max(0, min(60, int(cfg.get("kline_days", 0) or 0)))
         # 加载外观配置
         self.header_visible     = bool(cfg.get("header_visible", False))
         self.grid_visible       = bool(cfg.get("grid_visible", False))
@@ -89,7 +109,10 @@ class FloatLabel(DragBehaviorMixin, QWidget):
         self.opacity_pct        = int(cfg.get("opacity_pct", 90))
         self.default_color      = bool(cfg.get("default_color", False))
         # 加载其他配置
-        self.refresh_seconds    = int(cfg.get("refresh_seconds", 2))
+        self.refresh_seconds    = self._clamp_interval(cfg.get("refresh_seconds", 2)) or 2.0
+        self.market_hours_only  = bool(cfg.get("market_hours_only", True))
+        self.record_ticks       = bool(cfg.get("record_ticks", False))
+        self.holidays           = dict(cfg.get("holidays") or {})
         self.data_source        = str(cfg.get("data_source", "sina"))
         if self.data_source not in ("sina", "eastmoney"):
             self.data_source = "sina"
@@ -140,7 +163,8 @@ class FloatLabel(DragBehaviorMixin, QWidget):
         self.table.verticalHeader().setDefaultSectionSize(1)
         self.table.horizontalHeader().setVisible(self.header_visible)
         self.table.horizontalHeader().setStretchLastSection(False)
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        # 列宽完全由 _relayout 按字体度量设置（ResizeToContents 会忽略 setColumnWidth 并逐格重新测量）
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.table.setFont(self.font)
         self.table.horizontalHeader().setFont(self.font)
         self.table.horizontalHeader().setAttribute(Qt.WA_TransparentForMouseEvents, True)
@@ -150,16 +174,45 @@ class FloatLabel(DragBehaviorMixin, QWidget):
         self.message_label.setVisible(False)
         self.vbox.addWidget(self.message_label)
         self._index_updating = False # 市场代码列表后台更新标志
-        self._refresh_thread = None  # 后台刷新线程（避免网络请求阻塞 UI）
+        self._formatter = RowFormatter()  # 仅用于未经格式化的结果（正常情况下由抓取 / 回放线程格式化）
+        self._display = None         # 最近一次生成的显示参数快照（回放线程只读取此引用）
+        self._projection = None      # 上次投影的 (代码顺序, 可见列)
+        self.rows_skipped = 0        # 最近一轮报文未变、跳过格式化的行数
+        self._worker = QuoteWorker(self.data_ready.emit)  # 常驻抓取线程（避免网络请求阻塞 UI）
+        # 按交易时段筛选每次定时刷新要请求的代码（休市市场降为心跳刷新）
+        self._scheduler = PollScheduler(TradingCalendar(self.holidays), enabled=self.market_hours_only,
+                                        interval=self.refresh_seconds)
+        # 当日分时：每个代码一个环形缓冲（随每轮完整结果追加，容量按交易时长 / 刷新间隔估算）
+        self.history = TickHistory(interval=self.refresh_seconds)
+        self._minute_cache = MinuteBarCache()
+        self._backfilled = set()     # 已发起 / 已完成分钟线回补的代码（成功的每次启动只回补一次）
+        self._backfill_retry = {}    # 回补失败（或尚无当日分时）的代码 -> 可再次尝试的时刻（monotonic）
+        self.daily_store = DailyBarStore()  # 多日K线：本地 mmap 列式缓存，每天只补一次
+        self._daily_checked = set()  # 本次启动已检查过日K线缓存的代码
+        self._recorder = None        # 记录行情开启时为 TickRecorder（逐笔写入当日二进制日志）
+        self._replay = None          # 回放中为 ReplayPlayer（实时抓取暂停，结果同样经 data_ready 进入）
+        self._process_costs = deque(maxlen=512)  # 最近各轮 _process_data 的耗时（秒）
+        self._debug_dlg = None
 
         self.model = SimpleTableModel(headers=self.ALL_HEADERS, align_right_cols=[1,2,3,4,5])
         self.model.set_color_scheme(self.default_color, self.fg)
         self.table.setModel(self.model)
 
-        self.k_delegate = KLineDelegate(self.table, base_pt=12)
+        self.k_delegate = KLineDelegate(self.table, base_pt=12, store=self.daily_store)
+        self.k_delegate.set_days(self.kline_days)
         self.k_delegate.update_scheme(self.default_color, self.fg)
         self.k_delegate.set_point_size(self.font.pointSize())
-        self.k_column_visible_index = None
+        self.spark_delegate = SparklineDelegate(self.history, self.table, base_pt=12)
+        self.spark_delegate.update_scheme(self.default_color, self.fg)
+        self.spark_delegate.set_point_size(self.font.pointSize())
+        self._delegate_cols = {}     # 表头 -> 当前设置了自绘委托的列号（K线 / 分时）
+        self._column_fit = ColumnFit()   # 列宽滞回：变宽立即生效，变窄持续一段时间才生效
+        self._relayouts = RateCounter()  # 最近一分钟的重新布局次数
+        self._text_widths = {}       # 文本 -> 字体度量宽度（字体变化时清空）
+        self._cell_pad = 0           # 单元格文本以外的水平边距（完整测量时按实际 sizeHint 标定）
+        self._fixed_widths = {}      # 自绘列号 -> 宽度（与内容无关，完整测量时取 sizeHint）
+        self._fit_headers = None     # 上次完整测量时的列
+        self._applied = None         # 上次布局采用的 (列宽, 行数)
 
         self.vbox.addWidget(self.table)
 
@@ -175,9 +228,17 @@ class FloatLabel(DragBehaviorMixin, QWidget):
 
         # 定时刷新数据
         self.data_ready.connect(self._process_data)
+        self.backfill_ready.connect(self._apply_backfill)
+        self.daily_ready.connect(self._on_daily_ready)
+        self.replay_finished.connect(self._on_replay_finished)
+        self._worker.start()
+        if self.record_ticks:
+            self._recorder = TickRecorder()
+            self._recorder.start()
         self.timer = QTimer(self)
-        self.timer.setInterval(max(1, self.refresh_seconds)*1000)
-        self.timer.timeout.connect(self._refresh_from_function)
+        self.timer.setSingleShot(True)   # 每次触发后按 PollScheduler.next_delay() 重新排定（锁相轮询）
+        self.timer.setInterval(int(self.refresh_seconds * 1000))
+        self.timer.timeout.connect(self._poll_tick)
         self.timer.start()
         self._refresh_from_function()
         self._defer_fit()
@@ -233,6 +294,8 @@ class FloatLabel(DragBehaviorMixin, QWidget):
             "amount_visible":       self.amount_visible,
             "avg_visible":          self.avg_visible,
             "kline_visible":        self.kline_visible,
+            "spark_visible":        self.spark_visible,
+            "kline_days":           self.kline_days,
             
             "header_visible":   self.header_visible,
             "grid_visible":     self.grid_visible,
@@ -245,6 +308,9 @@ class FloatLabel(DragBehaviorMixin, QWidget):
             "default_color":    self.default_color,
 
             "refresh_seconds":  self.refresh_seconds,
+            "market_hours_only": self.market_hours_only,
+            "record_ticks":     self.record_ticks,
+            "holidays":         {k: list(v) for k, v in self.holidays.items()},
             "data_source":      self.data_source,
             "force_top":        self.force_top,
             "click_through":    self.click_through,
@@ -305,20 +371,69 @@ class FloatLabel(DragBehaviorMixin, QWidget):
             self.table.setRowHeight(r, h)
 
     def _fit_to_contents(self):
+        """完整测量（启动、字体 / 样式 / 列变化时）：重新标定边距与自绘列宽度，按测量结果立即布局。"""
         self.table.horizontalHeader().setStretchLastSection(False)
-        self.table.resizeColumnsToContents()
+        self.table.verticalHeader().setFixedWidth(0)
         self._apply_row_heights()
+        self._text_widths.clear()
+        self._fixed_widths = {c: self.table.sizeHintForColumn(c) for c in self._delegate_cols.values()}
+        fm = self.table.fontMetrics()
+        for c in range(self.model.columnCount()):
+            widest = max((fm.horizontalAdvance(t) for t in self.model.column_texts(c)), default=0)
+            if widest and c not in self._fixed_widths:
+                self._cell_pad = max(0, self.table.sizeHintForColumn(c) - widest)
+                break
+        self._fit_headers = list(self.model.headers())
+        self._column_fit.reset()
+        self._relayout(force=True)
+
+    def _fit_columns(self):
+        """每轮刷新：按缓存的字体度量测量列宽，只有采用的列宽或行数变化时才重新布局。"""
+        if self.model.headers() != self._fit_headers:
+            self._fit_to_contents()
+        else:
+            self._relayout()
 
-        cols = self.model.columnCount()
+    def _measure_columns(self) -> list[int]:
+        """各列所需宽度：最宽格式化文本的字体度量宽度 + 边距，不小于表头；自绘列取标定值。"""
+        fm = self.table.fontMetrics()
+        cache = self._text_widths
+        if len(cache) > 8192:
+            cache.clear()
+        header = self.table.horizontalHeader()
+        header_visible = header.isVisible()
+        widths = []
+        for c in range(self.model.columnCount()):
+            w = self._fixed_widths.get(c)
+            if w is None:
+                w = 0
+                for text in self.model.column_texts(c):
+                    tw = cache.get(text)
+                    if tw is None:
+                        tw = cache[text] = fm.horizontalAdvance(text)
+                    if tw > w:
+                        w = tw
+                w += self._cell_pad
+            if header_visible:
+                w = max(w, header.sectionSizeHint(c))
+            widths.append(w)
+        return widths
+
+    def _relayout(self, force: bool = False):
+        widths = self._column_fit.update(self._measure_columns())
         rows = self.model.rowCount()
-        self.table.verticalHeader().setFixedWidth(0)
-        total_w = 2*self.table.frameWidth()
-        for c in range(cols): 
-            total_w += self.table.columnWidth(c)
+        applied = self._applied
+        if not force and applied == (widths, rows):
+            return
+        for c, w in enumerate(widths):
+            if force or applied is None or c >= len(applied[0]) or applied[0][c] != w:
+                self.table.setColumnWidth(c, w)
+        self._applied = (widths, rows)
+        self._relayouts.tick()
+
+        total_w = 2*self.table.frameWidth() + sum(widths)
         hh = self.table.horizontalHeader().height() if self.table.horizontalHeader().isVisible() else 0
-        total_h = hh + 2*self.table.frameWidth()
-        for r in range(rows): 
-            total_h += self.table.rowHeight(r)
+        total_h = hh + 2*self.table.frameWidth() + rows * self.table.verticalHeader().defaultSectionSize()
         self.table.setFixedSize(max(1,total_w), max(1,total_h))
         self.panel.adjustSize()
         self.resize(self.panel.size())
@@ -362,190 +477,218 @@ class FloatLabel(DragBehaviorMixin, QWidget):
         """标记市场代码列表是否正在后台更新（期间保持进度提示不被清除）"""
         self._index_updating = bool(updating)
 
-    def _project_columns(self, full_rows: list[dict], sign_data: list[dict]):
-        # 名称作为数据列显示；其余按显示顺序筛选已启用的列
+    def _project_columns(self, full_rows: list[tuple], sign_data: list[tuple], codes: list[str]):
+        # 名称作为数据列显示；其余按显示顺序筛选已启用的列；codes 为各行代码（模型按代码增量更新）
         headers = [h for h in self.ALL_HEADERS if self.header_is_visible(h)]
 
-        proj_rows, proj_meta = [], []
-        for r, row in enumerate(full_rows):
-            proj_rows.append([row[h] for h in headers])
-            proj_meta.append([sign_data[r][h] for h in headers])
+        cols = [COLUMN[h] for h in headers]
+        proj_rows = [[cells[i] for i in cols] for cells in full_rows]
+        proj_meta = [[signs[i] for i in cols] for signs in sign_data]
 
-        # 右对齐：名称、K线、卖一除外
-        right_cols = [i for i, h in enumerate(headers) if h not in ("名称", "K线", "卖一")]
+        # 右对齐：名称、K线、分时、卖一除外
+        right_cols = [i for i, h in enumerate(headers) if h not in ("名称", "K线", "分时", "卖一")]
         self.model.set_align_right_cols(right_cols)
-        self.model.set_rows_headers(proj_rows, headers, proj_meta)
+        self.model.set_rows_headers(proj_rows, headers, proj_meta, codes)
         self.model.set_color_scheme(self.default_color, self.fg)
 
-        if "K线" in headers:
-            col = headers.index("K线")
-            self.k_column_visible_index = col
-            self.k_delegate.update_scheme(self.default_color, self.fg)
-            self.k_delegate.set_point_size(self.font.pointSize())
-            self.table.setItemDelegateForColumn(col, self.k_delegate)
-        else:
-            if self.k_column_visible_index is not None:
-                self.table.setItemDelegateForColumn(self.k_column_visible_index, QStyledItemDelegate(self.table))
-                self.k_column_visible_index = None
-
-        self._fit_to_contents()
+        # 自绘列：列号变化时先把原列恢复为默认委托
+        for header, delegate in (("K线", self.k_delegate), ("分时", self.spark_delegate)):
+            col = headers.index(header) if header in headers else None
+            old = self._delegate_cols.get(header)
+            if old is not None and old != col:
+                self.table.setItemDelegateForColumn(old, QStyledItemDelegate(self.table))
+            if col is None:
+                self._delegate_cols.pop(header, None)
+                continue
+            self._delegate_cols[header] = col
+            delegate.update_scheme(self.default_color, self.fg)
+            delegate.set_point_size(self.font.pointSize())
+            self.table.setItemDelegateForColumn(col, delegate)
 
-    def _format_data(self, code: str, data: dict, type: str):
-        # 名称显示
-        name = f"({type})" if type is not None and self.type_visible else ""
-        name += f"{strip_market(code)} " if self.code_visible else ""
-        if self.name_length == -1:
-            name += data["name"]
-        else:
-            name += data["name"][:self.name_length]
-
-        # 一档盘口数据
-        b1_label = ""
-        s1_label = ""
-        b1_color_sign = 0
-        s1_color_sign = 0
-        pur_1 = data["purchaser_price"][0]
-        sell_1 = data["seller_price"][0]
-        if pur_1 == sell_1 > 0:
-            # 集合竞价阶段
-            data["current_price"] = sell_1
-            paired = int(data["seller_vol"][0] / 100)
-            unpaired = int((data["purchaser_vol"][1] or (-data["seller_vol"][1])) / 100)
-            b1_label = f"{paired:d}"
-            s1_label = f"{unpaired:+d}"
-            b1_color_sign = (unpaired > 0) - (unpaired < 0)
-            s1_color_sign = b1_color_sign
-        else:
-            # 连续交易阶段（有买/卖盘口量时才显示，否则"-"）
-            pur_v1 = data["purchaser_vol"][0]
-            sell_v1 = data["seller_vol"][0]
-            buy_marker = "<" if pur_1 and pur_v1 and data["current_price"] == pur_1 else " "
-            sell_marker = ">" if sell_1 and sell_v1 and data["current_price"] == sell_1 else " "
-            b1_label = f"{int(pur_v1 / 100)}{buy_marker}" if (pur_1 and pur_v1) else "-"
-            s1_label = f"{sell_marker}{int(sell_v1 / 100)}" if (sell_1 and sell_v1) else "-"
-            b1_color_sign = 1 if (pur_1 and pur_v1) else 0
-            s1_color_sign = -1 if (sell_1 and sell_v1) else 0
-
-        # 盘前数据填充
-        if data["current_price"] == 0:
-            data["current_price"] = data["prev_close"]
-        if data["opening_price"] == 0:
-            data["opening_price"] = data["current_price"]
-            data["high_price"] = data["current_price"]
-            data["low_price"] = data["current_price"]
-
-        # 指标计算
-        change = data["current_price"] - data["prev_close"] if data["prev_close"] else 0.0
-        change_pct = (data["current_price"] / data["prev_close"] - 1) * 100 if data["prev_close"] else 0.0
-        avg = (data["deals_amt"] / data["deals_vol"]) if data["deals_vol"] > 0 else data["prev_close"]
-        p_sum, s_sum = sum(data["purchaser_vol"]), sum(data["seller_vol"])
-        committee = (100 * (p_sum - s_sum) / (p_sum + s_sum)) if (p_sum + s_sum) > 0 else 0.0
-        arrow = " "
-        if data["high_price"] > data["low_price"]:
-            if data["current_price"] == data["high_price"]: arrow = "↑"
-            elif data["current_price"] == data["low_price"]: arrow = "↓"
-        k_payload = {"k": (data["opening_price"], data["current_price"], data["high_price"], data["low_price"], data["prev_close"])}
-
-        precision = 3 if type == "基" else 2
-
-        # 浮盈计算（与成本价比较），仅显示百分比
-        cost = self.costs.get(code)
-        if cost is not None and cost > 0:
-            profit_pct = (data["current_price"] / cost - 1) * 100
-            profit_label = f"{profit_pct:+.2f}%"
-            profit_sign = (profit_pct > 0) - (profit_pct < 0)
-        else:
-            profit_label = "-"
-            profit_sign = 0
-
-        # 数据返回
-        is_index = type == "指"
-        format_data = {
-            "名称": name,
-            "现价": f"{data["current_price"]:.{precision}f}{arrow}",
-            "涨跌": f"{change:+.{precision}f}",
-            "涨幅": f"{change_pct:+.2f}%",
-            "浮盈": profit_label,
-            "买一": b1_label,
-            "卖一": s1_label,
-            "委比": f"{committee:+.2f}%" if (p_sum + s_sum) > 0 else "-",
-            "成交量": ("-" if is_index and not data["deals_vol"] else format_volume(data["deals_vol"])),
-            "成交额": ("-" if is_index and not data["deals_amt"] else format_amount(data["deals_amt"])),
-            "均价": f"{avg:.{precision}f}",
-            "K线": k_payload}
-        sign = {
-            "名称": 0,
-            "现价": (change > 0) - (change < 0),
-            "涨跌": (change > 0) - (change < 0),
-            "涨幅": (change > 0) - (change < 0),
-            "浮盈": profit_sign,
-            "买一": b1_color_sign,
-            "卖一": s1_color_sign,
-            "委比": (committee > 0) - (committee < 0),
-            "成交量": 0,
-            "成交额": 0,
-            "均价": (avg > data["prev_close"]) - (avg < data["prev_close"]),
-            "K线": 0}
-        # 指数不显示浮盈/买一卖一/委比/均价（均置为"-"）
-        if type == "指":
-            for key in ("浮盈", "买一", "卖一", "委比", "均价"):
-                format_data[key] = "-"
-                sign[key] = 0
-        return format_data, sign
+        self._fit_columns()
 
     def _get_code_info(self, c: str) -> dict:
         return self.codes_list.get(c, {})
 
+    def display_settings(self) -> DisplaySettings:
+        """主线程：生成格式化用的显示参数快照（随刷新任务交给抓取线程，之后修改设置不影响该任务）。"""
+        types, costs = {}, {}
+        for c, e in self.watchlist.items():
+            types[c] = e.get("type") or self._get_code_info(c).get("type")
+            if e.get("cost"):
+                costs[c] = e["cost"]
+        self._display = DisplaySettings(self.type_visible, self.code_visible, self.name_length, types, costs)
+        return self._display
+
     def _refresh_from_function(self):
-        """定时入口：将网络请求丢到后台线程执行，避免阻塞 UI。
-        若上一轮请求尚未完成则跳过本次刷新，防止请求重叠。"""
-        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+        """整表刷新（启动、修改自选 / 显示设置时）：把刷新任务交给常驻抓取线程，避免阻塞 UI。
+        最多 QuoteWorker.MAX_IN_FLIGHT 个请求同时在途，超出时在抓取线程中合并为最新一次；
+        乱序到达的旧结果由抓取线程按序号丢弃，不会覆盖较新的行情。
+        表格尚空（如刚启动）时渐进显示：流式解析出的行先行显示，不必等整轮结束。
+        回放中不发起网络请求（新的显示设置在下一轮回放结果中生效）。"""
+        if self._replay is not None:
+            self.display_settings()
+            return
+        progressive = self.model.rowCount() == 0
+        self._worker.submit(QuoteJob(self.checked_codes, self.data_source, progressive,
+                                     display=self.display_settings()))
+        if self.spark_visible:
+            self._start_backfill()
+        if self.kline_visible and self.kline_days:
+            self._start_daily_update()
+
+    def _start_daily_update(self):
+        """K线列显示多日时，后台补齐日K线缓存（当天已检查过的代码不访问网络）。"""
+        codes = [c for c in self.checked_codes if c not in self._daily_checked]
+        if not codes:
+            return
+        self._daily_checked.update(codes)
+        store = self.daily_store
+
+        def _worker():
+            try:
+                updated = store.update(codes)
+            except Exception:
+                updated = []
+            self.daily_ready.emit(updated)
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _on_daily_ready(self, updated: list):
+        if updated:
+            self.daily_store.forget(updated)   # 新写入的文件：不再沿用“无缓存”的结果
+            self.table.viewport().update()
+
+    def _start_backfill(self):
+        """分时列可见时，后台为尚未回补的自选拉取当日分钟线（当天缓存仍新鲜的直接读盘）；
+        失败或尚无当日分时（如盘前）的代码间隔 BACKFILL_RETRY 秒后由定时刷新再试。"""
+        now = time.monotonic()
+        codes = [c for c in self.checked_codes if c not in self._backfilled and supports_backfill(c)
+                 and self._backfill_retry.get(c, 0) <= now]
+        if not codes:
+            return
+        self._backfilled.update(codes)
+        cache, calendar = self._minute_cache, self._scheduler.calendar
+
+        def _worker():
+            try:
+                result = backfill(codes, cache, calendar=calendar)
+            except Exception:
+                result = {}
+            self.backfill_ready.emit(codes, result)
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _apply_backfill(self, codes: list, result: dict):
+        """主线程：把回补的分钟线并到分时历史之前，之后的实时点照常追加；请求失败的代码稍后再试。"""
+        retry_at = time.monotonic() + self.BACKFILL_RETRY
+        for code in codes:
+            if code not in result:
+                self._backfilled.discard(code)
+                self._backfill_retry[code] = retry_at
+            else:
+                self._backfill_retry.pop(code, None)
+        added = 0
+        for code, (date, points) in result.items():
+            if code in self.watchlist:
+                added += self.history.backfill(code, date, points)
+        if added:
+            self.table.viewport().update()
+
+    def _poll_tick(self):
+        """定时器入口：只请求所属市场正在交易的代码；全部休市时仅按心跳间隔整表刷新。
+        下一次触发时刻由调度器给出（A股交易时段对齐上游快照发布时刻）。"""
+        if self._replay is not None:
             return
-        self._refresh_thread = threading.Thread(
-            target=self._fetch_data_worker,
-            args=(self.checked_codes,),
-            daemon=True,
-        )
-        self._refresh_thread.start()
-
-    def _fetch_data_worker(self, codes: list):
-        """后台线程：执行网络请求，结果经 data_ready 信号回到主线程。"""
+        codes = self.checked_codes
+        active = self._scheduler.plan(codes)
+        if active or not codes:
+            progressive = self.model.rowCount() == 0
+            self._worker.submit(QuoteJob(codes, self.data_source, progressive, active=active,
+                                         display=self.display_settings()))
+        if self.spark_visible:
+            self._start_backfill()
+        if self.isVisible():
+            self.timer.start(max(50, int(self._scheduler.next_delay(codes) * 1000)))
+
+    def fetch_stats(self) -> dict:
+        """抓取线程统计：队列深度 / 已提交 / 已完成 / 合并跳过次数 / 未变化行数；
+        rows_skipped 为最近一轮跳过格式化的行数；model 为表格模型整表重置次数与增量更新的单元格数；
+        layout 为最近一分钟 / 累计的重新布局次数；kline 为K线贴图缓存的命中 / 未命中次数。"""
+        stats = self._worker.stats()
+        stats["rows_skipped"] = self.rows_skipped
+        stats["model"] = {"resets": self.model.resets, "cells_changed": self.model.cells_changed}
+        stats["layout"] = {"per_minute": self._relayouts.rate(), "total": self._relayouts.total}
+        stats["kline"] = self.k_delegate.cache_stats()
+        stats["scheduler"] = self._scheduler.stats()
+        stats["history"] = self.history.stats()
+        stats["recorder"] = self._recorder.stats() if self._recorder is not None else None
+        stats["replay"] = self._replay.stats() if self._replay is not None else None
+        costs = list(self._process_costs)
+        stats["process"] = {"count": len(costs), "p50": percentile(costs, 50), "p95": percentile(costs, 95),
+                            "max": max(costs) if costs else None}
+        return stats
+
+    def _process_data(self, result):
+        """主线程：处理一轮结果（实时抓取或回放）并记录耗时；只处理当前来源的结果——
+        回放中忽略实时结果，回放停止 / 更换后忽略旧回放器仍在队列中的结果（不写入实时日志）。
+        处理完回放结果后通知回放线程交付下一轮。"""
+        replay = self._replay
+        if result.replay is not replay:
+            return
+        t0 = time.perf_counter()
         try:
-            data = request_quote(codes, source=self.data_source)
-            payload = (True, data, None)
-        except requests.exceptions.RequestException:
-            payload = (False, None, "网络请求失败")
-        except Exception as e:
-            payload = (False, None, str(e))
-        self.data_ready.emit(payload)
-
-    def _process_data(self, payload):
-        """主线程：处理请求结果并更新表格。payload = (ok, data, error)"""
-        ok, data, error = payload
-        if not ok:
-            self._show_message(error or "请求失败", is_error=True)
+            self._apply_result(result, replay)
+        finally:
+            if not result.partial:
+                self._process_costs.append(time.perf_counter() - t0)
+            if replay is not None:
+                replay.ack()
+
+    def _apply_result(self, result, replay=None):
+        """处理请求结果并更新表格。result 为 QuoteResult；replay 非空时 result 来自回放。"""
+        if not result.ok:
+            self._show_message(result.error or "请求失败", is_error=True)
             return
+        data = result.data
+
+        # 行已在抓取 / 回放线程中按任务的显示参数快照格式化（未变化的行复用上一轮结果）
+        if result.rows is None:
+            result.format_with(self._formatter, self.display_settings())
+        changed = result.reformatted
+        full_rows = [row.cells for row in result.rows]
+        full_sign = [row.signs for row in result.rows]
+        if not result.partial:
+            self.rows_skipped = len(data) - changed
+            if replay is None:
+                self._scheduler.observe(data, result.requested or ())
+                self.history.record(data)
+                if self._recorder is not None:
+                    self._recorder.record(data)
+            else:
+                self.history.record(data, replay.ts)   # 分时按录制时刻绘制；回放不写入逐笔日志
 
-        full_rows = []
-        full_sign = []
-        for c, d in data.items():
-            entry = self.watchlist.get(c) or {}
-            type_ = entry.get("type") or self._get_code_info(c).get("type")
-            row, sign = self._format_data(c, d, type_)
-            full_rows.append(row)
-            full_sign.append(sign)
-
-        if not self._index_updating:
-            if len(data) > 0:
+        if not self._index_updating and not result.partial:
+            if result.error:
+                self._show_message(result.error, is_error=True)
+            elif len(data) > 0:
                 self._clear_message()
             else:
                 self._show_message("请在设置面板中添加自选股", is_error=True)
-        self._project_columns(full_rows, full_sign)
+
+        # 行集合、列集合与各行内容均未变化时不触碰模型
+        projection = (tuple(data), tuple(h for h in self.ALL_HEADERS if self.header_is_visible(h)))
+        if changed == 0 and projection == self._projection:
+            return
+        self._projection = projection
+        self._project_columns(full_rows, full_sign, list(data))
 
     # ----- 应用设置 -----
     def set_watchlist(self, watchlist: dict):
         """整体替换自选列表（代码 -> {checked, cost, name, type}）"""
         self.watchlist = normalize_watchlist(watchlist)
+        self.history.retain(self.watchlist)
+        self.spark_delegate.retain(self.watchlist)
         self._notify_change()
         self._refresh_from_function()
 
@@ -600,6 +743,17 @@ class FloatLabel(DragBehaviorMixin, QWidget):
         self._notify_change()
         self._refresh_from_function()
 
+    def set_kline_days(self, days: int):
+        """K线列显示的历史天数（0 为只画当日）。"""
+        days = max(0, min(60, int(days)))
+        if days == self.kline_days:
+            return
+        self.kline_days = days
+        self.k_delegate.set_days(days)
+        self._notify_change()
+        self._refresh_from_function()
+        self._defer_fit()
+
     def set_header_visible(self, vis: bool):
         self.header_visible = bool(vis)
         self.table.horizontalHeader().setVisible(self.header_visible)
@@ -613,14 +767,111 @@ class FloatLabel(DragBehaviorMixin, QWidget):
         self._notify_change()
         self.display_flags_changed.emit()
 
-    def set_refresh_interval(self, seconds: int):
+    @classmethod
+    def _clamp_interval(cls, seconds) -> float | None:
+        """刷新间隔（秒，可为小数）限制在 REFRESH_RANGE 内；无法解析返回 None。"""
         try:
-            seconds = max(1, int(seconds))
-        except Exception:
+            seconds = float(seconds)
+        except (TypeError, ValueError):
+            return None
+        lo, hi = cls.REFRESH_RANGE
+        return max(lo, min(hi, seconds))
+
+    def set_refresh_interval(self, seconds: float):
+        seconds = self._clamp_interval(seconds)
+        if seconds is None:
             return
         self.refresh_seconds = seconds
+        self._scheduler.interval = seconds
+        self.history.set_interval(seconds)
         if self.timer is not None:
-            self.timer.setInterval(seconds * 1000)
+            self.timer.setInterval(int(seconds * 1000))
+        self._notify_change()
+
+    def cadence_table(self) -> list[dict]:
+        """各自选代码当前的有效刷新间隔、变化统计与分时缓冲占用（调试视图用）。"""
+        rows = self._scheduler.cadence_table(self.checked_codes)
+        usage = self.history.memory()
+        for row in rows:
+            row["ticks"], row["tick_bytes"] = usage.get(row["code"], (0, 0))
+        return rows
+
+    def open_debug_view(self):
+        if self._debug_dlg is None:
+            self._debug_dlg = DebugDialog(self)
+        self._debug_dlg.show()
+        self._debug_dlg.raise_()
+        self._debug_dlg.activateWindow()
+
+    def set_record_ticks(self, enabled: bool):
+        """开启后每轮完整结果中变化的行情写入当日逐笔日志（见 data.tick_log）。"""
+        self.record_ticks = bool(enabled)
+        if self.record_ticks and self._recorder is None:
+            self._recorder = TickRecorder()
+            self._recorder.start()
+        elif not self.record_ticks and self._recorder is not None:
+            self._recorder.stop()
+            self._recorder = None
+        self._notify_change()
+
+    def start_replay(self, path: str, speed: float = 1):
+        """用逐笔日志 path（见 data.tick_log）代替实时抓取：按录制节奏的 speed 倍速回放（0 为最快），
+        结果与实时刷新一样经 data_ready -> _process_data 更新表格。"""
+        self.stop_replay(resume=False)
+        self.timer.stop()
+        self.history.retain(())        # 分时换成回放当天的数据
+        self._projection = None
+        self._process_costs.clear()
+        self.display_settings()
+        self._replay = ReplayPlayer(path, self.data_ready.emit, speed, on_finished=self.replay_finished.emit,
+                                    display=lambda: self._display)
+        self._show_message(f"回放中：{os.path.basename(path)}（{self._speed_text(speed)}）")
+        self._replay.start()
+
+    def stop_replay(self, resume: bool = True):
+        """停止回放并恢复实时抓取（resume=False 时只停止）。"""
+        if self._replay is None:
+            return
+        self._replay.stop()
+        self._replay = None
+        if resume:
+            self.history.retain(())
+            self._backfilled.clear()
+            self._backfill_retry.clear()
+            self._projection = None
+            self._clear_message()
+            self._refresh_from_function()
+            if self.isVisible():
+                self.timer.start()
+
+    def _on_replay_finished(self):
+        if self._replay is None:
+            return
+        p = self.fetch_stats()["process"]
+        cost = f"，每轮处理 p50 {p['p50'] * 1000:.2f}ms / p95 {p['p95'] * 1000:.2f}ms" if p["count"] else ""
+        self._show_message(f"回放结束：{self._replay.rounds} 轮{cost}")
+
+    @staticmethod
+    def _speed_text(speed: float) -> str:
+        return "最快" if not speed else f"{speed:g}×"
+
+    def _choose_replay(self, speed: float):
+        directory = self._recorder.directory if self._recorder is not None else TickRecorder().directory
+        path, _ = QFileDialog.getOpenFileName(self, "选择行情记录", directory, "行情记录 (*.ticks)")
+        if path:
+            self.start_replay(path, speed)
+
+    def shutdown(self):
+        """退出前调用：停止回放，写完逐笔日志的剩余记录。"""
+        self.stop_replay(resume=False)
+        if self._recorder is not None:
+            self._recorder.stop()
+            self._recorder = None
+
+    def set_market_hours_only(self, enabled: bool):
+        """开启后休市市场不再每次刷新都请求（见 PollScheduler）。"""
+        self.market_hours_only = bool(enabled)
+        self._scheduler.enabled = self.market_hours_only
         self._notify_change()
 
     def set_data_source(self, source: str):
@@ -665,6 +916,7 @@ class FloatLabel(DragBehaviorMixin, QWidget):
         pt = max(5, min(15, int(pt)))
         self.font.setPointSize(pt)
         self.k_delegate.set_point_size(pt)
+        self.spark_delegate.set_point_size(pt)
         self.apply_style()
         self._notify_change()
         self.table.viewport().update()
@@ -686,6 +938,7 @@ class FloatLabel(DragBehaviorMixin, QWidget):
         self.default_color = bool(enabled)
         self.model.set_color_scheme(self.default_color, self.fg)
         self.k_delegate.update_scheme(self.default_color, self.fg)
+        self.spark_delegate.update_scheme(self.default_color, self.fg)
         self.apply_style()
         self._notify_change()
         self._defer_fit()
@@ -790,6 +1043,15 @@ class FloatLabel(DragBehaviorMixin, QWidget):
             sub_cols.addAction(act)
         menu.addMenu(sub_cols)
 
+        sub_days = QMenu("K线天数", menu)
+        for days in self.KLINE_DAY_CHOICES:
+            act = QAction("当日" if days == 0 else f"{days} 日", sub_days, checkable=True)
+            act.setChecked(self.kline_days == days)
+            act.triggered.connect(lambda _checked=False, d=days: self.set_kline_days(d))
+            sub_days.addAction(act)
+        sub_days.setEnabled(self.kline_visible)
+        menu.addMenu(sub_days)
+
         act_header = QAction("显示表头", menu, checkable=True)
         act_header.setChecked(self.header_visible)
         act_header.toggled.connect(self.set_header_visible)
@@ -805,7 +1067,28 @@ class FloatLabel(DragBehaviorMixin, QWidget):
         act_color.toggled.connect(self.set_default_color)
         menu.addAction(act_color)
 
+        act_hours = QAction("休市时降低刷新频率", menu, checkable=True)
+        act_hours.setChecked(self.market_hours_only)
+        act_hours.toggled.connect(self.set_market_hours_only)
+        menu.addAction(act_hours)
+
+        act_record = QAction("记录行情", menu, checkable=True)
+        act_record.setChecked(self.record_ticks)
+        act_record.toggled.connect(self.set_record_ticks)
+        menu.addAction(act_record)
+
+        sub_replay = QMenu("回放行情", menu)
+        for speed in REPLAY_SPEEDS:
+            act = QAction(self._speed_text(speed) + "…", sub_replay)
+            act.triggered.connect(lambda _checked=False, v=speed: self._choose_replay(v))
+            sub_replay.addAction(act)
+        act_stop = QAction("停止回放", sub_replay, triggered=lambda: self.stop_replay())
+        act_stop.setEnabled(self._replay is not None)
+        sub_replay.addAction(act_stop)
+        menu.addMenu(sub_replay)
+
         menu.addSeparator()
+        menu.addAction(QAction("调试信息…", menu, triggered=self.open_debug_view))
         act_open_settings = QAction("设置…", menu)
         if callable(self._open_settings_cb):
             act_open_settings.triggered.connect(self._open_settings_cb)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""K线像素坐标量化与 LRU 贴图缓存的单元测试。"""
+
+import unittest
+
+from stockwidget.core.candle_cache import LruCache, candle_offsets
+
+
+class TestCandleOffsets(unittest.TestCase):
+    def test_scale_includes_prev_close(self):
+        # 刻度 [9, 12]：昨收 9 在底部，最高 12 在顶部
+        self.assertEqual(candle_offsets(10.0, 11.0, 12.0, 10.0, 9.0, 30), (20, 10, 0, 20, 30))
+
+    def test_flat_draws_at_middle(self):
+        self.assertEqual(candle_offsets(5.0, 5.0, 5.0, 5.0, 5.0, 21), (10,) * 5)
+
+    def test_high_low_swapped(self):
+        self.assertEqual(candle_offsets(10.0, 11.0, 10.0, 12.0, 9.0, 30), candle_offsets(10.0, 11.0, 12.0, 10.0, 9.0, 30))
+
+    def test_small_moves_share_pixels(self):
+        a = candle_offsets(10.0, 11.0, 12.0, 10.0, 9.0, 20)
+        b = candle_offsets(10.0, 11.001, 12.0, 10.0, 9.0, 20)
+        self.assertEqual(a, b)
+
+
+class TestLruCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = LruCache(maxsize=2)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+    def test_evicts_least_recently_used(self):
+        cache = LruCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        self.assertEqual((len(cache), cache.evictions), (2, 1))
+
+    def test_clear_keeps_counters(self):
+        cache = LruCache()
+        cache.put("a", 1)
+        cache.get("a")
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
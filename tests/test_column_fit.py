@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""列宽滞回（变宽立即生效 / 变窄延迟生效）与重新布局计数的单元测试。"""
+
+import unittest
+
+from stockwidget.core.column_fit import ColumnFit, RateCounter
+
+
+class TestColumnFit(unittest.TestCase):
+    def test_first_update_and_column_change_adopt_measured(self):
+        fit = ColumnFit(shrink_after=30)
+        self.assertEqual(fit.update([50, 40], now=0), [50, 40])
+        self.assertEqual(fit.update([10, 10, 10], now=1), [10, 10, 10])
+
+    def test_grow_is_immediate(self):
+        fit = ColumnFit(shrink_after=30)
+        fit.update([50, 40], now=0)
+        self.assertEqual(fit.update([60, 40], now=1), [60, 40])
+
+    def test_shrink_waits_and_keeps_pending_max(self):
+        fit = ColumnFit(shrink_after=30)
+        fit.update([60], now=0)
+        self.assertEqual(fit.update([40], now=1), [60])
+        self.assertEqual(fit.update([45], now=20), [60])
+        self.assertEqual(fit.update([42], now=31), [45])     # 收缩到偏窄期间的最大宽度
+
+    def test_shrink_cancelled_by_regrowth(self):
+        fit = ColumnFit(shrink_after=30)
+        fit.update([60], now=0)
+        fit.update([40], now=1)
+        fit.update([60], now=10)                              # 恢复原宽：重新计时
+        self.assertEqual(fit.update([40], now=32), [60])
+        self.assertEqual(fit.update([40], now=62), [40])
+
+    def test_reset(self):
+        fit = ColumnFit(shrink_after=30)
+        fit.update([60], now=0)
+        fit.reset()
+        self.assertEqual(fit.update([40], now=1), [40])
+
+
+class TestRateCounter(unittest.TestCase):
+    def test_window(self):
+        counter = RateCounter(window=60)
+        for t in (0, 10, 50):
+            counter.tick(now=t)
+        self.assertEqual(counter.rate(now=55), 3)
+        self.assertEqual(counter.rate(now=65), 2)
+        self.assertEqual(counter.total, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
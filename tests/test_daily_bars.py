@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""多日日K线列式缓存（追加 / 滚动 / 热启动不请求）的单元测试。"""
+
+import tempfile
+import unittest
+from unittest import mock
+
+from stockwidget.data import daily_bars
+from stockwidget.data.daily_bars import DailyBarStore, parse_klines
+
+
+def bar(day: int, close: float) -> tuple:
+    return (20261000 + day, close - 0.5, close + 1, close - 1, close, 1000.0)
+
+
+class TestDailyBarStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = DailyBarStore(self.tmp.name, capacity=5)
+        self.calls = []
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def fetch(self, code, since=0, limit=120):
+        self.calls.append((code, since))
+        return [b for b in (bar(d, 10.0 + d) for d in range(1, 17)) if b[0] > since]
+
+    def test_parse_klines(self):
+        bars = parse_klines("sh600519", ["2026-10-15,10.0,10.5,10.8,9.9,1234,1e6", "oops"])
+        self.assertEqual(bars, [(20261015, 10.0, 10.8, 9.9, 10.5, 123400.0)])
+
+    def test_warm_start_skips_network(self):
+        with mock.patch.object(daily_bars, "market_today", return_value=20261016):
+            self.assertEqual(self.store.update(["sh600519"], fetch=self.fetch), ["sh600519"])
+            self.assertEqual(self.store.update(["sh600519"], fetch=self.fetch), [])
+        self.assertEqual(self.calls, [("sh600519", 0)])
+        bars = self.store.bars("sh600519")
+        self.assertEqual(list(bars.column("date")), [20261011.0, 20261012.0, 20261013.0, 20261014.0, 20261015.0])
+        self.assertEqual(bars.tail(1), [(24.5, 26.0, 24.0, 25.0)])     # 只存已收盘的交易日
+
+    def test_next_day_appends_and_rolls(self):
+        with mock.patch.object(daily_bars, "market_today", return_value=20261014):
+            self.store.update(["sh600519"], fetch=self.fetch)
+        bars = self.store.bars("sh600519")                     # 读取方先持有 mmap
+        self.assertEqual(len(bars), 5)
+        with mock.patch.object(daily_bars, "market_today", return_value=20261016):
+            self.store.update(["sh600519"], fetch=self.fetch)
+        self.assertEqual(self.calls, [("sh600519", 0), ("sh600519", 20261013)])  # 只请求上次之后的
+        self.assertEqual(list(bars.column("date")), [20261011.0, 20261012.0, 20261013.0, 20261014.0, 20261015.0])
+        self.assertEqual(bars.tail(1), [(24.5, 26.0, 24.0, 25.0)])
+        self.assertEqual(bars.checked, 20261016)
+
+    def test_missing_file_is_remembered_until_forgotten(self):
+        with mock.patch.object(daily_bars, "DailyBars", side_effect=OSError) as opened:
+            self.assertIsNone(self.store.bars("gnky"))
+            self.assertIsNone(self.store.bars("gnky"))             # 重绘不再重复打开文件
+        self.assertEqual(opened.call_count, 1)
+        self.assertIsNone(self.store.bars("sh600519"))          # 尚未下载
+        with mock.patch.object(daily_bars, "market_today", return_value=20261016):
+            updated = self.store.update(["sh600519"], fetch=self.fetch)
+        self.assertIsNone(self.store.bars("sh600519"))
+        self.store.forget(updated)
+        self.assertEqual(len(self.store.bars("sh600519")), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""上游健康度（延迟分位数 / 降级与恢复 / 熔断与自适应超时）的单元测试。"""
+
+import unittest
+
+from stockwidget.data.health import HostHealth, LatencyWindow, SourceHealth
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLatencyWindow(unittest.TestCase):
+    def test_percentile(self):
+        w = LatencyWindow(size=100)
+        self.assertIsNone(w.percentile(95))
+        for i in range(1, 101):
+            w.add(i / 100)
+        self.assertAlmostEqual(w.percentile(50), 0.5, delta=0.02)
+        self.assertAlmostEqual(w.percentile(95), 0.95, delta=0.02)
+
+    def test_window_is_bounded(self):
+        w = LatencyWindow(size=3)
+        for v in (10, 1, 1, 1):
+            w.add(v)
+        self.assertEqual(w.percentile(100), 1)
+
+
+class TestSourceHealth(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.h = SourceHealth(self.clock)
+
+    def test_hedge_delay_tracks_p95(self):
+        self.assertEqual(self.h.hedge_delay(), SourceHealth.DEFAULT_HEDGE_DELAY)
+        for _ in range(20):
+            self.h.record_success(0.4)
+        self.assertAlmostEqual(self.h.hedge_delay(), 0.4)
+
+    def test_demote_and_reprobe(self):
+        for _ in range(SourceHealth.DEMOTE_AFTER):
+            self.h.record_failure()
+        self.assertTrue(self.h.is_demoted())
+        self.clock.now += SourceHealth.BASE_BACKOFF + 1
+        self.assertFalse(self.h.is_demoted())           # 到期后重新试探
+        for _ in range(SourceHealth.DEMOTE_AFTER):
+            self.h.record_failure()
+        self.clock.now += SourceHealth.BASE_BACKOFF + 1
+        self.assertTrue(self.h.is_demoted())            # 再次失败：退避翻倍
+        self.h.record_success(0.1)
+        self.assertFalse(self.h.is_demoted())
+
+
+class TestHostHealth(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.h = HostHealth(self.clock, rand=lambda: 0.0)
+
+    def test_adaptive_timeout(self):
+        self.assertEqual(self.h.timeout_for(3), 3)         # 样本不足：默认超时
+        for _ in range(HostHealth.MIN_SAMPLES):
+            self.h.record_success(0.5)
+        self.assertAlmostEqual(self.h.timeout_for(3), 1.5)
+        fast = HostHealth(self.clock)
+        for _ in range(HostHealth.MIN_SAMPLES):
+            fast.record_success(0.05)
+        self.assertEqual(fast.timeout_for(3), HostHealth.MIN_TIMEOUT)
+
+    def test_circuit_opens_and_half_opens(self):
+        for _ in range(HostHealth.FAIL_THRESHOLD):
+            self.assertTrue(self.h.allow())
+            self.h.record_failure()
+        self.assertEqual(self.h.state, HostHealth.OPEN)
+        self.assertFalse(self.h.allow())
+        self.clock.now += HostHealth.BASE_BACKOFF
+        self.assertTrue(self.h.allow())                   # 半开放：只放行一个试探
+        self.assertFalse(self.h.allow())
+        self.h.record_failure()                           # 试探失败：退避翻倍
+        self.clock.now += HostHealth.BASE_BACKOFF
+        self.assertFalse(self.h.allow())
+        self.clock.now += HostHealth.BASE_BACKOFF
+        self.assertTrue(self.h.allow())
+        self.h.record_success(0.1)
+        self.assertEqual(self.h.state, HostHealth.CLOSED)
+        self.assertGreater(self.h.error_rate(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""共享 HTTP 客户端（按主机超时 / 计数 / 共享实例 / 流式结算）的单元测试：以桩 Session 代替网络。"""
+
+import itertools
+import unittest
+
+import requests
+
+from stockwidget.data import http_client
+from stockwidget.data.http_client import DEFAULT_TIMEOUT, CircuitOpenError, HttpClient, host_health, shared_client
+
+_hosts = itertools.count()
+
+
+def fresh_host() -> str:
+    """每个用例用独立主机名：健康度是进程内共享的。"""
+    return f"h{next(_hosts)}.test"
+
+
+class _StubResponse:
+    def __init__(self, body: bytes = b"", status: int = 200, fail_after: int | None = None):
+        self.status_code = status
+        self.content = body
+        self._fail_after = fail_after   # 产出这么多块后抛 ChunkedEncodingError
+        self.closed = False
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        for i, start in enumerate(range(0, len(self.content), chunk_size)):
+            if self._fail_after is not None and i >= self._fail_after:
+                raise requests.exceptions.ChunkedEncodingError("连接中断")
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class _StubSession:
+    def __init__(self, response):
+        self.response = response
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+    def close(self):
+        pass
+
+
+def make_client(response, timeouts=None) -> HttpClient:
+    client = HttpClient(timeouts=timeouts)
+    client._session = _StubSession(response)
+    return client
+
+
+class TestHttpClient(unittest.TestCase):
+    def test_per_host_timeout(self):
+        host, other = fresh_host(), fresh_host()
+        client = make_client(_StubResponse(b"ok"), timeouts={host: 3})
+        client.get(f"http://{host}/q")
+        client.get(f"http://{other}/q")
+        client.get(f"http://{host}/q", timeout=1.5)              # 调用方上限更紧时取调用方的
+        self.assertEqual([kw["timeout"] for _, kw in client._session.calls], [3, DEFAULT_TIMEOUT, 1.5])
+
+    def test_timeout_tightens_with_measured_latency(self):
+        host = fresh_host()
+        health = host_health(host)
+        for _ in range(health.MIN_SAMPLES):
+            health.record_success(0.1)
+        client = make_client(_StubResponse(b"ok"), timeouts={host: 3})
+        self.assertEqual(client.timeout_for(host), health.MIN_TIMEOUT)   # p99 × 3 = 0.3 秒，取下限
+
+    def test_counters(self):
+        host = fresh_host()
+        client = make_client(_StubResponse(b"x" * 10), timeouts={})
+        client.get(f"http://{host}/a")
+        client.get(f"http://{host}/b")
+        client._session.response = _StubResponse(b"busy", status=503)
+        client.get(f"http://{host}/c")
+        client._session.response = requests.exceptions.ConnectTimeout("超时")
+        with self.assertRaises(requests.exceptions.ConnectTimeout):
+            client.get(f"http://{host}/d")
+        s = client.stats()[host]
+        self.assertEqual((s["requests"], s["errors"], s["bytes"]), (4, 2, 24))
+        self.assertEqual(s["health"]["state"], "closed")
+
+    def test_open_circuit_rejects_without_sending(self):
+        host = fresh_host()
+        client = make_client(requests.exceptions.ConnectionError("拒绝连接"))
+        for _ in range(host_health(host).FAIL_THRESHOLD):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                client.get(f"http://{host}/q")
+        sent = len(client._session.calls)
+        with self.assertRaises(CircuitOpenError):
+            client.get(f"http://{host}/q")
+        self.assertEqual(len(client._session.calls), sent)
+
+    def test_shared_client_is_reused(self):
+        saved, http_client._shared = http_client._shared, None
+        try:
+            first = shared_client()
+            self.assertIs(shared_client(), first)
+            self.assertIsInstance(first, HttpClient)
+        finally:
+            http_client._shared = saved
+            if first is not saved:
+                first.close()
+
+
+class TestStreamAccounting(unittest.TestCase):
+    def test_counted_after_body_consumed(self):
+        host = fresh_host()
+        client = make_client(_StubResponse(b"x" * 100))
+        with client.get(f"http://{host}/q", stream=True) as resp:
+            self.assertNotIn(host, client.stats())          # 只收到响应头：尚未结算
+            blocks = list(resp.iter_content(30))
+        self.assertEqual(b"".join(blocks), b"x" * 100)
+        s = client.stats()[host]
+        self.assertEqual((s["requests"], s["errors"], s["bytes"]), (1, 0, 100))
+
+    def test_mid_body_error_counts_as_failure(self):
+        host = fresh_host()
+        client = make_client(_StubResponse(b"x" * 100, fail_after=2))
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            with client.get(f"http://{host}/q", stream=True) as resp:
+                for _ in resp.iter_content(30):
+                    pass
+        s = client.stats()[host]
+        self.assertEqual((s["requests"], s["errors"], s["bytes"]), (1, 1, 60))
+        self.assertEqual(host_health(host).failures, 1)
+
+    def test_closed_early_settles_once(self):
+        host = fresh_host()
+        stub = _StubResponse(b"x" * 100)
+        client = make_client(stub)
+        with client.get(f"http://{host}/q", stream=True) as resp:
+            next(resp.iter_content(30))
+        self.assertTrue(stub.closed)
+        s = client.stats()[host]
+        self.assertEqual((s["requests"], s["errors"], s["bytes"]), (1, 0, 30))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""当日分钟线回补（解析 / 按日缓存 / 并入分时历史）的单元测试。"""
+
+import os
+import tempfile
+import unittest
+
+from stockwidget.core.tick_history import TickHistory
+from stockwidget.data.intraday import MinuteBarCache, backfill, parse_trends
+
+TRENDS = ["2026-10-16 09:30,10.00,10.00,10.00,10.00,100,100000.0,10.00",
+          "2026-10-16 09:31,10.00,10.10,10.10,10.00,50,50500.0,10.03",
+          "bad row"]
+
+
+class TestParseTrends(unittest.TestCase):
+    def test_cumulative_volume_and_timestamp(self):
+        date, points = parse_trends("sh600519", TRENDS)
+        self.assertEqual(date, "2026-10-16")
+        self.assertEqual([p[1:] for p in points], [(10.0, 10000.0, 100000.0), (10.1, 15000.0, 150500.0)])
+        self.assertEqual(points[1][0] - points[0][0], 60)
+        self.assertEqual(points[0][0], 1792114200)    # 2026-10-16 09:30 北京时间
+
+
+class TestBackfill(unittest.TestCase):
+    NOON = 1792123200           # 2026-10-16 12:00 北京时间（午休，上午时段已走完）
+    AFTERNOON = 1792130400      # 2026-10-16 14:00 北京时间
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = MinuteBarCache(self.tmp.name)
+        self.calls = []
+        self.trends = TRENDS
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fetch(self, code):
+        self.calls.append(code)
+        if code == "sz000001":
+            raise OSError("timeout")
+        return parse_trends(code, self.trends)
+
+    def run_backfill(self, codes, day="2026-10-16", now=NOON):
+        return backfill(codes, self.cache, day, fetch=self.fetch, now=now)
+
+    def test_restart_reads_from_disk(self):
+        self.trends = TRENDS + ["2026-10-16 11:30,10.10,10.20,10.20,10.10,10,10200.0,10.05"]
+        codes = ["sh600519", "sz000001", "usaapl"]
+        first = self.run_backfill(codes)
+        self.assertEqual(list(first), ["sh600519"])            # 失败 / 不支持的代码不在结果中
+        self.assertEqual(self.calls, ["sh600519", "sz000001"])
+        self.calls.clear()
+        again = self.run_backfill(codes)
+        self.assertEqual(self.calls, ["sz000001"])             # 已缓存且新鲜的代码不再请求
+        self.assertEqual(again["sh600519"], first["sh600519"])
+
+    def test_stale_cache_is_refetched(self):
+        # 缓存只到 09:31，14:00 重启：中间有交易，重新请求补上空档
+        self.run_backfill(["sh600519"], now=self.AFTERNOON)
+        self.calls.clear()
+        self.run_backfill(["sh600519"], now=self.AFTERNOON)
+        self.assertEqual(self.calls, ["sh600519"])
+
+    def test_empty_or_other_day_not_cached(self):
+        self.trends = []
+        self.assertEqual(self.run_backfill(["sh600519"]), {})
+        self.trends = TRENDS                                   # 盘前拿到的是上一交易日的分时
+        self.assertEqual(self.run_backfill(["sh600519"], day="2026-10-17"), {})
+        self.assertEqual(os.listdir(self.tmp.name) if os.path.isdir(self.tmp.name) else [], [])
+
+    def test_new_day_drops_old_file(self):
+        self.run_backfill(["sh600519"])
+        self.trends = [row.replace("10-16", "10-19") for row in TRENDS]
+        self.run_backfill(["sh600519"], day="2026-10-19", now=self.NOON + 3 * 86400)
+        self.assertEqual(os.listdir(self.tmp.name), ["minute_2026-10-19.json"])
+
+    def test_merged_before_live_ticks(self):
+        date, points = parse_trends("sh600519", TRENDS)
+        history = TickHistory(capacity=16)
+        live = {"current_price": 10.2, "deals_vol": 20000, "deals_amt": 2e5, "date": "2026-10-16"}
+        history.record({"sh600519": live}, now=points[1][0] + 30)
+        self.assertEqual(history.backfill("sh600519", date, points), 2)
+        ring = history.ring("sh600519")
+        self.assertEqual([p for seg in ring.segments() for p in seg[1]], [10.0, 10.1, 10.2])
+        self.assertEqual(history.record({"sh600519": live}), 0)     # 同一行情对象仍不重复追加
+        self.assertEqual(history.backfill("sh600519", "2026-10-15", points), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
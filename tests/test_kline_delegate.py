@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""K线单元格委托的贴图缓存测试：多日K线同样命中 LRU 贴图缓存（需要 PySide6）。"""
+
+import os
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+try:
+    from PySide6.QtWidgets import QApplication
+except ImportError:      # 未安装 PySide6 的环境只跑纯逻辑测试
+    QApplication = None
+
+
+class _Bars:
+    def __init__(self, rows, last_date):
+        self.rows, self.dates = rows, [20261000.0 + i for i in range(len(rows) - 1)] + [last_date]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def tail(self, n):
+        return self.rows[-n:]
+
+    def column(self, name):
+        return self.dates
+
+
+class _Store:
+    def __init__(self):
+        self.items = {}
+
+    def bars(self, code):
+        return self.items.get(code)
+
+
+@unittest.skipIf(QApplication is None, "需要 PySide6")
+class TestStripCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        from PySide6.QtCore import QRect
+        from PySide6.QtGui import QPixmap
+        from PySide6.QtWidgets import QStyleOptionViewItem
+        from stockwidget.ui.table_model import KLineDelegate, SimpleTableModel
+
+        self.store = _Store()
+        self.store.items["sh600519"] = _Bars([(10.0, 11.0, 9.5, 10.5), (10.5, 12.0, 10.0, 11.5)], 20261015.0)
+        self.model = SimpleTableModel(headers=["K线"])
+        self.delegate = KLineDelegate(store=self.store)
+        self.delegate.set_days(2)
+        self.target = QPixmap(60, 20)
+        self.option = QStyleOptionViewItem()
+        self.option.rect = QRect(0, 0, 60, 20)
+
+    def paint(self, current):
+        from PySide6.QtGui import QPainter
+        k = (11.5, current, 12.2, 11.2, 11.5)
+        self.model.set_rows_headers([[{"k": k, "days": "sh600519"}]], ["K线"], [[0]])
+        painter = QPainter(self.target)
+        self.delegate.paint(painter, self.option, self.model.index(0, 0))
+        painter.end()
+
+    def test_strip_is_cached(self):
+        self.paint(11.8)
+        self.paint(11.8001)                               # 同一像素：命中
+        self.assertEqual((self.delegate.cache.misses, self.delegate.cache.hits), (1, 1))
+        self.store.items["sh600519"].dates[-1] = 20261016.0   # 新的一天写入：重画
+        self.paint(11.8)
+        self.assertEqual((self.delegate.cache.misses, self.delegate.cache.hits), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""锁相轮询（上游发布周期 / 相位估计）的单元测试。"""
+
+import unittest
+
+from stockwidget.core.phase_lock import PhaseLock, seconds_of_day
+
+WALL0 = 7200.0      # 北京时间 10:00:00 对应的 time.time()
+PERIOD, PHASE, LAG = 3, 1, 0.3   # 上游每 3 秒发布（发布时刻秒数 %3 == 1），0.3 秒后可取到
+
+
+def latest_publish(wall: float) -> int:
+    """wall 时刻能取到的最新发布时刻（北京时间当天秒数）。"""
+    sod = 36000 + (wall - WALL0) - LAG
+    return int((sod - PHASE) // PERIOD) * PERIOD + PHASE
+
+
+class TestPhaseLock(unittest.TestCase):
+    def test_seconds_of_day(self):
+        self.assertEqual(seconds_of_day("10:00:01"), 36001)
+        self.assertIsNone(seconds_of_day(""))
+
+    def warm_up(self, lock: PhaseLock) -> float:
+        wall = WALL0 + 0.5
+        for _ in range(30):            # 先按 1 秒固定间隔轮询
+            lock.observe(latest_publish(wall), wall)
+            wall += 1
+        return wall
+
+    def test_estimates_period_and_phase(self):
+        lock = PhaseLock()
+        wall = self.warm_up(lock)
+        period, phase, lag = lock.estimate(wall)
+        self.assertEqual((period, phase), (PERIOD, PHASE))
+        self.assertAlmostEqual(lag, 0.5)
+
+    def test_locked_polling_is_fresher_and_cheaper(self):
+        fixed, locked = PhaseLock(), PhaseLock()
+        wall = self.warm_up(fixed)
+        self.warm_up(locked)
+        # 固定 1 秒轮询 60 秒
+        for i in range(60):
+            fixed.observe(latest_publish(wall + i), wall + i)
+        # 锁相轮询 60 秒
+        t, requests = wall, 0
+        while t < wall + 60:
+            locked.observe(latest_publish(t), t)
+            requests += 1
+            t += locked.next_delay(t, 1.0)
+        self.assertLessEqual(requests, 21)
+        self.assertLess(locked.stats(t)["staleness_p50"], fixed.stats(wall + 60)["staleness_p50"])
+        self.assertLess(locked.stats(t)["staleness_p50"], 1.0)
+
+    def test_never_faster_than_interval(self):
+        lock = PhaseLock()
+        wall = self.warm_up(lock)
+        for i in range(30):
+            self.assertGreaterEqual(lock.next_delay(wall + i / 10, 1.0), 1.0)
+            self.assertGreaterEqual(lock.next_delay(wall + i / 10, 2.0), 2.0)
+
+    def test_unlocks_when_publishing_stops(self):
+        lock = PhaseLock()
+        wall = self.warm_up(lock)
+        self.assertIsNotNone(lock.next_delay(wall, 1.0))
+        self.assertIsNone(lock.next_delay(wall + lock.STALE_AFTER + 1, 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
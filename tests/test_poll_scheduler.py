@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""按交易时段 / 自适应节奏 / 锁相决定刷新代码的调度器单元测试。"""
+
+import unittest
+from datetime import datetime, timezone
+
+from stockwidget.core.poll_scheduler import PollScheduler
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class TestPollScheduler(unittest.TestCase):
+    def setUp(self):
+        self.t = 0.0
+        self.now = utc(2026, 10, 16, 14, 0)    # 北京 22:00：A股 / 港股休市，期货夜盘中
+        self.sched = PollScheduler(heartbeat=60, clock=lambda: self.t, now=lambda: self.now)
+
+    def test_closed_markets_left_out(self):
+        codes = ["sh600519", "hk00700", "au0"]
+        self.assertEqual(self.sched.plan(codes), codes)          # 首轮整表
+        self.t = 1
+        self.assertEqual(self.sched.plan(codes), ["au0"])
+        self.t = 61
+        self.assertEqual(self.sched.plan(codes), codes)          # 心跳
+
+    def test_all_closed_is_idle_until_heartbeat(self):
+        codes = ["sh600519", "hk00700"]
+        self.sched.plan(codes)
+        self.t = 1
+        self.assertEqual(self.sched.plan(codes), [])
+        self.assertEqual(self.sched.plan(codes + ["sz000001"]), ["sz000001"])   # 新代码照常请求一次
+        self.assertEqual(self.sched.stats()["idle_ticks"], 1)
+
+    def test_disabled_requests_closed_markets(self):
+        self.sched.enabled = False
+        self.sched.plan(["sh600519"])
+        self.t = 1
+        self.assertEqual(self.sched.plan(["sh600519"]), ["sh600519"])
+
+
+class TestAdaptiveCadence(unittest.TestCase):
+    def setUp(self):
+        self.t = 0.0
+        now = utc(2026, 10, 16, 2, 0)           # 北京 10:00，A股交易中
+        self.sched = PollScheduler(heartbeat=60, interval=1, clock=lambda: self.t, now=lambda: now)
+
+    def tick(self, codes, quotes):
+        active = self.sched.plan(codes)
+        self.sched.observe(dict(quotes), active)
+        self.t += 1
+        return active
+
+    def test_quiet_code_backs_off_and_snaps_back(self):
+        codes = ["sh600519", "sh600000"]
+        quotes = {"sh600519": {"time": "10:00:00", "current_price": 10.0},
+                  "sh600000": {"time": "09:30:00", "current_price": 8.0}}   # 停牌：时间不变
+        polled = []
+        for i in range(20):
+            quotes["sh600519"] = {"time": f"10:00:{i:02d}", "current_price": 10.0 + i / 100}
+            polled.append(self.tick(codes, quotes))
+        self.assertTrue(all("sh600519" in p for p in polled))
+        quiet = sum("sh600000" in p for p in polled)
+        self.assertLess(quiet, 10)
+        self.assertGreater(self.sched.cadence("sh600000"), 4)
+        self.assertEqual(self.sched.cadence("sh600519"), 1)
+
+        # 出现变化：下一次被请求后恢复原频率
+        quotes["sh600000"] = {"time": "10:00:20", "current_price": 8.1}
+        while "sh600000" not in self.tick(codes, quotes):
+            pass
+        self.assertEqual(self.sched.cadence("sh600000"), 1)
+        table = {r["code"]: r for r in self.sched.cadence_table(codes)}
+        self.assertEqual(table["sh600000"]["changes"], 1)
+
+    def test_each_job_observes_only_its_own_codes(self):
+        codes = ["sh600519", "sh600000"]
+        old = {"sh600519": {"time": "10:00:00", "current_price": 10.0},
+               "sh600000": {"time": "10:00:00", "current_price": 8.0}}
+        self.sched.observe(old, codes)
+        # 两个任务同时在途：先到的任务只请求了 sh600519，其结果中 sh600000 是沿用的旧行情
+        new = {"sh600519": {"time": "10:00:01", "current_price": 10.1}, "sh600000": old["sh600000"]}
+        for _ in range(self.sched.BACKOFF_AFTER + 1):
+            self.sched.observe(new, ["sh600519"])
+        table = {r["code"]: r for r in self.sched.cadence_table(codes)}
+        self.assertEqual((table["sh600000"]["observations"], table["sh600000"]["streak"]), (1, 0))
+        self.assertEqual(self.sched.cadence("sh600000"), 1)
+
+    def test_backoff_applies_when_disabled(self):
+        self.sched.enabled = False
+        codes = ["sh600000"]
+        quotes = {"sh600000": {"time": "09:30:00", "current_price": 8.0}}
+        polled = [self.tick(codes, quotes) for _ in range(20)]
+        self.assertLess(sum(bool(p) for p in polled), 10)
+        self.assertGreater(self.sched.cadence("sh600000"), 4)
+
+
+class _FixedPhase:
+    """锁相桩：总在 2.5 秒后发布。"""
+
+    def next_delay(self, now_wall, interval):
+        return 2.5
+
+
+class TestPhaseScheduling(unittest.TestCase):
+    def setUp(self):
+        self.t = 0.0
+        now = utc(2026, 10, 16, 2, 0)           # 北京 10:00，A股 / 港股均在交易
+        self.sched = PollScheduler(heartbeat=60, interval=1, clock=lambda: self.t, now=lambda: now,
+                                   wall=lambda: self.t)
+        self.sched.phase = _FixedPhase()
+
+    def test_a_share_only_follows_phase(self):
+        self.sched.plan(["sh600519"])
+        self.assertEqual(self.sched.next_delay(["sh600519"]), 2.5)
+
+    def test_other_markets_keep_configured_interval(self):
+        codes = ["sh600519", "hk00700"]
+        polled, delays = [], []
+        for t in (0, 1, 2, 2.5, 3.5):
+            self.t = t
+            polled.append(self.sched.plan(codes))
+            delays.append(self.sched.next_delay(codes))
+        self.assertEqual(polled, [codes, ["hk00700"], ["hk00700"], codes, ["hk00700"]])
+        self.assertEqual(delays, [1, 1, 0.5, 1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""常驻行情抓取线程（任务合并 / 统计）的单元测试。"""
+
+import threading
+import unittest
+
+from stockwidget.core.row_format import DisplaySettings
+from stockwidget.data.http_client import shared_client
+from stockwidget.data.quote_worker import QuoteJob, QuoteResult, QuoteWorker
+from stockwidget.data.quotes import _Z5, Quote, QuoteBatch
+
+
+class TestQuoteWorker(unittest.TestCase):
+    def setUp(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.fetched = []
+        self.results = []
+
+        def fetch(codes, source, client, sink=None):
+            self.fetched.append(list(codes))
+            self.started.set()
+            self.gate.wait(2)
+            return QuoteBatch({c: {"name": c} for c in codes})
+
+        def on_result(result):
+            self.results.append(result)
+            if len(self.results) == 2:
+                self.done.set()
+
+        self.worker = QuoteWorker(on_result, fetch=fetch, max_in_flight=1)
+        self.worker.start()
+
+    def tearDown(self):
+        self.gate.set()
+        self.worker.stop()
+
+    def test_pending_jobs_are_coalesced_to_latest(self):
+        self.worker.submit(QuoteJob(["sh600519"], "sina"))
+        self.assertTrue(self.started.wait(2))
+        # 第一轮请求阻塞期间连续提交：只保留最新一次
+        self.worker.submit(QuoteJob(["sz000001"], "sina"))
+        self.worker.submit(QuoteJob(["hk00700"], "sina"))
+        self.assertEqual(self.worker.queue_depth(), 2)
+        self.gate.set()
+        self.assertTrue(self.done.wait(2))
+        self.assertEqual(self.fetched, [["sh600519"], ["hk00700"]])
+        stats = self.worker.stats()
+        self.assertEqual(stats["submitted"], 3)
+        self.assertEqual(stats["skipped"], 1)
+        self.assertTrue(all(r.ok for r in self.results))
+
+
+class TestSharedClient(unittest.TestCase):
+    def test_uses_shared_client_and_reports_its_counters(self):
+        worker = QuoteWorker(lambda result: None)
+        self.assertIs(worker.client, shared_client())
+        self.assertEqual(worker.stats()["http"], shared_client().stats())
+
+
+class TestPipelining(unittest.TestCase):
+    def test_out_of_order_result_is_dropped(self):
+        slow, started, done = threading.Event(), threading.Event(), threading.Event()
+        results = []
+
+        def fetch(codes, source, client, sink=None):
+            if codes == ["old"]:
+                started.set()
+                slow.wait(2)           # 第一轮响应慢于第二轮
+            return QuoteBatch({c: {"name": c} for c in codes})
+
+        def on_result(result):
+            results.append(result)
+            done.set()
+
+        worker = QuoteWorker(on_result, fetch=fetch, max_in_flight=2)
+        worker.start()
+        try:
+            worker.submit(QuoteJob(["old"], "sina"))
+            self.assertTrue(started.wait(2))
+            worker.submit(QuoteJob(["new"], "sina"))
+            self.assertTrue(done.wait(2))
+            slow.set()
+            for _ in range(200):
+                if worker.stats()["completed"] == 2:
+                    break
+                threading.Event().wait(0.01)
+        finally:
+            worker.stop()
+        self.assertEqual([(r.seq, list(r.data)) for r in results], [(2, ["new"])])
+        self.assertEqual(worker.stats()["stale_dropped"], 1)
+
+    def test_partial_after_final_of_same_job_is_dropped(self):
+        # 对冲落败的分段在完整结果交付后仍可能回调渐进结果，不能让表格退回部分行
+        results = []
+        worker = QuoteWorker(results.append)
+        worker._deliver(QuoteResult(True, {"a": {}}, partial=True, seq=1))
+        worker._deliver(QuoteResult(True, {"a": {}, "b": {}}, seq=1))
+        worker._deliver(QuoteResult(True, {"b": {}}, partial=True, seq=1))
+        worker._deliver(QuoteResult(True, {"a": {}}, partial=True, seq=2))
+        self.assertEqual([(r.seq, r.partial, sorted(r.data)) for r in results],
+                         [(1, True, ["a"]), (1, False, ["a", "b"]), (2, True, ["a"])])
+        self.assertEqual(worker.stats()["stale_dropped"], 1)
+
+
+class TestUnchangedRows(unittest.TestCase):
+    def test_reused_entries_counted_as_unchanged(self):
+        same, first, done = {"name": "same"}, threading.Event(), threading.Event()
+        ticks = iter([{"sh600519": same, "sz000001": {"name": "a"}},
+                      {"sh600519": same, "sz000001": {"name": "b"}}])
+        results = []
+
+        def on_result(result):
+            results.append(result)
+            (first if len(results) == 1 else done).set()
+
+        worker = QuoteWorker(on_result, fetch=lambda codes, source, client, sink=None: QuoteBatch(next(ticks)))
+        worker.start()
+        try:
+            worker.submit(QuoteJob(["sh600519", "sz000001"], "sina"))
+            self.assertTrue(first.wait(2))
+            worker.submit(QuoteJob(["sh600519", "sz000001"], "sina"))
+            self.assertTrue(done.wait(2))
+        finally:
+            worker.stop()
+        stats = worker.stats()
+        self.assertEqual(stats["unchanged_rows"], 1)
+        self.assertEqual(stats["unchanged_total"], 1)
+
+
+class TestActiveCodes(unittest.TestCase):
+    def test_inactive_codes_keep_last_rows(self):
+        results, fetched, got = [], [], threading.Event()
+
+        def fetch(codes, source, client, sink=None):
+            fetched.append(list(codes))
+            return QuoteBatch({c: {"name": c, "tick": len(fetched)} for c in codes})
+
+        def on_result(result):
+            results.append(result)
+            got.set()
+
+        worker = QuoteWorker(on_result, fetch=fetch)
+        worker.start()
+        try:
+            for active in (None, ["au0"]):
+                got.clear()
+                worker.submit(QuoteJob(["sh600519", "au0"], "sina", active=active))
+                self.assertTrue(got.wait(2))
+        finally:
+            worker.stop()
+        self.assertEqual(fetched, [["sh600519", "au0"], ["au0"]])
+        data = results[-1].data
+        self.assertEqual(list(data), ["sh600519", "au0"])
+        self.assertEqual((data["sh600519"]["tick"], data["au0"]["tick"]), (1, 2))
+        self.assertEqual(results[-1].requested, ["au0"])       # 沿用上一轮的代码不算本轮请求
+
+
+class TestFormatting(unittest.TestCase):
+    def test_rows_formatted_with_job_snapshot(self):
+        q = Quote("贵州茅台", 1500.0, 1499.0, 1510.5, 1520.0, 1495.0, 2345600, 3.5e9,
+                  _Z5, _Z5, _Z5, _Z5, "2026-10-16", "09:30:03")
+        results, got = [], threading.Event()
+
+        def on_result(result):
+            results.append(result)
+            got.set()
+
+        worker = QuoteWorker(on_result, fetch=lambda codes, source, client, sink=None: QuoteBatch({"sh600519": q}))
+        worker.start()
+        try:
+            for name_length in (2, -1):
+                got.clear()
+                display = DisplaySettings(False, False, name_length, {}, {})
+                worker.submit(QuoteJob(["sh600519"], "sina", display=display))
+                self.assertTrue(got.wait(2))
+            got.clear()
+            worker.submit(QuoteJob(["sh600519"], "sina"))
+            self.assertTrue(got.wait(2))
+        finally:
+            worker.stop()
+        self.assertEqual([r.rows[0].cells[0] for r in results[:2]], ["贵州", "贵州茅台"])
+        self.assertEqual([r.reformatted for r in results[:2]], [1, 1])
+        self.assertIsNone(results[2].rows)        # 未带快照的任务不格式化
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""行情层（新浪解析 / 分段请求 / 按市场路由）的单元测试（不访问网络）。"""
+
+import threading
+import unittest
+from unittest import mock
+
+from stockwidget.data import quotes
+from stockwidget.data.quote_router import QuoteRouter, build_routes, group_by_source
+from stockwidget.data.quotes import PayloadCache, fetch_quotes, iter_sina, parse_sina, split_chunks
+
+SINA_RAW = "\n".join([
+    'var hq_str_sh600519="贵州茅台,1500.00,1499.00,1510.50,1520.00,1495.00,1510.40,1510.50,'
+    '2345678,3541234567.00,100,1510.40,200,1510.30,300,1510.20,400,1510.10,500,1510.00,'
+    '150,1510.50,250,1510.60,350,1510.70,450,1510.80,550,1510.90,2026-10-16,15:00:00,00,";',
+    'var hq_str_sh000001="上证指数,3200.00,3190.00,3210.00,3215.00,3188.00,0,0,'
+    '123456,456789012.00,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,2026-10-16,15:00:00,00,";',
+    'var hq_str_rt_hk00700="TENCENT,腾讯控股,480.000,478.000,485.000,476.000,483.200,5.200,'
+    '1.088,483.000,483.200,9876543210.000,20456789,0,0,652,310,2026/10/16,16:08:00,";',
+    'var hq_str_gb_aapl="苹果,230.10,0.50,2026-10-16 04:00:00,1.15,229.00,231.00,228.50,'
+    '0,0,45678901,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,228.95,0,0,0,10500000000.00";',
+    'var hq_str_nf_AU0="黄金连续,143000,560.00,565.00,558.00,562.00,562.20,562.10,0,'
+    '559.00,559.50,10,12,150000,98765,沪,黄金,2026-10-16,";',
+    'var hq_str_b_NKY="日经225指数,39000.50,120.30,0.31,0,15:00:00,2026-10-16,0,38900.00,'
+    '38880.20,39100.00,38800.00";',
+    'var hq_str_sz999999="";',
+]).encode("gbk")
+
+
+class TestParseSina(unittest.TestCase):
+    def setUp(self):
+        self.data = parse_sina(SINA_RAW)
+
+    def test_codes_and_missing(self):
+        self.assertEqual(list(self.data), ["sh600519", "sh000001", "hk00700", "usaapl", "au0", "gnky"])
+
+    def test_a_share(self):
+        e = self.data["sh600519"]
+        self.assertEqual(e["name"], "贵州茅台")
+        self.assertEqual(e["current_price"], 1510.5)
+        self.assertEqual(e["deals_vol"], 2345678)
+        self.assertEqual(e["purchaser_vol"], (100, 200, 300, 400, 500))
+        self.assertEqual(e["seller_price"][0], 1510.5)
+        self.assertEqual((e["date"], e["time"]), ("2026-10-16", "15:00:00"))
+
+    def test_index_volume_in_lots(self):
+        self.assertEqual(self.data["sh000001"]["deals_vol"], 12345600)
+        self.assertEqual(self.data["sh000001"]["purchaser_vol"], (0, 0, 0, 0, 0))
+
+    def test_quote_record_is_slotted_and_mapping_compatible(self):
+        e = self.data["sh600519"]
+        self.assertFalse(hasattr(e, "__dict__"))
+        self.assertEqual(e.current_price, e["current_price"])
+        self.assertEqual(e.get("missing", "-"), "-")
+        self.assertIn("time", e)
+        with self.assertRaises(KeyError):
+            e["missing"]
+        self.assertEqual(e.to_dict()["name"], "贵州茅台")
+
+    def test_other_markets(self):
+        self.assertEqual(self.data["hk00700"]["name"], "腾讯控股")
+        self.assertEqual(self.data["hk00700"]["purchaser_price"][0], 483.0)
+        self.assertEqual(self.data["usaapl"]["prev_close"], 228.95)
+        self.assertEqual(self.data["usaapl"]["time"], "04:00:00")
+        self.assertEqual(self.data["au0"]["time"], "14:30:00")
+        self.assertEqual(self.data["au0"]["prev_close"], 559.5)
+        self.assertEqual(self.data["gnky"]["opening_price"], 38900.0)
+
+
+class TestPayloadCache(unittest.TestCase):
+    def test_unchanged_line_reuses_entry(self):
+        cache = PayloadCache()
+        first = parse_sina(SINA_RAW, cache)
+        second = parse_sina(SINA_RAW, cache)
+        self.assertTrue(all(second[c] is first[c] for c in first))
+        self.assertEqual(cache.stats()["hits"], len(first))
+
+    def test_changed_line_is_reparsed(self):
+        cache = PayloadCache()
+        first = parse_sina(SINA_RAW, cache)
+        raw = SINA_RAW.replace(b"1510.50,1520.00", b"1511.00,1520.00")
+        second = parse_sina(raw, cache)
+        self.assertIsNot(second["sh600519"], first["sh600519"])
+        self.assertEqual(second["sh600519"]["current_price"], 1511.0)
+        self.assertIs(second["hk00700"], first["hk00700"])
+
+
+class _StreamResponse:
+    def __init__(self, raw: bytes, size: int):
+        self._blocks = [raw[i:i + size] for i in range(0, len(raw), size)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        yield from self._blocks
+
+
+class _StreamClient:
+    def __init__(self, raw: bytes, size: int = 37):
+        self.raw, self.size = raw, size
+
+    def get(self, url, headers=None, stream=False):
+        return _StreamResponse(self.raw, self.size)
+
+
+class TestIterSina(unittest.TestCase):
+    def test_stream_matches_full_parse(self):
+        # 按 37 字节切块：行会被切在任意位置（含 GBK 多字节中间）
+        rows = list(iter_sina(["sh600519", "hk00700"], client=_StreamClient(SINA_RAW)))
+        self.assertEqual(dict(rows), parse_sina(SINA_RAW))
+
+    def test_stream_yields_before_body_ends(self):
+        gen = iter_sina(["sh600519"], client=_StreamClient(SINA_RAW, size=400))
+        code, entry = next(gen)       # 只消费了第一块即产出首行
+        self.assertEqual(code, "sh600519")
+        gen.close()
+
+
+class TestSplitChunks(unittest.TestCase):
+    def test_bounded_by_count(self):
+        codes = [f"sh{600000 + i}" for i in range(25)]
+        chunks = split_chunks(codes, str, 0, max_codes=10, max_len=10**6)
+        self.assertEqual([len(c) for c in chunks], [10, 10, 5])
+        self.assertEqual(sum(chunks, []), codes)
+
+    def test_bounded_by_url_length(self):
+        codes = [f"sh{600000 + i}" for i in range(10)]   # 每个 8 字符 + 逗号
+        chunks = split_chunks(codes, str, 20, max_codes=100, max_len=20 + 9 * 4)
+        self.assertTrue(all(len(c) == 4 for c in chunks[:-1]))
+        self.assertEqual(sum(chunks, []), codes)
+
+    def test_empty(self):
+        self.assertEqual(split_chunks([], str, 0, max_codes=10), [])
+
+
+class TestFetchQuotes(unittest.TestCase):
+    def test_partial_failure_reported_per_chunk(self):
+        codes = [f"sh{600000 + i}" for i in range(5)]
+
+        def fake_sina(chunk, client=None, sink=None):
+            if "sh600002" in chunk:
+                raise OSError("boom")
+            return {c: {"name": c} for c in chunk}
+
+        with mock.patch.object(quotes, "_SINA_MAX_CODES", 2), \
+                mock.patch.object(quotes, "request_sina", fake_sina):
+            batch = fetch_quotes(codes, "sina")
+        self.assertEqual(batch.chunks, 3)
+        self.assertEqual(list(batch.data), ["sh600000", "sh600001", "sh600004"])
+        self.assertEqual(len(batch.failures), 1)
+        self.assertEqual(batch.failures[0].codes, ["sh600002", "sh600003"])
+
+
+class TestRouting(unittest.TestCase):
+    def test_preferred_source_reorders_routes(self):
+        routes = build_routes("eastmoney")
+        self.assertEqual(routes["sh"], ("eastmoney", "sina"))
+        self.assertEqual(routes["g"], ("sina", None))      # 全球指数仅新浪
+        self.assertEqual(routes["bj"], ("sina", "eastmoney"))
+
+    def test_group_by_source(self):
+        groups = group_by_source(["sh600519", "gnky", "au0"], build_routes("eastmoney"))
+        self.assertEqual(groups, {"eastmoney": ["sh600519", "au0"], "sina": ["gnky"]})
+
+    def test_missing_codes_refetched_from_fallback(self):
+        calls = []
+
+        def fake_em(chunk, client=None):
+            calls.append(("eastmoney", list(chunk)))
+            data = {c: {"name": c} for c in chunk if c != "sz000001"}
+            return [c in data for c in chunk], data
+
+        def fake_sina(chunk, client=None, sink=None):
+            calls.append(("sina", list(chunk)))
+            return {c: {"name": "sina:" + c} for c in chunk}
+
+        with mock.patch.object(quotes, "request_eastmoney", fake_em), \
+                mock.patch.object(quotes, "request_sina", fake_sina):
+            batch = QuoteRouter().fetch(["sh600519", "sz000001", "gnky"], "eastmoney")
+        self.assertEqual(list(batch.data), ["sh600519", "sz000001", "gnky"])
+        self.assertEqual(batch.data["sz000001"]["name"], "sina:sz000001")
+        self.assertEqual(batch.failures, [])
+        self.assertIn(("sina", ["sz000001"]), calls)
+
+    def test_slow_primary_is_hedged_to_fallback(self):
+        release = threading.Event()
+
+        def slow_sina(chunk, client=None, sink=None):
+            release.wait(2)
+            return {c: {"name": "sina"} for c in chunk}
+
+        def fast_em(chunk, client=None):
+            return [True] * len(chunk), {c: {"name": "em"} for c in chunk}
+
+        router = QuoteRouter()
+        router.health["sina"].DEFAULT_HEDGE_DELAY = 0.05
+        with mock.patch.object(quotes, "request_sina", slow_sina), \
+                mock.patch.object(quotes, "request_eastmoney", fast_em):
+            batch = router.fetch(["sh600519"], "sina")
+        release.set()
+        self.assertEqual(batch.data["sh600519"]["name"], "em")
+        self.assertEqual(router.stats()["hedge_wins"], 1)
+
+    def _slow_fetch(self, router, codes, delay=0.2):
+        def slow_sina(chunk, client=None, sink=None):
+            threading.Event().wait(delay)
+            return {c: {"name": "sina"} for c in chunk}
+
+        def fast_em(chunk, client=None):
+            return [True] * len(chunk), {c: {"name": "em"} for c in chunk}
+
+        router.health["sina"].DEFAULT_HEDGE_DELAY = 0.02
+        with mock.patch.object(quotes, "request_sina", slow_sina), \
+                mock.patch.object(quotes, "request_eastmoney", fast_em):
+            return router.fetch(codes, "sina")
+
+    def test_chunk_with_unhedgeable_codes_is_not_hedged(self):
+        # 全球指数无备用源：对冲只能覆盖 sh，胜出后会丢掉 gnky，故整段不对冲
+        router = QuoteRouter()
+        batch = self._slow_fetch(router, ["sh600519", "gnky"])
+        self.assertEqual(list(batch.data), ["sh600519", "gnky"])
+        self.assertEqual(batch.data["sh600519"]["name"], "sina")
+        self.assertEqual(batch.failures, [])
+        self.assertEqual(router.stats()["hedged"], 0)
+
+    def test_no_hedge_to_demoted_source(self):
+        router = QuoteRouter()
+        for _ in range(router.health["eastmoney"].DEMOTE_AFTER):
+            router.health["eastmoney"].record_failure()
+        batch = self._slow_fetch(router, ["sh600519"])
+        self.assertEqual(batch.data["sh600519"]["name"], "sina")
+        self.assertEqual(router.stats()["hedged"], 0)
+
+    def test_failing_source_is_demoted(self):
+        def broken_sina(chunk, client=None, sink=None):
+            raise OSError("down")
+
+        def em(chunk, client=None):
+            return [True] * len(chunk), {c: {"name": "em"} for c in chunk}
+
+        router = QuoteRouter()
+        with mock.patch.object(quotes, "request_sina", broken_sina), \
+                mock.patch.object(quotes, "request_eastmoney", em):
+            for _ in range(3):
+                batch = router.fetch(["sh600519"], "sina")
+                self.assertEqual(batch.data["sh600519"]["name"], "em")
+        self.assertEqual(router.routes("sina")["sh"], ("eastmoney", "sina"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""行情回放（按接收时间分轮 / 未变代码沿用同一对象 / 倍速等待 / ack 背压）的单元测试。"""
+
+import os
+import tempfile
+import threading
+import unittest
+
+from stockwidget.data.quotes import _Z5, Quote
+from stockwidget.data.replay import ReplayPlayer, iter_rounds
+from stockwidget.data.tick_log import TickLog, TickRecorder
+
+T0 = 1792114200.0     # 2026-10-16 09:30:00 北京时间
+
+
+def quote(price: float, name: str = "贵州茅台") -> Quote:
+    return Quote(name, 1500.0, 1499.0, price, 1520.0, 1495.0, 2345678, 3.5e9,
+                 (100, 200, 300, 400, 500), (1510.4, 1510.3, 1510.2, 1510.1, 1510.0),
+                 _Z5, _Z5, "2026-10-16", "09:30:03")
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "2026-10-16.ticks")
+        hk = quote(483.2, name="腾讯控股")
+        recorder = TickRecorder(self.tmp.name)
+        recorder.start()
+        recorder.record({"sh600519": quote(1510.5), "hk00700": hk}, now=T0)
+        recorder.record({"sh600519": quote(1511.0), "hk00700": hk}, now=T0 + 3)
+        recorder.record({"sh600519": quote(1511.5), "hk00700": quote(483.4, name="腾讯控股")}, now=T0 + 9)
+        recorder.stop()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def play(self, speed, auto_ack=True):
+        results, sleeps, done = [], [], threading.Event()
+
+        def on_result(result):
+            results.append(result)
+            if auto_ack:
+                player.ack()
+
+        player = ReplayPlayer(self.path, on_result, speed, on_finished=done.set, sleep=sleeps.append)
+        player.start()
+        self.assertTrue(done.wait(5))
+        return player, results, sleeps
+
+    def test_rounds_group_by_receive_time(self):
+        log = TickLog(self.path)
+        try:
+            rounds = [(ts, sorted(changed)) for ts, changed in iter_rounds(log)]
+        finally:
+            log.close()
+        self.assertEqual(rounds, [(T0, ["hk00700", "sh600519"]), (T0 + 3, ["sh600519"]),
+                                  (T0 + 9, ["hk00700", "sh600519"])])
+
+    def test_full_table_and_object_reuse(self):
+        player, results, _ = self.play(0)
+        self.assertEqual([r.seq for r in results], [1, 2, 3])
+        self.assertTrue(all(r.ok and not r.partial for r in results))
+        self.assertEqual([sorted(r.data) for r in results], [["hk00700", "sh600519"]] * 3)
+        self.assertIs(results[0].data["hk00700"], results[1].data["hk00700"])   # 未变化：同一对象
+        self.assertIsNot(results[1].data["sh600519"], results[0].data["sh600519"])
+        self.assertEqual(results[2].data["sh600519"]["current_price"], 1511.5)
+        self.assertIs(player.current, results[-1])
+        self.assertTrue(all(r.replay is player for r in results))
+        self.assertEqual(player.ts, T0 + 9)
+        self.assertEqual(player.stats()["records"], 5)
+
+    def test_speed_scales_recorded_gaps(self):
+        _, _, sleeps = self.play(10)
+        self.assertEqual([round(s, 6) for s in sleeps], [0.3, 0.6])
+        _, _, sleeps = self.play(0)
+        self.assertEqual(sleeps, [])
+
+    def test_waits_for_ack(self):
+        got = []
+        player = ReplayPlayer(self.path, got.append, 0, sleep=lambda _: None)
+        player.ACK_TIMEOUT = 5
+        player.start()
+        for _ in range(200):
+            if got:
+                break
+            threading.Event().wait(0.01)
+        threading.Event().wait(0.05)
+        self.assertEqual(len(got), 1)          # 未 ack 前不交付下一轮
+        player.stop()
+
+    def test_missing_file_reports_error(self):
+        results = []
+        done = threading.Event()
+        player = ReplayPlayer(os.path.join(self.tmp.name, "none.ticks"), results.append, 0,
+                              on_finished=done.set)
+        player.ACK_TIMEOUT = 0
+        player.start()
+        player._thread.join(5)
+        self.assertEqual(len(results), 1)
+        self.assertFalse(results[0].ok)
+        self.assertFalse(done.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
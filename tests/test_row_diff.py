@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""表格增量更新差分（行增删 / 移动步骤、变化列区间）的单元测试。"""
+
+import random
+import unittest
+
+from stockwidget.core.row_diff import changed_spans, plan_row_ops
+
+
+def apply_ops(old, new, ops):
+    rows = list(old)
+    for op, a, b in ops:
+        if op == "remove":
+            del rows[a:a + b]
+        elif op == "move":
+            rows.insert(b, rows.pop(a))
+        else:
+            rows[a:a] = new[a:a + b]
+    return rows
+
+
+class TestPlanRowOps(unittest.TestCase):
+    def test_unchanged_has_no_ops(self):
+        self.assertEqual(plan_row_ops(["a", "b", "c"], ["a", "b", "c"]), [])
+
+    def test_remove_runs_merged_bottom_up(self):
+        ops = plan_row_ops(["a", "b", "c", "d", "e"], ["a", "d"])
+        self.assertEqual(ops, [("remove", 4, 1), ("remove", 1, 2)])
+
+    def test_insert_runs_merged(self):
+        ops = plan_row_ops(["a", "d"], ["x", "a", "b", "c", "d"])
+        self.assertEqual(ops, [("insert", 0, 1), ("insert", 2, 2)])
+
+    def test_move(self):
+        self.assertEqual(plan_row_ops(["a", "b", "c"], ["c", "a", "b"]), [("move", 2, 0)])
+
+    def test_random_sequences_reach_target(self):
+        rng = random.Random(7)
+        for _ in range(500):
+            old = rng.sample(range(20), rng.randint(0, 12))
+            new = rng.sample(range(20), rng.randint(0, 12))
+            self.assertEqual(apply_ops(old, new, plan_row_ops(old, new)), new)
+
+
+class TestChangedSpans(unittest.TestCase):
+    def test_spans(self):
+        self.assertEqual(changed_spans([1, 2, 3, 4, 5], [1, 0, 0, 4, 0]), [(1, 2), (4, 4)])
+
+    def test_no_change(self):
+        self.assertEqual(changed_spans(["a", "b"], ["a", "b"]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""行情行格式化（显示参数快照 / 批量指标与颜色符号 / 复用缓存）的单元测试。"""
+
+import unittest
+
+from stockwidget.core import indicators
+from stockwidget.core.row_format import COLUMN, DisplaySettings, RowFormatter, format_row, format_rows
+from stockwidget.data.quotes import _Z5, Quote
+
+
+def quote(price: float = 1510.5, name: str = "贵州茅台") -> Quote:
+    return Quote(name, 1500.0, 1499.0, price, 1520.0, 1495.0, 2345600, 3.5e9,
+                 (100, 200, 300, 400, 500), (1510.4, 1510.3, 1510.2, 1510.1, 1510.0),
+                 (300, 0, 0, 0, 0), (1510.5, 0, 0, 0, 0), "2026-10-16", "09:30:03")
+
+
+def settings(**kw) -> DisplaySettings:
+    base = dict(type_visible=False, code_visible=False, name_length=-1,
+                types={"sh600519": "股", "sh000001": "指"}, costs={"sh600519": 1400.0})
+    base.update(kw)
+    return DisplaySettings(**base)
+
+
+def cell(row, header):
+    return row.cells[COLUMN[header]]
+
+
+def sign(row, header):
+    return row.signs[COLUMN[header]]
+
+
+class TestFormatRow(unittest.TestCase):
+    def test_indicators_and_signs(self):
+        row = format_row("sh600519", quote(), settings())
+        self.assertEqual(cell(row, "名称"), "贵州茅台")
+        self.assertEqual(cell(row, "现价"), "1510.50 ")
+        self.assertEqual(cell(row, "涨跌"), "+11.50")
+        self.assertEqual(cell(row, "涨幅"), "+0.77%")
+        self.assertEqual(cell(row, "浮盈"), "+7.89%")
+        self.assertEqual(cell(row, "卖一"), ">3")
+        self.assertEqual(cell(row, "成交量"), "2.35万")
+        self.assertEqual(cell(row, "K线"), {"k": (1500.0, 1510.5, 1520.0, 1495.0, 1499.0), "days": "sh600519"})
+        self.assertEqual((sign(row, "现价"), sign(row, "浮盈"), sign(row, "买一"), sign(row, "卖一")), (1, 1, 1, -1))
+        self.assertEqual(sign(row, "委比"), 1)
+
+    def test_name_settings(self):
+        row = format_row("sh600519", quote(), settings(type_visible=True, code_visible=True, name_length=2))
+        self.assertEqual(cell(row, "名称"), "(股)600519 贵州")
+
+    def test_index_blanks_columns(self):
+        row = format_row("sh000001", quote(3200.0, name="上证指数"), settings())
+        for header in ("浮盈", "买一", "卖一", "委比", "均价"):
+            self.assertEqual(cell(row, header), "-")
+            self.assertEqual(sign(row, header), 0)
+
+
+class TestIndicators(unittest.TestCase):
+    def quotes(self):
+        auction = Quote("竞价", 0.0, 10.0, 0.0, 0.0, 0.0, 0, 0.0, (500, 0, 0, 0, 0), (10.1, 0, 0, 0, 0),
+                        (1200, 300, 0, 0, 0), (10.1, 0, 0, 0, 0), "2026-10-16", "09:20:00")
+        premarket = Quote("盘前", 0.0, 8.0, 0.0, 0.0, 0.0, 0, 0.0, _Z5, _Z5, _Z5, _Z5, "2026-10-16", "09:00:00")
+        return [quote(), quote(1495.0), auction, premarket]
+
+    @staticmethod
+    def columns(rows) -> dict:
+        rows = list(rows)
+        return {name: [r[i] for r in rows] for i, name in enumerate(indicators.OUTPUTS)}
+
+    def test_batch_values(self):
+        v = self.columns(indicators.quote_rows(self.quotes(), [1400.0, None, None, None]))
+        self.assertEqual(v["cur"], [1510.5, 1495.0, 10.1, 8.0])
+        self.assertEqual(v["change_sign"], [1, -1, 1, 0])
+        self.assertEqual(v["arrow"], [0, -1, 0, 0])
+        self.assertEqual(v["has_cost"], [True, False, False, False])
+        self.assertEqual(v["auction"], [False, False, True, False])
+        self.assertEqual((v["paired"][2], v["unpaired"][2], v["b1_sign"][2], v["s1_sign"][2]), (12, -3, -1, -1))
+        self.assertEqual(v["open"][3], 8.0)
+
+    @unittest.skipIf(indicators.numpy is None, "未安装 NumPy")
+    def test_numpy_matches_per_quote(self):
+        quotes, costs = self.quotes() * 3, [1400.0, 0, None, 12] * 3
+        expected = list(indicators.quote_rows(quotes, costs, np=None))
+        self.assertEqual(list(indicators.quote_rows(quotes, costs, min_rows=0)), expected)
+        self.assertEqual(list(indicators.quote_rows([], [], min_rows=0)), [])
+
+    def test_empty(self):
+        self.assertEqual(format_rows([], settings()), [])
+        self.assertEqual(list(indicators.quote_rows([], [])), [])
+
+    def test_batch_matches_single_rows(self):
+        items = [("sh600519", q) for q in self.quotes()]
+        batch = format_rows(items, settings())
+        self.assertEqual([r.cells for r in batch], [format_row(c, q, settings()).cells for c, q in items])
+
+
+class TestRowFormatter(unittest.TestCase):
+    def test_reuses_unchanged_rows(self):
+        formatter = RowFormatter()
+        a, b = quote(), quote(1511.0)
+        rows, changed = formatter.format({"sh600519": a, "sz000001": b}, settings())
+        self.assertEqual(changed, 2)
+        again, changed = formatter.format({"sh600519": a, "sz000001": quote(1512.0)}, settings())
+        self.assertEqual(changed, 1)
+        self.assertIs(again[0], rows[0])
+
+    def test_settings_change_reformats(self):
+        formatter = RowFormatter()
+        a = quote()
+        formatter.format({"sh600519": a}, settings())
+        rows, changed = formatter.format({"sh600519": a}, settings(costs={}))
+        self.assertEqual(changed, 1)
+        self.assertEqual(cell(rows[0], "浮盈"), "-")
+
+
+if __name__ == "__main__":
+    unittest.main()
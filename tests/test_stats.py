@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""调试统计工具（分位数）的单元测试。"""
+
+import unittest
+from collections import deque
+
+from stockwidget.core.stats import percentile
+
+
+class TestPercentile(unittest.TestCase):
+    def test_empty(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertIsNone(percentile(deque(), 95))
+
+    def test_nearest_rank(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual([percentile(values, p) for p in (0, 50, 100)], [1, 3, 5])
+        self.assertEqual(percentile(range(1, 101), 95), 95)
+
+    def test_clamped(self):
+        self.assertEqual(percentile([2.0], 99), 2.0)
+        self.assertEqual(percentile([1, 2], 150), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""当日分时环形缓冲的单元测试。"""
+
+import unittest
+
+from stockwidget.core.tick_history import TickHistory, TickRing
+
+
+def quote(price, vol=0, date="2026-10-16"):
+    return {"current_price": price, "deals_vol": vol, "deals_amt": price * vol, "date": date}
+
+
+def prices(ring: TickRing) -> list:
+    return [p for seg in ring.segments() for p in seg[1]]
+
+
+class TestTickRing(unittest.TestCase):
+    def test_grows_then_overwrites_oldest(self):
+        ring = TickRing(capacity=300)
+        for i in range(500):
+            ring.append(i, float(i), i, i)
+        self.assertEqual(len(ring), 300)
+        self.assertEqual(prices(ring), [float(i) for i in range(200, 500)])
+        self.assertEqual(len(ring.segments()), 2)       # 回绕后分两段
+        self.assertEqual(ring.last(), (499.0, 499.0, 499.0, 499.0))
+        self.assertEqual(ring.nbytes(), 300 * 32)
+
+    def test_since_yields_only_new_points(self):
+        ring = TickRing(capacity=4)
+        for i in range(3):
+            ring.append(i, float(i), 0, 0)
+        seen = ring.total
+        for i in range(3, 6):
+            ring.append(i, float(i), 0, 0)
+        self.assertEqual(list(ring.since(seen)), [(3.0, 3.0), (4.0, 4.0), (5.0, 5.0)])
+        self.assertEqual(list(ring.since(0)), [(2.0, 2.0), (3.0, 3.0), (4.0, 4.0), (5.0, 5.0)])  # 已覆盖的点跳过
+        generation = ring.generation
+        ring.clear()
+        self.assertEqual((ring.total, ring.generation), (0, generation + 1))
+
+    def test_views_survive_growth(self):
+        ring = TickRing(capacity=1024)
+        ring.append(0, 1.0, 0, 0)
+        (seg,) = ring.segments()
+        for i in range(TickRing.INITIAL + 10):
+            ring.append(i, 2.0, 0, 0)                   # 扩容不影响已取出的视图
+        self.assertEqual(list(seg[1]), [1.0])
+        self.assertEqual(len(ring), TickRing.INITIAL + 11)
+
+
+class TestTickHistory(unittest.TestCase):
+    def test_same_entry_not_appended_twice(self):
+        history = TickHistory(capacity=16)
+        a, b = quote(10.0, 100), quote(10.1, 200)
+        self.assertEqual(history.record({"sh600519": a}, now=1.0), 1)
+        self.assertEqual(history.record({"sh600519": a}, now=2.0), 0)
+        self.assertEqual(history.record({"sh600519": b}, now=3.0), 1)
+        (seg,) = history.segments("sh600519")
+        self.assertEqual((list(seg[0]), list(seg[1]), list(seg[2])), ([1.0, 3.0], [10.0, 10.1], [100.0, 200.0]))
+        self.assertIs(history.ring("sh600519").last_entry(), b)
+
+    def test_capacity_covers_whole_session(self):
+        history = TickHistory(interval=0.25)
+        self.assertGreaterEqual(history.capacity_for("hk00700"), 6 * 3600 * 4)      # 港股交易时段约 6 小时
+        self.assertGreaterEqual(history.capacity_for("usaapl"), 6.5 * 3600 * 4)
+        self.assertLess(history.capacity_for("sh600519"), history.capacity_for("hk00700"))
+        self.assertEqual(history.capacity_for("gnky"), TickHistory.MAX_CAPACITY)
+        self.assertEqual(TickHistory(capacity=16).capacity_for("hk00700"), 16)
+
+    def test_shorter_interval_grows_existing_rings(self):
+        history = TickHistory(interval=2)
+        history.record({"hk00700": quote(300.0)}, now=1.0)
+        before = history.ring("hk00700").capacity
+        history.set_interval(0.5)
+        grown = history.ring("hk00700").capacity
+        self.assertGreaterEqual(grown, 4 * before - 4)
+        history.set_interval(5)                                                 # 只增不减
+        self.assertEqual(history.ring("hk00700").capacity, grown)
+
+    def test_new_date_resets_and_retain_drops(self):
+        history = TickHistory(capacity=16)
+        history.record({"sh600519": quote(10.0), "sz000001": quote(0.0)}, now=1.0)
+        history.record({"sh600519": quote(11.0, date="2026-10-19")}, now=2.0)
+        self.assertEqual(prices(history.ring("sh600519")), [11.0])
+        self.assertEqual(len(history.ring("sz000001")), 0)   # 无成交价不记录
+        history.retain(["sh600519"])
+        self.assertEqual(list(history.memory()), ["sh600519"])
+        self.assertEqual(history.stats()["points"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
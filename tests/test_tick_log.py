@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""逐笔行情二进制日志（写入 / 去重 / 截断半条 / mmap 读取）的单元测试。"""
+
+import os
+import tempfile
+import unittest
+
+from stockwidget.data.quotes import _Z5, Quote
+from stockwidget.data.tick_log import RECORD, TickLog, TickRecorder, log_day
+
+T0 = 1792114200.0     # 2026-10-16 09:30:00 北京时间
+
+
+def quote(price: float, name: str = "贵州茅台") -> Quote:
+    return Quote(name, 1500.0, 1499.0, price, 1520.0, 1495.0, 2345678, 3.5e9,
+                 (100, 200, 300, 400, 500), (1510.4, 1510.3, 1510.2, 1510.1, 1510.0),
+                 _Z5, _Z5, "2026-10-16", "09:30:03")
+
+
+class TestTickLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "2026-10-16.ticks")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, *rounds):
+        recorder = TickRecorder(self.tmp.name)
+        recorder.start()
+        counts = [recorder.record(data, now=T0 + i) for i, data in enumerate(rounds)]
+        recorder.stop()
+        return recorder, counts
+
+    def test_round_trip_and_dedupe(self):
+        a, b = quote(1510.5), quote(1511.0)
+        hk = quote(483.2, name="腾讯控股")
+        recorder, counts = self.record({"sh600519": a, "hk00700": hk}, {"sh600519": a, "hk00700": hk},
+                                       {"sh600519": b, "hk00700": hk})
+        self.assertEqual(counts, [2, 0, 1])
+        self.assertEqual(recorder.stats()["records"], 3)
+        self.assertEqual(os.path.getsize(self.path), 3 * RECORD.size)
+        log = TickLog(self.path)
+        try:
+            rows = list(log)
+        finally:
+            log.close()
+        self.assertEqual([(ts, code) for ts, code, _ in rows],
+                         [(T0, "sh600519"), (T0, "hk00700"), (T0 + 2, "sh600519")])
+        self.assertEqual(rows[0][2], a)
+        self.assertEqual(rows[2][2], b)
+        self.assertEqual(log.names, ["sh600519", "贵州茅台", "2026-10-16", "hk00700", "腾讯控股"])
+
+    def test_torn_tail_is_dropped_on_reopen(self):
+        self.record({"sh600519": quote(1510.5)})
+        with open(self.path, "ab") as f:
+            f.write(b"\x01" * 10)                           # 模拟写到一半时崩溃
+        log = TickLog(self.path)
+        self.assertEqual(len(log), 1)                       # 读取方不读半条
+        log.close()
+        self.record({"sh600519": quote(1511.0)})
+        self.assertEqual(os.path.getsize(self.path), 2 * RECORD.size)
+        log = TickLog(self.path)
+        self.assertEqual([q.current_price for _, _, q in log], [1510.5, 1511.0])
+        log.close()
+
+    def test_bad_record_is_skipped_and_counted(self):
+        bad = quote(1510.5)
+        bad.deals_vol = float("nan")                                   # NaN 无法转为整数
+        recorder, counts = self.record({"sh600519": bad, "hk00700": quote(483.2)},
+                                       {"sh600519": quote(1511.0)})
+        self.assertEqual(counts, [2, 1])
+        stats = recorder.stats()
+        self.assertEqual((stats["records"], stats["errors"]), (2, 1))  # 写线程未退出，后续记录照常写入
+        log = TickLog(self.path)
+        self.assertEqual([(code, q.current_price) for _, code, q in log],
+                         [("hk00700", 483.2), ("sh600519", 1511.0)])
+        log.close()
+
+    def test_log_day_is_beijing_date(self):
+        self.assertEqual(log_day(T0 + 15 * 3600), "2026-10-17")   # 北京时间次日 00:30
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""交易时段日历的单元测试。"""
+
+import unittest
+from datetime import date, datetime, timezone
+
+from stockwidget.core.trading_calendar import TradingCalendar, easter, futures_product, session_seconds
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class TestTradingCalendar(unittest.TestCase):
+    def setUp(self):
+        self.cal = TradingCalendar({"cn": ["2026-02-17"]})
+
+    def test_a_share_sessions(self):
+        # 2026-10-16 周五，北京时间 = UTC + 8
+        self.assertTrue(self.cal.is_open("sh", now=utc(2026, 10, 16, 2, 0)))      # 10:00
+        self.assertTrue(self.cal.is_open("sz", now=utc(2026, 10, 16, 1, 15)))     # 9:15 集合竞价
+        self.assertFalse(self.cal.is_open("sh", now=utc(2026, 10, 16, 4, 0)))     # 12:00 午休
+        self.assertTrue(self.cal.is_open("sh", now=utc(2026, 10, 16, 7, 2)))      # 15:02 收盘宽限
+        self.assertFalse(self.cal.is_open("sh", now=utc(2026, 10, 16, 8, 0)))     # 16:00
+        self.assertFalse(self.cal.is_open("sh", now=utc(2026, 10, 17, 2, 0)))     # 周六
+
+    def test_cn_holidays(self):
+        self.assertFalse(self.cal.is_open("sh", now=utc(2026, 10, 1, 2, 0)))      # 国庆（规则）
+        self.assertFalse(self.cal.is_open("sh", now=utc(2026, 2, 17, 2, 0)))      # 春节（配置）
+        self.assertTrue(self.cal.is_trading_day("cn", date(2026, 10, 9)))
+
+    def test_us_dst(self):
+        # 2026 年夏令时自 3 月 8 日起：美东 9:30 开盘分别对应 UTC 14:30 / 13:30
+        self.assertFalse(self.cal.is_open("us", now=utc(2026, 3, 6, 14, 0)))      # 9:00 EST
+        self.assertTrue(self.cal.is_open("us", now=utc(2026, 3, 6, 14, 45)))      # 9:45 EST
+        self.assertTrue(self.cal.is_open("us", now=utc(2026, 3, 9, 13, 45)))      # 9:45 EDT
+        self.assertFalse(self.cal.is_open("us", now=utc(2026, 3, 9, 20, 30)))     # 16:30 EDT
+
+    def test_us_holidays(self):
+        self.assertEqual(easter(2026), date(2026, 4, 5))
+        for day in (date(2026, 4, 3), date(2026, 7, 3), date(2026, 11, 26), date(2026, 1, 19)):
+            self.assertTrue(self.cal.is_holiday("us", day), day)
+        self.assertFalse(self.cal.is_holiday("us", date(2026, 7, 6)))
+
+    def test_hk(self):
+        self.assertTrue(self.cal.is_open("hk", now=utc(2026, 10, 16, 8, 5)))      # 16:05 收市竞价
+        self.assertFalse(self.cal.is_open("hk", now=utc(2026, 10, 16, 4, 30)))    # 12:30 午休
+        self.assertFalse(self.cal.is_open("hk", now=utc(2026, 4, 6, 2, 0)))       # 复活节星期一
+
+    def test_session_seconds(self):
+        self.assertEqual(session_seconds("sh"), (135 + 120 + 2 * 4) * 60)    # 9:15–11:30 / 13:00–15:00 + 提前量与宽限
+        self.assertGreater(session_seconds("", "au0"), session_seconds("", "rb0"))   # 黄金夜盘到 2:30
+
+    def test_futures_night_sessions(self):
+        self.assertEqual(futures_product("au2512"), "au")
+        # 周五夜盘 22:00；周六凌晨 2:00 黄金仍在夜盘，螺纹钢 23:00 已收
+        self.assertTrue(self.cal.is_open("", "au0", now=utc(2026, 10, 16, 14, 0)))
+        self.assertTrue(self.cal.is_open("", "au0", now=utc(2026, 10, 16, 18, 0)))
+        self.assertFalse(self.cal.is_open("", "rb0", now=utc(2026, 10, 16, 18, 0)))
+        self.assertFalse(self.cal.is_open("", "au0", now=utc(2026, 10, 16, 12, 0)))   # 20:00
+        # 国庆前一交易日（9/30）无夜盘
+        self.assertFalse(self.cal.is_open("", "au0", now=utc(2026, 9, 30, 14, 0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
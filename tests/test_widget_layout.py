@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""悬浮窗列宽布局的单元测试：列宽由 _relayout 设置且不被 Qt 的自动测量覆盖（需要 PySide6）。"""
+
+import os
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+try:
+    from PySide6.QtWidgets import QApplication
+except ImportError:      # 未安装 PySide6 的环境只跑纯逻辑测试
+    QApplication = None
+
+HEADERS = ["名称", "现价", "涨幅"]
+META = [[0, 1, 1], [0, -1, -1]]
+
+
+@unittest.skipIf(QApplication is None, "需要 PySide6")
+class TestColumnLayout(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        from stockwidget.ui.widget import FloatLabel
+        self.t = 0.0
+        self.w = FloatLabel({"header_visible": True}, {})
+        self.w.timer.stop()
+        self.w._column_fit._clock = lambda: self.t
+
+    def tearDown(self):
+        self.w._worker.stop()
+        self.w.shutdown()
+        self.w.deleteLater()
+
+    def show_rows(self, rows):
+        self.w.model.set_rows_headers(rows, HEADERS, META, keys=["sh600519", "hk00700"])
+        self.w._fit_columns()
+
+    def widths(self) -> list[int]:
+        return [self.w.table.columnWidth(c) for c in range(len(HEADERS))]
+
+    def test_column_widths_are_the_ones_set(self):
+        self.show_rows([["贵州茅台", "1510.50", "+0.77%"], ["腾讯控股", "483.20", "-1.05%"]])
+        applied, _ = self.w._applied
+        self.assertEqual(self.widths(), applied)
+        frame = 2 * self.w.table.frameWidth()
+        self.assertEqual(self.w.table.width(), frame + sum(applied))
+
+    def test_shrink_is_delayed(self):
+        self.show_rows([["贵州茅台", "11510.50", "+10.77%"], ["腾讯控股", "483.20", "-1.05%"]])
+        wide = self.widths()
+        self.t = 1.0
+        self.show_rows([["贵州茅台", "1.50", "+0.7%"], ["腾讯控股", "4.20", "-1.0%"]])
+        self.assertEqual(self.widths(), wide)                  # 未到 SHRINK_AFTER：保持原宽度
+        self.t = 1.0 + self.w._column_fit.shrink_after
+        self.show_rows([["贵州茅台", "1.50", "+0.7%"], ["腾讯控股", "4.20", "-1.0%"]])
+        narrow = self.widths()
+        self.assertLess(narrow[1], wide[1])
+        self.assertEqual(narrow, self.w._applied[0])
+
+
+if __name__ == "__main__":
+    unittest.main()